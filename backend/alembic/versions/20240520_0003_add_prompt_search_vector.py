@@ -0,0 +1,49 @@
+"""add weighted full-text search vector to prompts
+
+Revision ID: 20240520_0003
+Revises: 20240501_0002
+Create Date: 2024-05-20 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240520_0003"
+down_revision = "20240501_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("prompts", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+
+    # Backfill with the same weighting as app.services.fulltext.refresh_search_vectors.
+    op.execute(
+        """
+        UPDATE prompts AS p
+        SET search_vector =
+            setweight(to_tsvector('simple', coalesce(p.display_name, '') || ' ' || p.name), 'A')
+            || setweight(to_tsvector('simple', coalesce(
+                (SELECT string_agg(t.tag, ' ') FROM prompt_tags AS t WHERE t.prompt_id = p.id), ''
+            )), 'B')
+            || setweight(to_tsvector('simple', coalesce(p.description, '')), 'C')
+            || setweight(to_tsvector('simple', coalesce(
+                (SELECT v.content FROM prompt_versions AS v WHERE v.id = p.current_version_id), ''
+            )), 'D')
+        """
+    )
+
+    op.create_index(
+        "idx_prompts_search_vector",
+        "prompts",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_prompts_search_vector", table_name="prompts")
+    op.drop_column("prompts", "search_vector")
@@ -0,0 +1,46 @@
+"""add pg_trgm indexes for fuzzy library search
+
+Revision ID: 20240527_0004
+Revises: 20240520_0003
+Create Date: 2024-05-27 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20240527_0004"
+down_revision = "20240520_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_prompts_display_name_trgm",
+        "prompts",
+        ["display_name"],
+        postgresql_using="gin",
+        postgresql_ops={"display_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_prompts_name_trgm",
+        "prompts",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_prompt_tags_tag_trgm",
+        "prompt_tags",
+        ["tag"],
+        postgresql_using="gin",
+        postgresql_ops={"tag": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_prompt_tags_tag_trgm", table_name="prompt_tags")
+    op.drop_index("idx_prompts_name_trgm", table_name="prompts")
+    op.drop_index("idx_prompts_display_name_trgm", table_name="prompts")
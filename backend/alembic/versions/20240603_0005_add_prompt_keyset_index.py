@@ -0,0 +1,25 @@
+"""add (updated_at, id) index for keyset pagination of prompts
+
+Revision ID: 20240603_0005
+Revises: 20240527_0004
+Create Date: 2024-06-03 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20240603_0005"
+down_revision = "20240527_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves ORDER BY updated_at DESC, id DESC and the (updated_at, id) < (...) seek
+    # predicate with one backward range scan.
+    op.create_index("idx_prompts_updated_at_id", "prompts", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_prompts_updated_at_id", table_name="prompts")
@@ -0,0 +1,38 @@
+"""add library_changes log for delta sync
+
+Revision ID: 20240610_0006
+Revises: 20240603_0005
+Create Date: 2024-06-10 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240610_0006"
+down_revision = "20240603_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "library_changes",
+        sa.Column("seq", sa.BigInteger(), primary_key=True, autoincrement=True, nullable=False),
+        sa.Column("prompt_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("idx_library_changes_prompt_id", "library_changes", ["prompt_id"])
+    # Seed the log with every existing prompt so a client starting from an empty token
+    # receives the whole library, oldest change first.
+    op.execute(
+        "INSERT INTO library_changes (prompt_id, changed_at) "
+        "SELECT id, updated_at FROM prompts ORDER BY updated_at, id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_library_changes_prompt_id", table_name="library_changes")
+    op.drop_table("library_changes")
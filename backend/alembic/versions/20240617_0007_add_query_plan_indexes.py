@@ -0,0 +1,29 @@
+"""index the hot query shapes found by the query-plan check
+
+Revision ID: 20240617_0007
+Revises: 20240610_0006
+Create Date: 2024-06-17 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20240617_0007"
+down_revision = "20240610_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # prompts.current_version_id references prompt_versions; without an index every
+    # version delete (and any lookup of the prompt a version is current for) scans prompts.
+    op.create_index("idx_prompts_current_version", "prompts", ["current_version_id"])
+    # Delta sync reads library_changes by seq range (the primary key). This index only
+    # tempted planners into walking the whole log in prompt_id order for the GROUP BY.
+    op.drop_index("idx_library_changes_prompt_id", table_name="library_changes")
+
+
+def downgrade() -> None:
+    op.create_index("idx_library_changes_prompt_id", "library_changes", ["prompt_id"])
+    op.drop_index("idx_prompts_current_version", table_name="prompts")
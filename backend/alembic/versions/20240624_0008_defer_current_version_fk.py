@@ -0,0 +1,41 @@
+"""make prompts.current_version_id checked at commit
+
+Revision ID: 20240624_0008
+Revises: 20240617_0007
+Create Date: 2024-06-24 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20240624_0008"
+down_revision = "20240617_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Creating a prompt inserts the prompt row already pointing at its first version,
+    # then the version: one INSERT each instead of INSERT, INSERT, UPDATE.
+    op.drop_constraint("fk_prompts_current_version", "prompts", type_="foreignkey")
+    op.create_foreign_key(
+        "fk_prompts_current_version",
+        "prompts",
+        "prompt_versions",
+        ["current_version_id"],
+        ["id"],
+        deferrable=True,
+        initially="DEFERRED",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_prompts_current_version", "prompts", type_="foreignkey")
+    op.create_foreign_key(
+        "fk_prompts_current_version",
+        "prompts",
+        "prompt_versions",
+        ["current_version_id"],
+        ["id"],
+    )
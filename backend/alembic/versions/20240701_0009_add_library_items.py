@@ -0,0 +1,110 @@
+"""add library_items read model
+
+Revision ID: 20240701_0009
+Revises: 20240624_0008
+Create Date: 2024-07-01 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240701_0009"
+down_revision = "20240624_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "library_items",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("prompts.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("item_type", sa.String(length=32), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("tags", postgresql.JSONB(), nullable=False),
+        sa.Column("version_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+
+    # Backfill with the same row shape as app.services.library_items (tags sorted).
+    op.execute(
+        """
+        INSERT INTO library_items (
+            id, name, title, description, item_type, status, tags,
+            version_id, version, content, created_at, updated_at, search_vector
+        )
+        SELECT
+            p.id, p.name, p.display_name, p.description, p.item_type, p.status,
+            coalesce(
+                (SELECT jsonb_agg(t.tag ORDER BY t.tag) FROM prompt_tags AS t WHERE t.prompt_id = p.id),
+                '[]'::jsonb
+            ),
+            v.id, v.version_number, v.content, p.created_at, p.updated_at, p.search_vector
+        FROM prompts AS p
+        JOIN prompt_versions AS v ON v.id = p.current_version_id
+        """
+    )
+
+    op.create_index("idx_library_items_updated_at_id", "library_items", ["updated_at", "id"])
+    op.create_index("idx_library_items_item_type", "library_items", ["item_type"])
+    op.create_index(
+        "idx_library_items_search_vector",
+        "library_items",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "idx_library_items_title_trgm",
+        "library_items",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_library_items_name_trgm",
+        "library_items",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    # Fuzzy search reads the library_items trigram indexes now; these only slowed writes.
+    op.drop_index("idx_prompts_name_trgm", table_name="prompts")
+    op.drop_index("idx_prompts_display_name_trgm", table_name="prompts")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "idx_prompts_display_name_trgm",
+        "prompts",
+        ["display_name"],
+        postgresql_using="gin",
+        postgresql_ops={"display_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_prompts_name_trgm",
+        "prompts",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.drop_index("idx_library_items_name_trgm", table_name="library_items")
+    op.drop_index("idx_library_items_title_trgm", table_name="library_items")
+    op.drop_index("idx_library_items_search_vector", table_name="library_items")
+    op.drop_index("idx_library_items_item_type", table_name="library_items")
+    op.drop_index("idx_library_items_updated_at_id", table_name="library_items")
+    op.drop_table("library_items")
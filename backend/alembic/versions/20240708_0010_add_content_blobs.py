@@ -0,0 +1,122 @@
+"""store version bodies in content_blobs
+
+Revision ID: 20240708_0010
+Revises: 20240701_0009
+Create Date: 2024-07-08 00:00:00.000000
+"""
+
+import hashlib
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240708_0010"
+down_revision = "20240701_0009"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+# Frozen copy of app.models.content's encoding, so the backfill never drifts with the app.
+COMPRESS_MIN_BYTES = 256
+ZLIB_LEVEL = 6
+
+
+def _blob(text):
+    raw = text.encode()
+    encoding, data = "plain", raw
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, ZLIB_LEVEL)
+        if len(compressed) < len(raw):
+            encoding, data = "zlib", compressed
+    return {"hash": hashlib.sha256(raw).hexdigest(), "encoding": encoding, "size": len(raw), "data": data}
+
+
+def _decode(encoding, data):
+    data = bytes(data)
+    return zlib.decompress(data).decode() if encoding == "zlib" else data.decode()
+
+
+def _batches(bind, query):
+    """Rows of ``query`` (which must select ``id`` first) in keyset pages of BATCH_SIZE."""
+
+    last_id = None
+    while True:
+        where = "" if last_id is None else "WHERE v.id > :last_id"
+        rows = bind.execute(
+            sa.text(query.format(where=where) + " ORDER BY v.id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_blobs",
+        sa.Column("hash", sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column("encoding", sa.String(length=16), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+    op.add_column("prompt_versions", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+    # Backfill in Python: hashing and compression have no SQL equivalent worth relying on.
+    bind = op.get_bind()
+    insert_blobs = postgresql.insert(
+        sa.table(
+            "content_blobs",
+            sa.column("hash"),
+            sa.column("encoding"),
+            sa.column("size"),
+            sa.column("data", sa.LargeBinary()),
+        )
+    ).on_conflict_do_nothing(index_elements=["hash"])
+    set_hash = sa.text("UPDATE prompt_versions SET content_hash = :hash WHERE id = :id")
+    for rows in _batches(bind, "SELECT v.id, v.content FROM prompt_versions AS v {where}"):
+        blobs = {row.id: _blob(row.content) for row in rows}
+        bind.execute(insert_blobs, list({blob["hash"]: blob for blob in blobs.values()}.values()))
+        bind.execute(set_hash, [{"id": version_id, "hash": blob["hash"]} for version_id, blob in blobs.items()])
+
+    op.alter_column("prompt_versions", "content_hash", nullable=False)
+    op.create_foreign_key(
+        "fk_prompt_versions_content_hash", "prompt_versions", "content_blobs", ["content_hash"], ["hash"]
+    )
+    op.drop_column("prompt_versions", "content")
+
+    # library_items carries its own vector now; the copy on prompts has no readers left.
+    op.drop_index("idx_prompts_search_vector", table_name="prompts")
+    op.drop_column("prompts", "search_vector")
+
+
+def downgrade() -> None:
+    op.add_column("prompts", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        "UPDATE prompts SET search_vector = i.search_vector FROM library_items AS i WHERE i.id = prompts.id"
+    )
+    op.create_index(
+        "idx_prompts_search_vector",
+        "prompts",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+    op.add_column("prompt_versions", sa.Column("content", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    set_content = sa.text("UPDATE prompt_versions SET content = :content WHERE id = :id")
+    query = (
+        "SELECT v.id, b.encoding, b.data FROM prompt_versions AS v"
+        " JOIN content_blobs AS b ON b.hash = v.content_hash {where}"
+    )
+    for rows in _batches(bind, query):
+        bind.execute(set_content, [{"id": row.id, "content": _decode(row.encoding, row.data)} for row in rows])
+    op.alter_column("prompt_versions", "content", nullable=False)
+
+    op.drop_constraint("fk_prompt_versions_content_hash", "prompt_versions", type_="foreignkey")
+    op.drop_column("prompt_versions", "content_hash")
+    op.drop_table("content_blobs")
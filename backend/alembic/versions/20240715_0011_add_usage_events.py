@@ -0,0 +1,55 @@
+"""add usage_events
+
+Revision ID: 20240715_0011
+Revises: 20240708_0010
+Create Date: 2024-07-15 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240715_0011"
+down_revision = "20240708_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usage_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True, nullable=False),
+        sa.Column(
+            "prompt_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("prompts.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "version_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("prompt_versions.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("client_type", sa.String(length=16), nullable=False),
+        sa.Column("project_key", sa.String(length=255), nullable=True),
+        sa.Column("context", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint(
+            "client_type in ('desktop', 'web', 'codex', 'cli', 'other')",
+            name="chk_usage_events_client_type",
+        ),
+    )
+    op.create_index("idx_usage_prompt", "usage_events", ["prompt_id", "created_at"])
+    op.create_index("idx_usage_user", "usage_events", ["user_id", "created_at"])
+    op.create_index("idx_usage_project_key", "usage_events", ["project_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_usage_project_key", table_name="usage_events")
+    op.drop_index("idx_usage_user", table_name="usage_events")
+    op.drop_index("idx_usage_prompt", table_name="usage_events")
+    op.drop_table("usage_events")
@@ -0,0 +1,131 @@
+"""add usage rollups and partition usage_events by month
+
+Revision ID: 20240722_0012
+Revises: 20240715_0011
+Create Date: 2024-07-22 00:00:00.000000
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240722_0012"
+down_revision = "20240715_0011"
+branch_labels = None
+depends_on = None
+
+# Months of partitions created past the current one; app.commands compact-usage keeps
+# this many ahead from then on (usage_partitions_ahead).
+PARTITIONS_AHEAD = 2
+INDEXES = (
+    ("idx_usage_prompt", "prompt_id, created_at"),
+    ("idx_usage_user", "user_id, created_at"),
+    ("idx_usage_project_key", "project_key"),
+)
+COLUMNS = "id, prompt_id, version_id, user_id, client_type, project_key, context, created_at"
+
+
+def _rollup_table(name: str) -> None:
+    op.create_table(
+        name,
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "prompt_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("prompts.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("client_type", sa.String(length=16), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket", "prompt_id", "user_id", "client_type"),
+    )
+    op.create_index(f"idx_{name}_prompt", name, ["prompt_id", "bucket"])
+
+
+def _months(first: datetime, last: datetime):
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month <= last:
+        upper = (month + timedelta(days=32)).replace(day=1)
+        yield month, upper
+        month = upper
+
+
+def _rename_away(table: str, suffix: str) -> None:
+    op.execute(f"ALTER TABLE usage_events RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT usage_events_pkey TO {table}_pkey")
+    for index, _ in INDEXES:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_{suffix}")
+
+
+def _create_indexes() -> None:
+    for index, columns in INDEXES:
+        op.execute(f"CREATE INDEX {index} ON usage_events ({columns})")
+
+
+def _columns(primary_key: str) -> str:
+    return f"""
+        id BIGINT NOT NULL DEFAULT nextval('usage_events_id_seq'),
+        prompt_id UUID NOT NULL REFERENCES prompts (id) ON DELETE CASCADE,
+        version_id UUID REFERENCES prompt_versions (id) ON DELETE SET NULL,
+        user_id UUID,
+        client_type VARCHAR(16) NOT NULL,
+        project_key VARCHAR(255),
+        context JSONB,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        CONSTRAINT usage_events_pkey PRIMARY KEY ({primary_key}),
+        CONSTRAINT chk_usage_events_client_type
+            CHECK (client_type in ('desktop', 'web', 'codex', 'cli', 'other'))
+    """
+
+
+def _move_rows(source: str) -> None:
+    op.execute(f"INSERT INTO usage_events ({COLUMNS}) SELECT {COLUMNS} FROM {source}")
+    # The sequence belongs to the old table's id; hand it over before dropping that.
+    op.execute("ALTER SEQUENCE usage_events_id_seq OWNED BY usage_events.id")
+    op.execute(f"DROP TABLE {source}")
+
+
+def upgrade() -> None:
+    _rollup_table("usage_rollups_hourly")
+    _rollup_table("usage_rollups_daily")
+    op.create_table(
+        "usage_rollup_state",
+        sa.Column("name", sa.String(length=32), primary_key=True, nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    # The partition key has to be part of the primary key, hence (id, created_at).
+    _rename_away("usage_events_unpartitioned", "unpartitioned")
+    op.execute(f"CREATE TABLE usage_events ({_columns('id, created_at')}) PARTITION BY RANGE (created_at)")
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM usage_events_unpartitioned")) or now
+    last = (now.replace(day=1) + timedelta(days=32 * PARTITIONS_AHEAD)).replace(day=1)
+    for month, upper in _months(first.astimezone(timezone.utc), last):
+        op.execute(
+            f"CREATE TABLE usage_events_p{month:%Y%m} PARTITION OF usage_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    # Catches events past the last partition if compaction stops running for months.
+    op.execute("CREATE TABLE usage_events_default PARTITION OF usage_events DEFAULT")
+    _create_indexes()
+    op.execute("CREATE INDEX idx_usage_created_at ON usage_events USING brin (created_at)")
+    _move_rows("usage_events_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX idx_usage_created_at")
+    _rename_away("usage_events_partitioned", "partitioned")
+    op.execute(f"CREATE TABLE usage_events ({_columns('id')})")
+    _create_indexes()
+    _move_rows("usage_events_partitioned")
+
+    op.drop_table("usage_rollup_state")
+    op.drop_index("idx_usage_rollups_daily_prompt", table_name="usage_rollups_daily")
+    op.drop_table("usage_rollups_daily")
+    op.drop_index("idx_usage_rollups_hourly_prompt", table_name="usage_rollups_hourly")
+    op.drop_table("usage_rollups_hourly")
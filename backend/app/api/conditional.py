@@ -0,0 +1,111 @@
+"""Conditional GET support: ``ETag`` / ``Last-Modified`` validators and 304 responses.
+
+The validators are route dependencies that look at a version stamp only (one indexed
+lookup), never the row graph, so a revalidation that ends in 304 skips the real
+query and the serialization. On 200 responses they just add the headers.
+
+- A single prompt gets a strong ETag over ``(id, current_version_id, updated_at)`` and
+  the negotiated media type, since JSON and MessagePack bodies differ byte for byte.
+- List and search responses get a weak, library-wide ETag over the latest
+  ``library_changes.seq`` and the media type: any committed library write changes it. The stamp is kept in
+  the result cache next to the pages it validates, so a cache hit (or an in-memory
+  search) still answers without touching the database.
+
+``If-None-Match`` wins over ``If-Modified-Since`` when both are sent (RFC 9110).
+HTTP dates have whole-second resolution, so a write in the same second as the
+response may still get a 304 for ``If-Modified-Since``; clients should revalidate
+with the ETag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_read_db
+from app.api.responses import MSGPACK_MEDIA_TYPE, wants_msgpack
+from app.db import routing
+from app.services import changefeed, prompt_service
+from app.services.result_cache import result_cache
+
+
+def strong_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def weak_etag(*parts: Any) -> str:
+    return f"W/{strong_etag(*parts)}"
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value), usegmt=True)
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison: a GET validator matches regardless of the W/ prefix.
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second resolution.
+        return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+    return False
+
+
+def _media_type(request: Request) -> str:
+    # JSON and MessagePack bodies differ, so each representation gets its own validator.
+    return MSGPACK_MEDIA_TYPE if wants_msgpack(request) else "application/json"
+
+
+def _apply(request: Request, response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    # 304s vary with Accept just like the 200s that render() sends.
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if is_not_modified(request, etag, last_modified):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+async def prompt_validators(
+    prompt_id: UUID, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+) -> None:
+    stamp = await prompt_service.get_prompt_stamp(db, prompt_id)
+    if stamp is None:
+        return  # the route answers 404
+    prompt_id, current_version_id, updated_at = stamp
+    etag = strong_etag(prompt_id, current_version_id, _utc(updated_at).isoformat(), _media_type(request))
+    _apply(request, response, etag, updated_at)
+
+
+async def library_validators(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)) -> None:
+    # Same invalidation and TTL as the cached pages, so the ETag never runs ahead of them.
+    seq, changed_at = await result_cache.get_or_compute(
+        ("library_stamp", routing.source(db)), lambda: changefeed.library_stamp(db), replica=routing.is_replica(db)
+    )
+    _apply(request, response, weak_etag("library", seq, _media_type(request)), changed_at)
@@ -1,3 +1,13 @@
-from app.db.session import get_db
+from fastapi import Response
 
-__all__ = ["get_db"]
+from app.core.config import get_settings
+from app.db.routing import pin_to_primary
+from app.db.session import get_db, get_read_db
+
+__all__ = ["get_db", "get_read_db", "read_your_writes"]
+
+
+def read_your_writes(response: Response) -> None:
+    """Route dependency for writes: pin the client's reads to the primary for a while."""
+
+    pin_to_primary(response, get_settings().read_your_writes_seconds)
@@ -0,0 +1,86 @@
+"""Fast response rendering for hot read endpoints.
+
+Routes using :func:`render` hand over payloads that are already in response shape
+(built from trusted data by the service layer), so FastAPI's ``response_model``
+validation and ``jsonable_encoder`` pass are skipped. The ``response_model`` stays on
+the route for the OpenAPI schema. The body is encoded with orjson, or MessagePack
+when the client sends ``Accept: application/msgpack`` (the Tauri and Codex clients).
+"""
+
+from __future__ import annotations
+
+import enum
+from datetime import date, datetime
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+import msgpack
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson with ``Z`` for UTC, matching how Pydantic writes datetimes."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Same wire values as the JSON encoding, so both clients parse one shape; orjson
+    # formats UUIDs and datetimes in C, several times faster than str()/isoformat().
+    if isinstance(value, (UUID, datetime, date)):
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)[1:-1].decode()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"cannot encode {type(value).__name__} as MessagePack")
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default, datetime=False)
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in _MSGPACK_MEDIA_TYPES)
+
+
+def accepts_encoding(request: Request, coding: str) -> bool:
+    """Whether ``Accept-Encoding`` allows ``coding`` with a non-zero q-value (RFC 9110)."""
+
+    explicit: Optional[float] = None
+    wildcard: Optional[float] = None
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in (coding, f"x-{coding}"):
+            explicit = quality if explicit is None else max(explicit, quality)
+        elif name == "*":
+            wildcard = quality
+    if explicit is not None:
+        return explicit > 0
+    return wildcard is not None and wildcard > 0
+
+
+def render(request: Request, payload: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Encode ``payload`` for the client, keeping headers set by route dependencies."""
+
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    response = response_class(payload, headers=dict(headers or {}))
+    response.headers["Vary"] = "Accept"
+    return response
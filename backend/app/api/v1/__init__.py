@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.v1 import prompts
+from app.api.v1 import library, metrics, prompts, usage
 
 api_router = APIRouter()
 api_router.include_router(prompts.router)
+api_router.include_router(library.router)
+api_router.include_router(metrics.router)
+api_router.include_router(usage.router)
 
 __all__ = ["api_router"]
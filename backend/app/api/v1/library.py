@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_read_db
+from app.api.responses import accepts_encoding
+from app.db import routing, session as db_session
+from app.models.prompt import PromptItemType, PromptStatus
+from app.schemas import LibraryChangesResponse
+from app.services import changefeed, library_export
+from app.services.facets import LibraryFilters
+
+router = APIRouter(prefix="/library", tags=["library"])
+
+
+@router.get("/changes", response_model=LibraryChangesResponse)
+async def library_changes(
+    token: Optional[str] = None,
+    limit: int = Query(changefeed.DEFAULT_BATCH, ge=1, le=changefeed.MAX_BATCH),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        return await changefeed.changes_page(db, token=token, limit=limit)
+    except changefeed.InvalidSyncToken as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token") from exc
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_library(
+    request: Request,
+    item_type: Optional[list[PromptItemType]] = Query(None),
+    tag: Optional[list[str]] = Query(None),
+    status_filter: Optional[list[PromptStatus]] = Query(None, alias="status"),
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+):
+    filters = LibraryFilters.build(item_types=item_type, tags=tag, statuses=status_filter)
+
+    async def lines():
+        # The stream outlives the request's dependencies, so it owns its session.
+        async with db_session.read_router.session(pinned=routing.is_pinned(request)) as db:
+            async for chunk in library_export.ndjson_lines(
+                db, filters=filters, updated_after=updated_after, updated_before=updated_before
+            ):
+                yield chunk
+
+    headers = {"Vary": "Accept-Encoding"}
+    body = lines()
+    if accepts_encoding(request, "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        body = library_export.gzip_chunks(body)
+    return StreamingResponse(body, media_type=library_export.NDJSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from app.db import session as db_session
+from app.db.pool import pool_metrics
+from app.services.result_cache import result_cache
+from app.services.usage_ingest import usage_buffer
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/cache")
+async def cache_metrics():
+    return {"result_cache": result_cache.stats()}
+
+
+@router.get("/db")
+async def db_metrics():
+    replicas = {
+        name: metrics.stats(replica.pool)
+        for name, replica, metrics in zip(
+            db_session.replica_names, db_session.replica_engines, db_session.replica_metrics
+        )
+    }
+    return {"pool": pool_metrics.stats(db_session.engine.pool), "replicas": replicas}
+
+
+@router.get("/usage")
+async def usage_metrics():
+    return {"usage_buffer": usage_buffer.stats()}
@@ -2,57 +2,84 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db
+from app.api.conditional import library_validators, prompt_validators
+from app.api.deps import get_db, get_read_db, read_your_writes
+from app.api.responses import render
+from app.models.prompt import PromptItemType, PromptStatus
 from app.schemas import (
+    BodyMode,
     LibrarySearchResponse,
+    PromptBatchGetRequest,
+    PromptBatchGetResponse,
     PromptCreate,
+    PromptImportResponse,
     PromptListResponse,
     PromptResponse,
+    SearchMode,
+    SuggestResponse,
 )
-from app.services import prompt_service
+from app.services import batch_get, bulk_import, pagination, projection, prompt_service
+from app.services.facets import LibraryFilters
 
 router = APIRouter(prefix="/prompts", tags=["prompts"])
 
 
-@router.get("/search", response_model=LibrarySearchResponse)
+def _fieldset(parse, fields: Optional[str]) -> Optional[projection.Fieldset]:
+    try:
+        return parse(fields)
+    except projection.InvalidFields as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown field: {exc}") from exc
+
+
+@router.get(
+    "/search",
+    response_model=LibrarySearchResponse,
+    dependencies=[Depends(library_validators)],
+)
 async def search_library(
+    request: Request,
+    response: Response,
     query: str = "",
     limit: int = 30,
-    db: AsyncSession = Depends(get_db),
+    mode: SearchMode = SearchMode.KEYWORD,
+    item_type: Optional[list[PromptItemType]] = Query(None),
+    tag: Optional[list[str]] = Query(None),
+    status_filter: Optional[list[PromptStatus]] = Query(None, alias="status"),
+    facets: bool = False,
+    body: BodyMode = BodyMode.FULL,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    prompts = await prompt_service.search_library(db, query=query, limit=limit)
-    items = []
-    for prompt in prompts:
-        version = prompt.current_version
-        if version is None:
-            continue
-
-        items.append(
-            {
-                "id": prompt.id,
-                "title": prompt.display_name,
-                "body": version.content,
-                "item_type": prompt.item_type,
-                "tags": list(prompt.tags),
-                "version": version.version_number,
-                "created_at": prompt.created_at,
-                "updated_at": prompt.updated_at,
-                "source": "db",
-            }
-        )
+    filters = LibraryFilters.build(item_types=item_type, tags=tag, statuses=status_filter)
+    fieldset = _fieldset(projection.parse_library_fields, fields)
+    page = await prompt_service.search_library_page(
+        db, query=query, limit=limit, mode=mode, filters=filters, facets=facets, body=body, fields=fieldset
+    )
+    return render(request, page, response.headers)
 
-    return {"items": items}
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_prompts(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=50),
+):
+    suggestions = await prompt_service.suggest(prefix=prefix, limit=limit)
+    return {"items": [{"id": s.id, "title": s.title} for s in suggestions]}
 
 
-@router.get("", response_model=PromptListResponse)
+@router.get("", response_model=PromptListResponse, dependencies=[Depends(library_validators)])
 async def list_prompts(
+    request: Request,
+    response: Response,
     since: Optional[str] = None,
+    cursor: Optional[str] = None,
     limit: int = 50,
-    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ):
     since_dt = None
     if since:
@@ -61,19 +88,36 @@ async def list_prompts(
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid since cursor") from exc
 
-    prompts, next_cursor = await prompt_service.list_prompts(db, since=since_dt, limit=limit)
-    return {"items": prompts, "next_cursor": next_cursor}
+    after = None
+    if cursor:
+        try:
+            after = pagination.decode_cursor(cursor)
+        except pagination.InvalidCursor as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+    fieldset = _fieldset(projection.parse_prompt_fields, fields)
+    page = await prompt_service.list_prompt_page(db, since=since_dt, after=after, limit=limit, fields=fieldset)
+    return render(request, page, response.headers)
 
 
-@router.get("/{prompt_id}", response_model=PromptResponse)
-async def get_prompt(prompt_id: UUID, db: AsyncSession = Depends(get_db)):
-    prompt = await prompt_service.get_prompt(db, prompt_id)
+@router.get("/{prompt_id}", response_model=PromptResponse, dependencies=[Depends(prompt_validators)])
+async def get_prompt(
+    prompt_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    fieldset = _fieldset(projection.parse_prompt_fields, fields)
+    prompt = await prompt_service.get_prompt(db, prompt_id, fieldset)
     if not prompt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prompt not found")
-    return prompt
+    return render(request, projection.prompt_payload(prompt, fieldset), response.headers)
 
 
-@router.post("", response_model=PromptResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "", response_model=PromptResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(read_your_writes)]
+)
 async def create_prompt(payload: PromptCreate, db: AsyncSession = Depends(get_db)):
     try:
         prompt = await prompt_service.create_prompt(
@@ -87,12 +131,24 @@ async def create_prompt(payload: PromptCreate, db: AsyncSession = Depends(get_db
             notes=payload.notes,
         )
         await db.commit()
-        # Ensure related current_version is loaded to avoid async lazy-load during response serialization
-        await db.refresh(
-            prompt,
-            attribute_names=["current_version", "tag_links", "created_at", "updated_at"],
-        )
+        # The service returns the prompt with its version and tags already in place.
         return prompt
     except IntegrityError as exc:
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Prompt name already exists") from exc
+
+
+@router.post(":import", response_model=PromptImportResponse, dependencies=[Depends(read_your_writes)])
+async def import_prompts(request: Request, db: AsyncSession = Depends(get_db)):
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    try:
+        rows = bulk_import.parse(await request.body(), ndjson=ndjson)
+    except bulk_import.InvalidImport as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return await bulk_import.import_prompts(db, rows)
+
+
+@router.post(":batchGet", response_model=PromptBatchGetResponse)
+async def batch_get_prompts(payload: PromptBatchGetRequest, request: Request, db: AsyncSession = Depends(get_read_db)):
+    keys = [batch_get.BatchKey(key.id, key.name, key.version_number) for key in payload.keys]
+    return render(request, await batch_get.batch_get(db, keys))
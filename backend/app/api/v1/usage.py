@@ -0,0 +1,48 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_read_db
+from app.schemas import UsageAccepted, UsageEventBatch, UsageEventCreate, UsageGroupBy, UsageSummaryResponse
+from app.services import usage_ingest, usage_rollups
+from app.services.usage_ingest import usage_buffer
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+@router.post("", response_model=UsageAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def record_usage(payload: Union[UsageEventBatch, UsageEventCreate]):
+    """Accept one event or ``{"events": [...]}``; they are written shortly after, in batches."""
+
+    events = payload.events if isinstance(payload, UsageEventBatch) else [payload]
+    if not usage_buffer.offer(usage_ingest.rows(events)):
+        retry_after = max(1, math.ceil(usage_buffer.flush_interval_seconds))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Usage buffer is full, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    return {"accepted": len(events)}
+
+
+@router.get("/summary", response_model=UsageSummaryResponse)
+async def usage_summary(
+    prompt_id: Optional[UUID] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    group_by: UsageGroupBy = UsageGroupBy.PROMPT,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Usage counts in ``[from, to)`` (default: the last 30 days), largest first."""
+
+    end = to or datetime.now(timezone.utc)
+    start = from_ or end - timedelta(days=30)
+    # Naive timestamps are taken as UTC.
+    start, end = (value if value.tzinfo else value.replace(tzinfo=timezone.utc) for value in (start, end))
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from must be before to")
+    return await usage_rollups.summary(db, start=start, end=end, group_by=group_by, prompt_id=prompt_id)
@@ -0,0 +1,65 @@
+"""Maintenance commands, run against the configured ``DATABASE_URL``.
+
+    python -m app.commands rebuild-library-items
+    python -m app.commands compact-usage
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from typing import Optional
+
+
+async def rebuild_library_items() -> int:
+    """Recompute ``library_items`` from the normalized tables in one transaction."""
+
+    from app.db.session import AsyncSessionLocal, engine
+    from app.services import library_items
+
+    try:
+        async with AsyncSessionLocal() as db:
+            count = await library_items.rebuild(db)
+            await db.commit()
+    finally:
+        await engine.dispose()
+    print(f"rebuilt {count} library items")
+    return 0
+
+
+async def compact_usage() -> int:
+    """Roll up usage events, then apply raw-event retention (run every few minutes)."""
+
+    from app.db.session import AsyncSessionLocal, engine
+    from app.services import usage_rollups
+
+    try:
+        async with AsyncSessionLocal() as db:
+            partitions = await usage_rollups.ensure_partitions(db)
+            await db.commit()
+            watermark = await usage_rollups.compact(db)
+            removed = await usage_rollups.apply_retention(db)
+            await db.commit()
+    finally:
+        await engine.dispose()
+    print(f"usage rolled up to {watermark}; {len(partitions)} partitions created, {removed} removed by retention")
+    return 0
+
+
+COMMANDS = {"rebuild-library-items": rebuild_library_items, "compact-usage": compact_usage}
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    return asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
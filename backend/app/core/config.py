@@ -10,11 +10,58 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     api_v1_prefix: str = "/api/v1"
     database_url: str
+    # Comma-separated read replica URLs for read-only routes (app.db.routing); empty
+    # sends every read to the primary. A replica that fails to connect is skipped for
+    # replica_retry_seconds; a client that just wrote reads from the primary for
+    # read_your_writes_seconds.
+    database_replica_urls: str = ""
+    replica_retry_seconds: float = 30.0
+    read_your_writes_seconds: float = 5.0
+    # Connection pool (Postgres only; see app.db.pool). The pool holds up to
+    # db_pool_size + db_max_overflow connections per process.
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 10.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # Log checkouts that wait at least this long for a connection.
+    db_slow_checkout_ms: float = 100.0
+    # Server-side statement_timeout and asyncpg command_timeout; 0 disables either.
+    db_statement_timeout_ms: int = 30_000
+    db_command_timeout_seconds: float = 60.0
+    # asyncpg prepared statement cache size; 0 behind a transaction-mode pgbouncer.
+    db_statement_cache_size: int = 100
     jwt_secret: str | None = None
     jwt_algorithm: str = "HS256"
+    # Serve keyword library search from the in-process BM25 index (app.services.search_index).
+    search_index_enabled: bool = False
+    # Memory-mapped embedding matrix for semantic search; unset keeps vectors in RAM only.
+    vector_index_path: str | None = None
+    # Search/list result cache (app.services.result_cache); 0 entries or 0 TTL disables it.
+    result_cache_max_entries: int = 1024
+    result_cache_ttl_seconds: float = 30.0
+    # Buffered POST /usage ingestion (app.services.usage_ingest): requests are refused
+    # with 503 once usage_buffer_max_events are waiting; batches of up to
+    # usage_flush_batch_size go out at least every usage_flush_interval_seconds, and
+    # shutdown waits up to usage_drain_timeout_seconds for the buffer to drain.
+    usage_buffer_max_events: int = 10_000
+    usage_flush_batch_size: int = 500
+    usage_flush_interval_seconds: float = 1.0
+    usage_drain_timeout_seconds: float = 10.0
+    # Usage rollups (app.services.usage_rollups): compaction rolls up hours that ended
+    # at least usage_rollup_lag_seconds ago; raw events older than
+    # usage_raw_retention_days are removed once rolled up, and Postgres keeps monthly
+    # partitions created usage_partitions_ahead months in advance.
+    usage_rollup_lag_seconds: int = 300
+    usage_raw_retention_days: int = 90
+    usage_partitions_ahead: int = 2
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
     @property
     def is_dev(self) -> bool:
         return self.app_env.lower() == "dev"
@@ -0,0 +1,165 @@
+"""Connection pool configuration and live pool metrics.
+
+Pool sizing, recycling and driver timeouts come from :class:`~app.core.config.Settings`
+(see :func:`engine_options`). Postgres engines use :class:`InstrumentedPool`, which
+times every checkout, including the time spent queued behind a saturated pool, into
+a histogram; checkouts slower than ``db_slow_checkout_ms`` are logged together with
+the pool state so the pool can be sized against real traffic. Connect, checkout,
+checkin and invalidation counts come from pool events (:func:`instrument`). Each engine
+(the primary, every replica) gets its own :class:`PoolMetrics`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    def __init__(self, *, slow_checkout_ms: float = 100.0) -> None:
+        self.slow_checkout_ms = slow_checkout_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+
+    def observe_wait(self, pool: Pool, waited_ms: float) -> None:
+        self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, waited_ms)] += 1
+        self.wait_count += 1
+        self.wait_total_ms += waited_ms
+        self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+        if waited_ms >= self.slow_checkout_ms:
+            self.slow_checkouts += 1
+            logger.warning("Waited %.1f ms for a database connection (%s)", waited_ms, pool.status())
+
+    def stats(self, pool: Pool) -> dict[str, Any]:
+        gauges: dict[str, Any] = {"pool_class": type(pool).__name__}
+        # Only queue pools have a size; SQLite's static and null pools do not.
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            gauge = getattr(pool, name, None)
+            if gauge is not None:
+                gauges[name] = gauge()
+        buckets = [f"le_{bound}" for bound in WAIT_BUCKETS_MS] + ["inf"]
+        return {
+            **gauges,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "slow_checkouts": self.slow_checkouts,
+            "slow_checkout_ms": self.slow_checkout_ms,
+            "wait_ms": {
+                "count": self.wait_count,
+                "mean": self.wait_total_ms / self.wait_count if self.wait_count else 0.0,
+                "max": self.wait_max_ms,
+                "buckets": dict(zip(buckets, self.wait_buckets)),
+            },
+        }
+
+
+pool_metrics = PoolMetrics(slow_checkout_ms=get_settings().db_slow_checkout_ms)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` that records how long each checkout waited.
+
+    Records into ``pool_metrics`` unless :func:`instrument` gives it its own metrics.
+    """
+
+    metrics = pool_metrics
+
+    def recreate(self) -> "InstrumentedPool":
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same metrics.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(self, (time.perf_counter() - started) * 1000)
+
+
+def instrument(engine: AsyncEngine, metrics: PoolMetrics = pool_metrics) -> None:
+    """Record ``engine``'s pool events (and checkout waits) into ``metrics``."""
+
+    if isinstance(engine.pool, InstrumentedPool):
+        engine.pool.metrics = metrics
+
+    def counter(name: str):
+        def listener(*_: object) -> None:
+            setattr(metrics, name, getattr(metrics, name) + 1)
+
+        return listener
+
+    # Pool events registered on an engine apply to its pool.
+    target = engine.sync_engine
+    event.listen(target, "connect", counter("connects"))
+    event.listen(target, "checkout", counter("checkouts"))
+    event.listen(target, "checkin", counter("checkins"))
+    event.listen(target, "invalidate", counter("invalidations"))
+
+
+def engine_options(settings: Settings, database_url: Optional[str] = None) -> dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` from pool and driver settings.
+
+    ``database_url`` defaults to the primary's; replicas pass their own.
+    """
+
+    options: dict[str, Any] = {"echo": settings.is_dev, "future": True}
+    url = make_url(database_url or settings.database_url)
+    if url.get_backend_name() != "postgresql":
+        # SQLite (tests, local tools) keeps SQLAlchemy's default static/null pool.
+        return options
+
+    options.update(
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if url.get_driver_name() == "asyncpg":
+        server_settings = {"application_name": settings.app_name}
+        if settings.db_statement_timeout_ms:
+            server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+        options["connect_args"] = {
+            # Client-side bound on each query round trip (seconds).
+            "command_timeout": settings.db_command_timeout_seconds or None,
+            # asyncpg's own prepared statement cache and SQLAlchemy's cache on top of it;
+            # set both to 0 behind a transaction-mode pgbouncer.
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "server_settings": server_settings,
+        }
+    return options
@@ -0,0 +1,112 @@
+"""Read-replica routing for read-only requests.
+
+:class:`ReadRouter` hands out sessions for read-only routes: round-robin over the
+configured replicas, skipping a replica for ``replica_retry_seconds`` after it fails
+to connect, and falling back to the primary when no replica is usable. A session's
+connection is opened before it is handed out, so connection failures fail over
+instead of failing the request.
+
+Sessions record where they read from (:func:`source`) so that results cached from a
+lagging replica are never served to a client pinned to the primary.
+
+Read-your-writes: write routes set a short-lived cookie (:func:`pin_to_primary`) and
+reads from a client carrying it go to the primary until it expires, so a client
+never reads a replica that may not have its own write yet.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "read_primary_until"
+# Errors that mean "this database cannot be reached right now".
+_CONNECT_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError)
+
+
+@dataclass(slots=True)
+class Replica:
+    name: str
+    sessions: async_sessionmaker[AsyncSession]
+    down_until: float = 0.0
+
+
+class ReadRouter:
+    def __init__(
+        self,
+        primary: Callable[[], async_sessionmaker[AsyncSession]],
+        replicas: Sequence[Replica] = (),
+        *,
+        retry_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # The primary factory is looked up per session so it can be swapped (tests).
+        self._primary = primary
+        self.replicas = list(replicas)
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._next = itertools.count()
+
+    def candidates(self, *, pinned: bool = False) -> list[Replica]:
+        """Usable replicas in the order to try them, starting at the next in the rotation."""
+
+        if pinned or not self.replicas:
+            return []
+        start = next(self._next) % len(self.replicas)
+        rotation = self.replicas[start:] + self.replicas[:start]
+        now = self._clock()
+        return [replica for replica in rotation if replica.down_until <= now]
+
+    @asynccontextmanager
+    async def session(self, *, pinned: bool = False) -> AsyncIterator[AsyncSession]:
+        for replica in self.candidates(pinned=pinned):
+            session = replica.sessions()
+            try:
+                await session.connection()
+            except _CONNECT_ERRORS as error:
+                await session.close()
+                replica.down_until = self._clock() + self.retry_seconds
+                logger.warning("Read replica %s unavailable, skipping it: %s", replica.name, error)
+                continue
+            session.info["replica"] = replica.name
+            async with session:
+                yield session
+            return
+        async with self._primary()() as session:
+            yield session
+
+
+def source(db: AsyncSession) -> str:
+    """``"primary"``, or the name of the replica ``db`` reads from."""
+
+    return db.info.get("replica", "primary")
+
+
+def is_replica(db: AsyncSession) -> bool:
+    return "replica" in db.info
+
+
+def is_pinned(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_to_primary(response: Response, seconds: float) -> None:
+    """Send this client's reads to the primary for the next ``seconds``."""
+
+    if seconds > 0:
+        response.set_cookie(
+            PIN_COOKIE, f"{time.time() + seconds:.3f}", max_age=max(1, round(seconds)), httponly=True, samesite="lax"
+        )
@@ -1,14 +1,34 @@
 from collections.abc import AsyncGenerator
 
+from fastapi import Request
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import get_settings
 from app.db.base import Base
+from app.db.pool import PoolMetrics, engine_options, instrument, pool_metrics
+from app.db.routing import ReadRouter, Replica, is_pinned
 
 settings = get_settings()
-engine = create_async_engine(settings.database_url, echo=settings.is_dev, future=True)
+engine = create_async_engine(settings.database_url, **engine_options(settings))
+instrument(engine, pool_metrics)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_engines = [create_async_engine(url, **engine_options(settings, url)) for url in settings.replica_urls]
+replica_names = [make_url(replica.url).render_as_string(hide_password=True) for replica in replica_engines]
+# Each replica's pool reports separately from the primary's.
+replica_metrics = [PoolMetrics(slow_checkout_ms=settings.db_slow_checkout_ms) for _ in replica_engines]
+for replica, metrics in zip(replica_engines, replica_metrics):
+    instrument(replica, metrics)
+read_router = ReadRouter(
+    lambda: AsyncSessionLocal,
+    [
+        Replica(name, async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False))
+        for name, replica in zip(replica_names, replica_engines)
+    ],
+    retry_seconds=settings.replica_retry_seconds,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency that yields a DB session."""
@@ -17,6 +37,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for read-only routes: a replica session when one is usable."""
+
+    async with read_router.session(pinned=is_pinned(request)) as session:
+        yield session
+
+
 async def init_models() -> None:
     """Create tables in dev environments without running migrations explicitly."""
 
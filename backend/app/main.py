@@ -5,7 +5,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1 import api_router
 from app.core.config import get_settings
+from app.db import session as db_session
 from app.db.session import init_models
+from app.services import usage_rollups
+from app.services.search_index import library_index
+from app.services.usage_ingest import usage_buffer
+from app.services.vector_index import vector_index
 
 settings = get_settings()
 
@@ -15,7 +20,22 @@ async def lifespan(app: FastAPI):
     # Initialize database tables automatically in development environments.
     if settings.is_dev:
         await init_models()
+    if settings.search_index_enabled:
+        async with db_session.AsyncSessionLocal() as session:
+            await library_index.load(session)
+    if settings.vector_index_path:
+        # Persisted vectors make this cheap: only prompts changed since the last run re-embed.
+        async with db_session.AsyncSessionLocal() as session:
+            await vector_index.load(session)
+    # Usage events for months without a partition would sit in the default partition.
+    async with db_session.AsyncSessionLocal() as session:
+        await usage_rollups.ensure_partitions(session)
+        await session.commit()
+    usage_buffer.start()
     yield
+    # Write buffered usage events before the process exits.
+    await usage_buffer.stop(settings.usage_drain_timeout_seconds)
+    vector_index.flush()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
@@ -1,3 +1,5 @@
+from app.models.content import ContentBlob
+from app.models.library import LibraryChange, LibraryItem
 from app.models.prompt import (
     Prompt,
     PromptItemType,
@@ -6,12 +8,27 @@ from app.models.prompt import (
     PromptVersion,
     PromptVersionStatus,
 )
+from app.models.usage import (
+    UsageClientType,
+    UsageEvent,
+    UsageRollupDaily,
+    UsageRollupHourly,
+    UsageRollupState,
+)
 
 __all__ = [
+    "ContentBlob",
+    "LibraryChange",
+    "LibraryItem",
     "Prompt",
     "PromptItemType",
     "PromptStatus",
     "PromptTag",
     "PromptVersion",
     "PromptVersionStatus",
+    "UsageClientType",
+    "UsageEvent",
+    "UsageRollupDaily",
+    "UsageRollupHourly",
+    "UsageRollupState",
 ]
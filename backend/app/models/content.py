@@ -0,0 +1,71 @@
+"""Content-addressed storage for version bodies.
+
+Every distinct body is stored once in ``content_blobs``, keyed by the SHA-256 of its
+UTF-8 text; versions reference it by that hash. Bodies of at least
+``COMPRESS_MIN_BYTES`` are zlib-compressed when that makes them smaller, everything
+else is kept as plain UTF-8. ``encoding`` records which, so other codecs can be added
+without rewriting existing rows.
+"""
+
+import functools
+import hashlib
+import zlib
+
+from sqlalchemy import Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+PLAIN = "plain"
+ZLIB = "zlib"
+# Below this, zlib's header and a cold dictionary rarely save anything.
+COMPRESS_MIN_BYTES = 256
+ZLIB_LEVEL = 6
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def encode(text: str) -> tuple[str, bytes]:
+    """``(encoding, data)`` for storing ``text``."""
+
+    raw = text.encode()
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, ZLIB_LEVEL)
+        if len(compressed) < len(raw):
+            return ZLIB, compressed
+    return PLAIN, raw
+
+
+def decode(encoding: str, data: bytes) -> str:
+    if encoding == ZLIB:
+        return zlib.decompress(data).decode()
+    if encoding == PLAIN:
+        return bytes(data).decode()
+    raise ValueError(f"unknown content encoding: {encoding}")
+
+
+def blob_row(text: str) -> dict:
+    """A complete ``content_blobs`` row for ``text``."""
+
+    encoding, data = encode(text)
+    return {"hash": digest(text), "encoding": encoding, "size": len(text.encode()), "data": data}
+
+
+class ContentBlob(Base):
+    """One stored body; rows are immutable once written."""
+
+    __tablename__ = "content_blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    encoding: Mapped[str] = mapped_column(String(16), nullable=False)
+    # Uncompressed length in bytes.
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    @functools.cached_property
+    def text(self) -> str:
+        """Decompressed once per loaded blob, on first read."""
+
+        return decode(self.encoding, self.data)
@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+# SQLite only auto-increments a column declared exactly INTEGER PRIMARY KEY.
+ChangeSeq = BigInteger().with_variant(Integer, "sqlite")
+JSONList = JSON().with_variant(JSONB, "postgresql")
+# Weighted search document; only populated on Postgres (see app.services.fulltext).
+TSVector = Text().with_variant(TSVECTOR, "postgresql")
+
+
+class LibraryChange(Base):
+    """Append-only log of library writes; ``seq`` orders them for delta sync.
+
+    One row per changed prompt per transaction. Rows carry no payload: readers load
+    the prompt's current state, and a missing or archived prompt is a tombstone.
+    """
+
+    __tablename__ = "library_changes"
+
+    seq: Mapped[int] = mapped_column(ChangeSeq, primary_key=True, autoincrement=True)
+    # Deliberately no foreign key: the log outlives hard-deleted prompts.
+    prompt_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class LibraryItem(Base):
+    """Denormalized read model: one row per prompt with a current version.
+
+    Holds what library search, facets and delta sync return, so those reads are a
+    single indexed query with no joins. Maintained in the writer's transaction by
+    :mod:`app.services.library_items`; rebuild with ``python -m app.commands``.
+    """
+
+    __tablename__ = "library_items"
+    __table_args__ = (
+        Index("idx_library_items_updated_at_id", "updated_at", "id"),
+        Index("idx_library_items_item_type", "item_type"),
+        Index("idx_library_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "idx_library_items_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_library_items_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+    # The prompt's id; items go away with their prompt.
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    item_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    tags: Mapped[list[str]] = mapped_column(JSONList, nullable=False)
+    version_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVector, nullable=True)
@@ -20,6 +20,7 @@ from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.models.content import ContentBlob, digest
 
 JSONDict = JSON().with_variant(JSONB, "postgresql")
 
@@ -51,6 +52,9 @@ class Prompt(Base):
         CheckConstraint(
             "item_type in ('prompt', 'snippet', 'faq')", name="chk_prompts_item_type"
         ),
+        Index("idx_prompts_item_type", "item_type"),
+        Index("idx_prompts_updated_at_id", "updated_at", "id"),
+        Index("idx_prompts_current_version", "current_version_id"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -66,7 +70,10 @@ class Prompt(Base):
         String(32), nullable=False, default=PromptStatus.ACTIVE.value
     )
     current_version_id: Mapped[Optional[uuid.UUID]] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("prompt_versions.id"), nullable=True
+        UUID(as_uuid=True),
+        # Checked at commit, so a new prompt can be inserted pointing at its first version.
+        ForeignKey("prompt_versions.id", name="fk_prompts_current_version", deferrable=True, initially="DEFERRED"),
+        nullable=True,
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
@@ -119,10 +126,14 @@ class PromptVersion(Base):
     status: Mapped[PromptVersionStatus] = mapped_column(
         String(32), nullable=False, default=PromptVersionStatus.APPROVED.value
     )
-    content: Mapped[str] = mapped_column(Text, nullable=False)
-    input_schema: Mapped[Optional[dict]] = mapped_column(JSONDict, nullable=True)
-    parameters: Mapped[Optional[dict]] = mapped_column(JSONDict, nullable=True)
-    notes: Mapped[Optional[str]] = mapped_column(Text)
+    # The body lives in content_blobs, shared by every version with the same text.
+    content_hash: Mapped[str] = mapped_column(
+        String(64), ForeignKey("content_blobs.hash", name="fk_prompt_versions_content_hash"), nullable=False
+    )
+    # Large columns are deferred: loads opt in with undefer()/load_only() when they need them.
+    input_schema: Mapped[Optional[dict]] = mapped_column(JSONDict, nullable=True, deferred=True)
+    parameters: Mapped[Optional[dict]] = mapped_column(JSONDict, nullable=True, deferred=True)
+    notes: Mapped[Optional[str]] = mapped_column(Text, deferred=True)
     created_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
     approved_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -137,6 +148,23 @@ class PromptVersion(Base):
     prompt: Mapped[Prompt] = relationship(
         back_populates="versions", foreign_keys=[prompt_id]
     )
+    # Read-only: blobs are written by app.services.content_store, never through the ORM.
+    blob: Mapped[ContentBlob] = relationship(lazy="joined", innerjoin=True, viewonly=True)
+
+    @property
+    def content(self) -> str:
+        """The body: as assigned on this object, else decompressed from its blob on first read."""
+
+        assigned = self.__dict__.get("_assigned_content")
+        if assigned is not None and assigned[0] == self.content_hash:
+            return assigned[1]
+        return self.blob.text
+
+    @content.setter
+    def content(self, text: str) -> None:
+        self.content_hash = digest(text)
+        # Written to content_blobs on flush (app.services.content_store).
+        self._assigned_content = (self.content_hash, text)
 
 
 class PromptTag(Base):
@@ -144,6 +172,12 @@ class PromptTag(Base):
     __table_args__ = (
         UniqueConstraint("prompt_id", "tag", name="uq_prompt_tags_prompt_tag"),
         Index("idx_prompt_tags_tag", "tag"),
+        Index(
+            "idx_prompt_tags_tag_trgm",
+            "tag",
+            postgresql_using="gin",
+            postgresql_ops={"tag": "gin_trgm_ops"},
+        ),
     )
 
     prompt_id: Mapped[uuid.UUID] = mapped_column(
@@ -0,0 +1,96 @@
+import enum
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.prompt import JSONDict
+
+# SQLite only auto-increments a column declared exactly INTEGER PRIMARY KEY.
+EventId = BigInteger().with_variant(Integer, "sqlite")
+# Stands in for "no user" in rollup keys. The max UUID rather than the nil one: SQLite's
+# numeric affinity would turn an all-zero hex string into the integer 0.
+ANONYMOUS_USER = uuid.UUID(int=(1 << 128) - 1)
+
+
+class UsageClientType(str, enum.Enum):
+    DESKTOP = "desktop"
+    WEB = "web"
+    CODEX = "codex"
+    CLI = "cli"
+    OTHER = "other"
+
+
+class UsageEvent(Base):
+    """One use of a prompt by a client; written in batches by app.services.usage_ingest.
+
+    On Postgres the table is partitioned by month on ``created_at`` (migration 0012),
+    with ``(id, created_at)`` as its key; old partitions are dropped by
+    :func:`app.services.usage_rollups.apply_retention` once they are rolled up.
+    """
+
+    __tablename__ = "usage_events"
+    __table_args__ = (
+        CheckConstraint(
+            "client_type in ('desktop', 'web', 'codex', 'cli', 'other')",
+            name="chk_usage_events_client_type",
+        ),
+        Index("idx_usage_prompt", "prompt_id", "created_at"),
+        Index("idx_usage_user", "user_id", "created_at"),
+        Index("idx_usage_project_key", "project_key"),
+        # Compaction and the summary's raw tail read by time range. Rows arrive in time
+        # order, so on Postgres a BRIN index covers that for a fraction of a B-tree.
+        Index("idx_usage_created_at", "created_at", postgresql_using="brin"),
+    )
+
+    id: Mapped[int] = mapped_column(EventId, primary_key=True, autoincrement=True)
+    prompt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False
+    )
+    version_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prompt_versions.id", ondelete="SET NULL"), nullable=True
+    )
+    # There is no users table yet; the id is recorded as sent.
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    client_type: Mapped[UsageClientType] = mapped_column(String(16), nullable=False)
+    project_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    context: Mapped[Optional[dict]] = mapped_column(JSONDict, nullable=True)
+    # When the API accepted the event, not when the buffer flushed it.
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class _UsageRollup:
+    """Event counts per bucket, prompt, user and client; see app.services.usage_rollups."""
+
+    # Start of the hour or day (UTC).
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    prompt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True
+    )
+    # ANONYMOUS_USER for events without one, so the key has no NULLs.
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    client_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class UsageRollupHourly(_UsageRollup, Base):
+    __tablename__ = "usage_rollups_hourly"
+    __table_args__ = (Index("idx_usage_rollups_hourly_prompt", "prompt_id", "bucket"),)
+
+
+class UsageRollupDaily(_UsageRollup, Base):
+    __tablename__ = "usage_rollups_daily"
+    __table_args__ = (Index("idx_usage_rollups_daily_prompt", "prompt_id", "bucket"),)
+
+
+class UsageRollupState(Base):
+    """Rollup progress: every event created before ``watermark`` is counted in the rollups."""
+
+    __tablename__ = "usage_rollup_state"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
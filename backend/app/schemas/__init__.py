@@ -1,11 +1,67 @@
-from app.schemas.library import LibraryItemResponse, LibrarySearchResponse
-from app.schemas.prompt import PromptCreate, PromptListResponse, PromptResponse, PromptVersionResponse
+from app.schemas.library import (
+    BodyMode,
+    ChangeOp,
+    FacetCount,
+    Highlight,
+    LibraryChangeItem,
+    LibraryChangesResponse,
+    LibraryFacets,
+    LibraryItemResponse,
+    LibrarySearchResponse,
+    SearchMode,
+    SuggestItem,
+    SuggestResponse,
+)
+from app.schemas.prompt import (
+    ImportedPrompt,
+    PromptBatchGetRequest,
+    PromptBatchGetResponse,
+    PromptBatchKey,
+    PromptBatchResult,
+    PromptCreate,
+    PromptImportError,
+    PromptImportResponse,
+    PromptListResponse,
+    PromptResponse,
+    PromptVersionResponse,
+)
+from app.schemas.usage import (
+    UsageAccepted,
+    UsageEventBatch,
+    UsageEventCreate,
+    UsageGroupBy,
+    UsageSummaryItem,
+    UsageSummaryResponse,
+)
 
 __all__ = [
+    "BodyMode",
+    "ChangeOp",
+    "FacetCount",
+    "Highlight",
+    "ImportedPrompt",
+    "LibraryChangeItem",
+    "LibraryChangesResponse",
+    "LibraryFacets",
     "LibraryItemResponse",
     "LibrarySearchResponse",
+    "PromptBatchGetRequest",
+    "PromptBatchGetResponse",
+    "PromptBatchKey",
+    "PromptBatchResult",
     "PromptCreate",
+    "PromptImportError",
+    "PromptImportResponse",
     "PromptResponse",
     "PromptVersionResponse",
     "PromptListResponse",
+    "SearchMode",
+    "SuggestItem",
+    "SuggestResponse",
+    "UsageAccepted",
+    "UsageEventBatch",
+    "UsageEventCreate",
+    "UsageGroupBy",
+    "UsageSummaryItem",
+    "UsageSummaryResponse",
 ]
@@ -1,4 +1,6 @@
+import enum
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -6,10 +8,30 @@ from pydantic import BaseModel
 from app.models.prompt import PromptItemType
 
 
+class SearchMode(str, enum.Enum):
+    KEYWORD = "keyword"
+    FUZZY = "fuzzy"
+    SEMANTIC = "semantic"
+    HYBRID = "hybrid"
+
+
+class BodyMode(str, enum.Enum):
+    FULL = "full"
+    SNIPPET = "snippet"
+    NONE = "none"
+
+
+class Highlight(BaseModel):
+    start: int
+    end: int
+
+
 class LibraryItemResponse(BaseModel):
     id: UUID
     title: str
-    body: str
+    # Full content, a query-centred snippet, or omitted, depending on ``body=``.
+    body: Optional[str] = None
+    highlights: Optional[list[Highlight]] = None
     item_type: PromptItemType
     tags: list[str] = []
     version: int
@@ -18,5 +40,45 @@ class LibraryItemResponse(BaseModel):
     source: str = "db"
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class LibraryFacets(BaseModel):
+    item_type: list[FacetCount]
+    tag: list[FacetCount]
+    status: list[FacetCount]
+
+
 class LibrarySearchResponse(BaseModel):
     items: list[LibraryItemResponse]
+    facets: Optional[LibraryFacets] = None
+
+
+class ChangeOp(str, enum.Enum):
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+
+class LibraryChangeItem(BaseModel):
+    id: UUID
+    op: ChangeOp
+    # Current state of the prompt for ``upsert``; omitted for ``delete`` tombstones.
+    item: Optional[LibraryItemResponse] = None
+
+
+class LibraryChangesResponse(BaseModel):
+    items: list[LibraryChangeItem]
+    # Pass back as ``token`` on the next sync; unchanged when there was nothing new.
+    next_token: str
+    has_more: bool
+
+
+class SuggestItem(BaseModel):
+    id: UUID
+    title: str
+
+
+class SuggestResponse(BaseModel):
+    items: list[SuggestItem]
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.models.prompt import PromptItemType, PromptStatus, PromptVersionStatus
 
@@ -50,3 +50,49 @@ class PromptCreate(BaseModel):
 class PromptListResponse(BaseModel):
     items: list[PromptResponse]
     next_cursor: Optional[str] = None
+
+
+class ImportedPrompt(BaseModel):
+    index: int
+    id: UUID
+    name: str
+
+
+class PromptImportError(BaseModel):
+    # Position of the row in the uploaded array / NDJSON stream.
+    index: int
+    name: Optional[str] = None
+    error: str
+
+
+class PromptImportResponse(BaseModel):
+    created: list[ImportedPrompt]
+    errors: list[PromptImportError]
+
+
+class PromptBatchKey(BaseModel):
+    id: Optional[UUID] = None
+    name: Optional[str] = None
+    version_number: Optional[int] = Field(None, ge=1, description="Pin this version")
+
+    @model_validator(mode="after")
+    def _one_of_id_or_name(self) -> "PromptBatchKey":
+        if (self.id is None) == (self.name is None):
+            raise ValueError("give exactly one of id or name")
+        return self
+
+
+class PromptBatchGetRequest(BaseModel):
+    keys: list[PromptBatchKey] = Field(..., min_length=1, max_length=500)
+
+
+class PromptBatchResult(BaseModel):
+    key: PromptBatchKey
+    prompt: Optional[PromptResponse] = None
+    version: Optional[PromptVersionResponse] = Field(None, description="The pinned version, if one was asked for")
+    # "not_found" or "version_not_found" when the key did not resolve.
+    error: Optional[str] = None
+
+
+class PromptBatchGetResponse(BaseModel):
+    results: list[PromptBatchResult]
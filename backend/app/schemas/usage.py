@@ -0,0 +1,53 @@
+import enum
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.models.usage import UsageClientType
+
+# Events per POST /usage request.
+MAX_USAGE_BATCH = 1000
+
+
+class UsageEventCreate(BaseModel):
+    prompt_id: UUID
+    version_id: Optional[UUID] = None
+    # Until requests are authenticated, clients identify their user themselves.
+    user_id: Optional[UUID] = None
+    client_type: UsageClientType = UsageClientType.OTHER
+    project_key: Optional[str] = Field(None, max_length=255)
+    context: Optional[dict] = None
+
+
+class UsageEventBatch(BaseModel):
+    events: list[UsageEventCreate] = Field(..., min_length=1, max_length=MAX_USAGE_BATCH)
+
+
+class UsageAccepted(BaseModel):
+    accepted: int
+
+
+class UsageGroupBy(str, enum.Enum):
+    PROMPT = "prompt"
+    USER = "user"
+    COLLECTION = "collection"
+    CLIENT_TYPE = "client_type"
+
+
+class UsageSummaryItem(BaseModel):
+    # Prompt, user or collection id, or client type; null for "none" (anonymous, no collection).
+    key: Optional[str] = None
+    count: int
+
+
+class UsageSummaryResponse(BaseModel):
+    from_: datetime = Field(..., alias="from")
+    to: datetime
+    group_by: UsageGroupBy
+    prompt_id: Optional[UUID] = None
+    total: int
+    items: list[UsageSummaryItem]
+
+    model_config = {"populate_by_name": True}
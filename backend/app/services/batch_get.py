@@ -0,0 +1,145 @@
+"""Resolve many prompts by id or name in a constant number of queries.
+
+A batch is answered with three ``SELECT``\\ s whatever its size: the prompts matching
+any requested id or name (one ``IN`` query), every version the batch needs (current
+versions and pinned ``version_number``\\ s together), and their tags. Results come
+back in request order, one per key, with a not-found marker instead of a prompt when
+a key does not resolve.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import Row, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import ContentBlob, decode
+from app.models.prompt import Prompt, PromptTag, PromptVersion
+
+NOT_FOUND = "not_found"
+VERSION_NOT_FOUND = "version_not_found"
+
+_PROMPT_COLUMNS = (
+    Prompt.id,
+    Prompt.name,
+    Prompt.display_name,
+    Prompt.description,
+    Prompt.item_type,
+    Prompt.status,
+    Prompt.current_version_id,
+    Prompt.created_at,
+    Prompt.updated_at,
+)
+_VERSION_COLUMNS = (
+    PromptVersion.id,
+    PromptVersion.prompt_id,
+    PromptVersion.version_number,
+    PromptVersion.status,
+    ContentBlob.encoding,
+    ContentBlob.data,
+    PromptVersion.created_at,
+    PromptVersion.updated_at,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class BatchKey:
+    id: Optional[UUID] = None
+    name: Optional[str] = None
+    version_number: Optional[int] = None
+
+
+def _version(row: Optional[Row]) -> Optional[dict[str, Any]]:
+    if row is None:
+        return None
+    return {
+        "id": row.id,
+        "version_number": row.version_number,
+        "status": row.status,
+        "content": decode(row.encoding, row.data),
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def _prompt(row: Row, tags: list[str], current: Optional[Row]) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "display_name": row.display_name,
+        "description": row.description,
+        "item_type": row.item_type,
+        "tags": tags,
+        "status": row.status,
+        "current_version": _version(current),
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def _key(key: BatchKey) -> dict[str, Any]:
+    return {"id": key.id, "name": key.name, "version_number": key.version_number}
+
+
+async def batch_get(db: AsyncSession, keys: Sequence[BatchKey]) -> dict[str, Any]:
+    """Resolve ``keys`` as a ``PromptBatchGetResponse`` payload.
+
+    A key with a ``version_number`` also gets that version as ``version``; the
+    prompt's ``current_version`` is always the current one.
+    """
+
+    ids = {key.id for key in keys if key.id is not None}
+    names = {key.name for key in keys if key.name is not None}
+    criteria = []
+    if ids:
+        criteria.append(Prompt.id.in_(ids))
+    if names:
+        criteria.append(Prompt.name.in_(names))
+    prompts: list[Row] = []
+    if criteria:
+        prompts = list(await db.execute(select(*_PROMPT_COLUMNS).where(or_(*criteria))))
+    by_id = {row.id: row for row in prompts}
+    by_name = {row.name: row for row in prompts}
+
+    def resolve(key: BatchKey) -> Optional[Row]:
+        return by_id.get(key.id) if key.id is not None else by_name.get(key.name)
+
+    versions: dict[UUID, Row] = {}
+    pinned: dict[tuple[UUID, int], Row] = {}
+    tags: dict[UUID, list[str]] = defaultdict(list)
+    if prompts:
+        wanted = {(row.id, key.version_number) for key in keys if key.version_number and (row := resolve(key))}
+        version_criteria = [PromptVersion.id.in_([row.current_version_id for row in prompts if row.current_version_id])]
+        if wanted:
+            version_criteria.append(tuple_(PromptVersion.prompt_id, PromptVersion.version_number).in_(wanted))
+        for row in await db.execute(select(*_VERSION_COLUMNS).join(PromptVersion.blob).where(or_(*version_criteria))):
+            versions[row.id] = row
+            pinned[(row.prompt_id, row.version_number)] = row
+
+        tag_rows = await db.execute(
+            select(PromptTag.prompt_id, PromptTag.tag)
+            .where(PromptTag.prompt_id.in_(list(by_id)))
+            .order_by(PromptTag.prompt_id, PromptTag.tag)
+        )
+        for prompt_id, tag in tag_rows:
+            tags[prompt_id].append(tag)
+
+    results = []
+    for key in keys:
+        result: dict[str, Any] = {"key": _key(key), "prompt": None, "version": None, "error": None}
+        row = resolve(key)
+        if row is None:
+            result["error"] = NOT_FOUND
+        elif key.version_number and (row.id, key.version_number) not in pinned:
+            result["error"] = VERSION_NOT_FOUND
+        else:
+            result["prompt"] = _prompt(row, tags.get(row.id, []), versions.get(row.current_version_id))
+            if key.version_number:
+                result["version"] = _version(pinned[(row.id, key.version_number)])
+        results.append(result)
+    return {"results": results}
@@ -0,0 +1,258 @@
+"""Set-based bulk import of prompts.
+
+Every row is validated before anything is written. Valid rows are then inserted in
+chunks, one transaction per chunk, with a fixed number of statements per chunk
+whatever its size:
+
+1. ``INSERT INTO prompts ... ON CONFLICT (name) DO NOTHING RETURNING id`` as one
+   multi-row statement (SQLAlchemy's insertmanyvalues); names missing from the
+   ``RETURNING`` set already existed and are reported as conflicts for that row only.
+2. Multi-row inserts of the survivors' bodies (``content_blobs``), first versions
+   and tags.
+3. One ``UPDATE`` pointing ``current_version_id`` at those versions, then the usual
+   ``library_items`` rows and changefeed entry.
+
+Ids are generated client-side, so no row needs a round trip to learn its key.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import Prompt, PromptStatus, PromptTag, PromptVersion, PromptVersionStatus
+from app.schemas.prompt import PromptCreate
+from app.services import changefeed, content_store, fulltext, library_events, library_items
+from app.services.library_events import LibraryDocument
+
+CHUNK_SIZE = 1000
+MAX_IMPORT_ROWS = 50_000
+
+_prompts = Prompt.__table__
+_versions = PromptVersion.__table__
+_tags = PromptTag.__table__
+# Column limits Pydantic does not know about; over-long values would fail mid-import.
+_LENGTHS = {
+    "name": _prompts.c.name.type.length,
+    "display_name": _prompts.c.display_name.type.length,
+}
+_TAG_LENGTH = _tags.c.tag.type.length
+
+
+class InvalidImport(ValueError):
+    """The upload as a whole is unreadable (not a JSON array, or too many rows)."""
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    index: int
+    name: Optional[str]
+    error: str
+
+
+def parse(raw: bytes, *, ndjson: bool) -> list[Any]:
+    """Decode a JSON array or NDJSON upload into raw row objects.
+
+    An NDJSON line that is not valid JSON becomes ``None`` and is reported for that row.
+    """
+
+    if ndjson:
+        try:
+            text = raw.decode()
+        except UnicodeDecodeError as exc:
+            raise InvalidImport("body is not valid UTF-8") from exc
+        rows: list[Any] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                rows.append(None)
+    else:
+        try:
+            rows = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise InvalidImport("body is not valid JSON") from exc
+        if not isinstance(rows, list):
+            raise InvalidImport("body must be a JSON array of prompts")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise InvalidImport(f"at most {MAX_IMPORT_ROWS} prompts per request")
+    return rows
+
+
+def _too_long(payload: PromptCreate) -> Optional[str]:
+    for field, limit in _LENGTHS.items():
+        if len(getattr(payload, field)) > limit:
+            return f"invalid: {field}: at most {limit} characters"
+    for position, tag in enumerate(payload.tags):
+        if len(tag) > _TAG_LENGTH:
+            return f"invalid: tags.{position}: at most {_TAG_LENGTH} characters"
+    return None
+
+
+def validate(rows: Sequence[Any]) -> tuple[list[tuple[int, PromptCreate]], list[RowError]]:
+    """Split raw rows into valid payloads and per-row errors (including in-batch duplicates)."""
+
+    valid: list[tuple[int, PromptCreate]] = []
+    errors: list[RowError] = []
+    seen: set[str] = set()
+    for index, row in enumerate(rows):
+        if row is None:
+            errors.append(RowError(index, None, "invalid JSON"))
+            continue
+        try:
+            payload = PromptCreate.model_validate(row)
+        except ValidationError as exc:
+            name = row.get("name") if isinstance(row, dict) else None
+            first = exc.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            errors.append(RowError(index, name, f"invalid: {location}: {first['msg']}"))
+            continue
+        too_long = _too_long(payload)
+        if too_long is not None:
+            errors.append(RowError(index, payload.name, too_long))
+            continue
+        if payload.name in seen:
+            errors.append(RowError(index, payload.name, "duplicate name in request"))
+            continue
+        seen.add(payload.name)
+        valid.append((index, payload))
+    return valid, errors
+
+
+def _insert(db: AsyncSession, table):
+    dialect = postgresql if fulltext.dialect_name(db) == "postgresql" else sqlite
+    return dialect.insert(table)
+
+
+def _dedupe(tags: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(tags))
+
+
+async def _import_chunk(
+    db: AsyncSession, chunk: Sequence[tuple[int, PromptCreate]], created_by: Optional[uuid.UUID]
+) -> tuple[list[tuple[int, uuid.UUID, str]], list[RowError]]:
+    now = datetime.now(timezone.utc)
+    ids = {payload.name: uuid.uuid4() for _, payload in chunk}
+    result = await db.execute(
+        _insert(db, _prompts)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(_prompts.c.id),
+        [
+            {
+                "id": ids[payload.name],
+                "name": payload.name,
+                "display_name": payload.display_name,
+                "description": payload.description,
+                "item_type": payload.item_type.value,
+                "status": PromptStatus.ACTIVE.value,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for _, payload in chunk
+        ],
+    )
+    inserted = set(result.scalars())
+
+    created = [(index, ids[p.name], p.name) for index, p in chunk if ids[p.name] in inserted]
+    conflicts = [RowError(index, p.name, "name already exists") for index, p in chunk if ids[p.name] not in inserted]
+    if not created:
+        return created, conflicts
+
+    survivors = [(ids[p.name], p) for _, p in chunk if ids[p.name] in inserted]
+    version_ids = {prompt_id: uuid.uuid4() for prompt_id, _ in survivors}
+    content_hashes = await content_store.put(db, [payload.content for _, payload in survivors])
+    await db.execute(
+        _versions.insert(),
+        [
+            {
+                "id": version_ids[prompt_id],
+                "prompt_id": prompt_id,
+                "version_number": 1,
+                "status": PromptVersionStatus.APPROVED.value,
+                "content_hash": content_hash,
+                "notes": payload.notes,
+                "created_by": created_by,
+                "approved_by": created_by,
+                "approved_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (prompt_id, payload), content_hash in zip(survivors, content_hashes)
+        ],
+    )
+    tag_rows = [
+        {"prompt_id": prompt_id, "tag": tag}
+        for prompt_id, payload in survivors
+        for tag in _dedupe(payload.tags)
+    ]
+    if tag_rows:
+        await db.execute(_tags.insert(), tag_rows)
+    await db.execute(
+        update(_prompts)
+        .where(_prompts.c.id.in_(list(version_ids)))
+        .values(
+            current_version_id=select(_versions.c.id)
+            .where(_versions.c.prompt_id == _prompts.c.id, _versions.c.version_number == 1)
+            .scalar_subquery()
+        )
+    )
+    documents = [
+        LibraryDocument(
+            id=prompt_id,
+            name=payload.name,
+            display_name=payload.display_name,
+            description=payload.description,
+            item_type=payload.item_type.value,
+            status=PromptStatus.ACTIVE.value,
+            tags=tuple(_dedupe(payload.tags)),
+            version=1,
+            content=payload.content,
+            created_at=now,
+            updated_at=now,
+        )
+        for prompt_id, payload in survivors
+    ]
+    await library_items.add(db, [library_items.item_row(doc, version_ids[doc.id]) for doc in documents])
+    await changefeed.record(db, version_ids)
+    for document in documents:
+        library_events.record_change(db, document)
+    return created, conflicts
+
+
+async def import_prompts(
+    db: AsyncSession,
+    rows: Sequence[Any],
+    *,
+    chunk_size: int = CHUNK_SIZE,
+    created_by: Optional[uuid.UUID] = None,
+) -> dict[str, Any]:
+    """Validate and insert ``rows`` as a ``PromptImportResponse`` payload.
+
+    Each chunk commits on its own, so a failure part-way keeps the chunks before it.
+    """
+
+    valid, errors = validate(rows)
+    created: list[tuple[int, uuid.UUID, str]] = []
+    for start in range(0, len(valid), chunk_size):
+        chunk_created, conflicts = await _import_chunk(db, valid[start : start + chunk_size], created_by)
+        await db.commit()
+        created.extend(chunk_created)
+        errors.extend(conflicts)
+    return {
+        "created": [{"index": index, "id": prompt_id, "name": name} for index, prompt_id, name in created],
+        "errors": [
+            {"index": error.index, "name": error.name, "error": error.error}
+            for error in sorted(errors, key=lambda error: error.index)
+        ],
+    }
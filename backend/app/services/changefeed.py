@@ -0,0 +1,117 @@
+"""Delta sync for desktop clients over the ``library_changes`` log.
+
+Every library write appends one row per changed prompt, in the writer's transaction.
+A sync token is an opaque encoding of the last ``seq`` a client has applied; a page
+is the prompts changed after it, deduplicated to their latest change and ordered by
+it, so a client that is up to date gets an empty page back with the same token.
+Changes carry no payload: prompts are read in their current state from
+``library_items``, and a prompt that is archived or gone is reported as a tombstone.
+
+On Postgres, writers take a transaction-scoped advisory lock before logging, so
+sequence values become visible in commit order and a reader can never observe
+``seq`` 11 while 10 is still in flight (and then skip it forever).
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.library import LibraryChange, LibraryItem
+from app.schemas.library import ChangeOp
+from app.services import fulltext, library_items
+from app.services.library_events import LibraryDocument
+
+DEFAULT_BATCH = 500
+MAX_BATCH = 1000
+# Arbitrary application-wide key for pg_advisory_xact_lock.
+_WRITE_LOCK_KEY = 0x6C6962
+_TOKEN_PREFIX = "v1:"
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_token(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"{_TOKEN_PREFIX}{seq}".encode()).rstrip(b"=").decode()
+
+
+def decode_token(token: Optional[str]) -> int:
+    """The ``seq`` a token stands for; no token means "from the beginning"."""
+
+    if not token:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        if not raw.startswith(_TOKEN_PREFIX):
+            raise ValueError(raw)
+        seq = int(raw.removeprefix(_TOKEN_PREFIX))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidSyncToken(token) from exc
+    if seq < 0:
+        raise InvalidSyncToken(token)
+    return seq
+
+
+async def record(db: AsyncSession, prompt_ids: Iterable[UUID]) -> None:
+    """Log a change to each prompt in the current transaction."""
+
+    if fulltext.dialect_name(db) == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(_WRITE_LOCK_KEY)))
+    rows = [{"prompt_id": prompt_id} for prompt_id in dict.fromkeys(prompt_ids)]
+    if rows:
+        # Core executemany: one statement however many prompts changed.
+        await db.execute(insert(LibraryChange.__table__), rows)
+
+
+async def library_stamp(db: AsyncSession) -> tuple[int, Optional[datetime]]:
+    """Latest change ``seq`` and its time: a library-wide version counter."""
+
+    result = await db.execute(
+        select(LibraryChange.seq, LibraryChange.changed_at).order_by(LibraryChange.seq.desc()).limit(1)
+    )
+    row = result.one_or_none()
+    return (0, None) if row is None else (row.seq, row.changed_at)
+
+
+async def changes_page(
+    db: AsyncSession, *, token: Optional[str] = None, limit: int = DEFAULT_BATCH
+) -> dict[str, Any]:
+    """Prompts changed since ``token`` as a ``LibraryChangesResponse`` payload."""
+
+    after = decode_token(token)
+    limit = max(1, min(limit, MAX_BATCH))
+    last_seq = func.max(LibraryChange.seq).label("last_seq")
+    result = await db.execute(
+        select(LibraryChange.prompt_id, last_seq)
+        .where(LibraryChange.seq > after)
+        .group_by(LibraryChange.prompt_id)
+        .order_by(last_seq)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return {"items": [], "next_token": encode_token(after), "has_more": False}
+
+    loaded = await db.execute(
+        library_items.documents_select().where(LibraryItem.id.in_([prompt_id for prompt_id, _ in rows]))
+    )
+    documents = {doc.id: doc for doc in map(LibraryDocument.from_item, loaded)}
+    items = []
+    for prompt_id, _ in rows:
+        document = documents.get(prompt_id)
+        if document is None or not document.is_active:
+            items.append({"id": prompt_id, "op": ChangeOp.DELETE, "item": None})
+        else:
+            items.append({"id": prompt_id, "op": ChangeOp.UPSERT, "item": document.to_item()})
+    return {"items": items, "next_token": encode_token(rows[-1].last_seq), "has_more": has_more}
@@ -0,0 +1,63 @@
+"""Writes to ``content_blobs``, the content-addressed store behind version bodies.
+
+Writers store bodies with :func:`put` before inserting the versions that reference
+them: one ``INSERT ... ON CONFLICT DO NOTHING`` for any number of bodies, so a body
+that is already stored (an unchanged version, a snippet shared between prompts) costs
+nothing. Versions whose ``content`` is assigned through the ORM are covered by a
+``before_flush`` hook that stores their bodies the same way. Reads decompress lazily:
+see :class:`~app.models.content.ContentBlob` and ``PromptVersion.content``.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.content import ContentBlob, blob_row
+from app.models.prompt import PromptVersion
+from app.services import fulltext
+
+
+def _insert(dialect_name: str):
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    return dialect.insert(ContentBlob).on_conflict_do_nothing(index_elements=["hash"])
+
+
+def _rows(texts: Iterable[str]) -> tuple[list[str], list[dict[str, Any]]]:
+    hashes: list[str] = []
+    rows: dict[str, dict[str, Any]] = {}
+    for text in texts:
+        row = blob_row(text)
+        hashes.append(row["hash"])
+        rows.setdefault(row["hash"], row)
+    return hashes, list(rows.values())
+
+
+async def put(db: AsyncSession, texts: Sequence[str]) -> list[str]:
+    """Store ``texts`` (skipping ones already stored); returns their hashes, in order."""
+
+    hashes, rows = _rows(texts)
+    if rows:
+        await db.execute(_insert(fulltext.dialect_name(db)), rows)
+    return hashes
+
+
+@event.listens_for(Session, "before_flush")
+def _store_assigned_content(session: Session, flush_context: Any, instances: Any) -> None:
+    texts = []
+    for instance in itertools.chain(session.new, session.dirty):
+        if not isinstance(instance, PromptVersion):
+            continue
+        assigned = instance.__dict__.get("_assigned_content")
+        if assigned is not None and assigned[0] == instance.content_hash and inspect(instance).attrs.content_hash.history.added:
+            texts.append(assigned[1])
+    _, rows = _rows(texts)
+    if rows:
+        connection = session.connection()
+        connection.execute(_insert(connection.dialect.name), rows)
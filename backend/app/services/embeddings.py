@@ -0,0 +1,60 @@
+"""Offline text embeddings for semantic library search.
+
+A signed feature-hashing projection of word unigrams, word bigrams and character
+trigrams, with sublinear term frequency and L2 normalisation. It needs no model files,
+network or GPU, is deterministic across processes (CRC32, not ``hash()``), and gives
+useful similarity between differently worded descriptions of the same task
+("review my PR" vs. "Python Code Review") through shared sub-word trigrams.
+"""
+
+from __future__ import annotations
+
+import math
+import zlib
+from collections import Counter
+from collections.abc import Sequence
+
+import numpy as np
+
+from app.services import trigram
+
+DIMENSIONS = 512
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it me my of on or our please the this "
+    "to us we with you your".split()
+)
+
+
+def _features(text: str) -> Counter[str]:
+    words = [word for word in trigram.words(text) if word not in _STOPWORDS]
+    features: Counter[str] = Counter()
+    for word in words:
+        features[f"w:{word}"] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[f"c:{padded[i : i + 3]}"] += 1
+    for left, right in zip(words, words[1:]):
+        features[f"b:{left} {right}"] += 1
+    return features
+
+
+def embed_one(text: str) -> np.ndarray:
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature, count in _features(text).items():
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % DIMENSIONS] += sign * (1.0 + math.log(count))
+    norm = float(np.linalg.norm(vector))
+    if norm > 0.0:
+        vector /= norm
+    return vector
+
+
+def embed(texts: Sequence[str]) -> np.ndarray:
+    """Embed a batch of texts into an ``(n, DIMENSIONS)`` float32 matrix of unit rows."""
+
+    matrix = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        matrix[row] = embed_one(text)
+    return matrix
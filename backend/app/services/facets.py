@@ -0,0 +1,137 @@
+"""Library search filters and facet counts (item type, status, top tags).
+
+SQL-backed searches describe their matched set as a ``SELECT library_items.id ...``;
+the facet counts for it come back from a single ``UNION ALL`` of three grouped queries
+over that set, so Postgres can answer them from ``idx_library_items_item_type`` and
+``idx_prompt_tags_tag`` without shipping rows to Python. Searches whose candidates are
+already in memory (BM25 index, semantic top-k, SQLite fuzzy fallback) count in Python.
+
+Counts describe the *filtered* matched set, so drilling into a chip narrows the others.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+from sqlalchemy import ColumnElement, Select, func, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.library import LibraryItem
+from app.models.prompt import Prompt, PromptTag
+from app.services.library_events import LibraryDocument
+
+FACET_TAG_LIMIT = 10
+
+Facets = dict[str, list[dict[str, Any]]]
+
+
+def _normalize(values: Optional[Iterable[Any]]) -> tuple[str, ...]:
+    # Sorted and de-duplicated so equivalent filters share one result-cache key.
+    return tuple(sorted({getattr(value, "value", value) for value in values or ()}))
+
+
+@dataclass(frozen=True, slots=True)
+class LibraryFilters:
+    item_types: tuple[str, ...] = ()
+    tags: tuple[str, ...] = ()
+    statuses: tuple[str, ...] = ()
+
+    @classmethod
+    def build(
+        cls,
+        *,
+        item_types: Optional[Iterable[Any]] = None,
+        tags: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[Any]] = None,
+    ) -> "LibraryFilters":
+        return cls(_normalize(item_types), _normalize(tags), _normalize(statuses))
+
+    def __bool__(self) -> bool:
+        return bool(self.item_types or self.tags or self.statuses)
+
+    def criteria(self, entity: Union[type[Prompt], type[LibraryItem]] = Prompt) -> list[ColumnElement[bool]]:
+        """WHERE criteria over ``prompts``, or ``library_items`` (same column names)."""
+
+        criteria: list[ColumnElement[bool]] = []
+        if self.item_types:
+            criteria.append(entity.item_type.in_(self.item_types))
+        if self.statuses:
+            criteria.append(entity.status.in_(self.statuses))
+        # Every selected tag must be present: each chip narrows the result further. An
+        # uncorrelated IN lets the planner start from idx_prompt_tags_tag.
+        criteria.extend(
+            entity.id.in_(select(PromptTag.prompt_id).where(PromptTag.tag == tag)) for tag in self.tags
+        )
+        return criteria
+
+    def matches(self, doc: LibraryDocument) -> bool:
+        return (
+            (not self.item_types or doc.item_type in self.item_types)
+            and (not self.statuses or doc.status in self.statuses)
+            and all(tag in doc.tags for tag in self.tags)
+        )
+
+
+def _ranked(counts: Counter[str], limit: Optional[int] = None) -> list[dict[str, Any]]:
+    ordered = sorted(counts.items(), key=lambda entry: (-entry[1], entry[0]))
+    return [{"value": value, "count": count} for value, count in ordered[:limit]]
+
+
+def count_facets(documents: Iterable[LibraryDocument], tag_limit: int = FACET_TAG_LIMIT) -> Facets:
+    item_types: Counter[str] = Counter()
+    statuses: Counter[str] = Counter()
+    tags: Counter[str] = Counter()
+    for doc in documents:
+        item_types[doc.item_type] += 1
+        statuses[doc.status] += 1
+        tags.update(doc.tags)
+    return {
+        "item_type": _ranked(item_types),
+        "tag": _ranked(tags, tag_limit),
+        "status": _ranked(statuses),
+    }
+
+
+async def facet_counts(
+    db: AsyncSession, matched: Select, tag_limit: int = FACET_TAG_LIMIT
+) -> Facets:
+    """Facet counts over the library item ids selected by ``matched``, in one round trip."""
+
+    matched_ids = select(matched.cte("matched_ids").c.id)
+
+    def grouped(facet: str, column) -> Select:
+        return (
+            select(
+                literal_column(f"'{facet}'").label("facet"),
+                column.label("value"),
+                func.count().label("n"),
+            )
+            .where(LibraryItem.id.in_(matched_ids))
+            .group_by(column)
+        )
+
+    top_tags = (
+        select(
+            literal_column("'tag'").label("facet"),
+            PromptTag.tag.label("value"),
+            func.count().label("n"),
+        )
+        .where(PromptTag.prompt_id.in_(matched_ids))
+        .group_by(PromptTag.tag)
+        .order_by(func.count().desc(), PromptTag.tag)
+        .limit(tag_limit)
+        .subquery()
+    )
+    stmt = union_all(
+        grouped("item_type", LibraryItem.item_type),
+        grouped("status", LibraryItem.status),
+        select(top_tags.c.facet, top_tags.c.value, top_tags.c.n),
+    )
+
+    counts: dict[str, Counter[str]] = {"item_type": Counter(), "tag": Counter(), "status": Counter()}
+    for facet, value, count in await db.execute(stmt):
+        counts[facet][value] = count
+    return {facet: _ranked(values) for facet, values in counts.items()}
@@ -0,0 +1,74 @@
+"""Postgres full-text search helpers for the library search path.
+
+Each library item carries a weighted ``tsvector`` in ``library_items.search_vector``:
+
+- ``A``: display name + machine name
+- ``B``: tags
+- ``C``: description
+- ``D``: current version content
+
+Version bodies are stored compressed, so the vector is not computed from the tables
+in SQL: :mod:`app.services.library_items` sets it with :func:`document_vector` from
+the decoded text whenever it writes an item.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from collections.abc import Iterable
+from typing import Optional
+
+from sqlalchemy import ColumnElement, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# "simple" avoids English stemming so bilingual (en/zh) content tokenizes predictably.
+TS_CONFIG = "simple"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def tokenize(term: str) -> list[str]:
+    return _TOKEN_RE.findall(term.lower())
+
+
+def build_tsquery(term: str) -> Optional[str]:
+    """Turn free text into a prefix-matching ``to_tsquery`` string.
+
+    Every token must match (``&``) and is treated as a prefix (``:*``) so partially typed
+    Spotlight input still hits. Returns ``None`` when the term has no searchable tokens.
+    """
+
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    return " & ".join(f"'{token}':*" for token in tokens)
+
+
+def tsquery(term: str) -> Optional[ColumnElement]:
+    query_text = build_tsquery(term)
+    if query_text is None:
+        return None
+    return func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), query_text)
+
+
+def document_vector(
+    *, display_name: str, name: str, tags: Iterable[str], description: Optional[str], content: str
+) -> ColumnElement:
+    """``search_vector`` of a document, as an expression to use in an ``INSERT``."""
+
+    regconfig = literal_column(f"'{TS_CONFIG}'::regconfig")
+    parts = (
+        (f"{display_name or ''} {name}", "A"),
+        (" ".join(tags), "B"),
+        (description or "", "C"),
+        (content, "D"),
+    )
+    # Weights are SQL literals: setweight() takes a "char", which a VARCHAR bind does not match.
+    weighted = [
+        func.setweight(func.to_tsvector(regconfig, value), literal_column(f"'{weight}'")) for value, weight in parts
+    ]
+    return functools.reduce(lambda left, right: left.op("||")(right), weighted)
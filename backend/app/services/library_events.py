@@ -0,0 +1,133 @@
+"""Commit-time notifications for in-process views of the library.
+
+Writers call :func:`record_change` with a :class:`LibraryDocument` snapshot while their
+transaction is open. Snapshots are parked on the session and handed to subscribers only
+after the transaction commits (and dropped on rollback), so in-memory indexes never see
+uncommitted data and never need a full rebuild to stay current.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.prompt import Prompt, PromptStatus
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "library_events.pending"
+
+
+@dataclass(frozen=True, slots=True)
+class LibraryDocument:
+    """Read-only snapshot of a prompt and its current version."""
+
+    id: UUID
+    name: str
+    display_name: str
+    description: Optional[str]
+    item_type: str
+    status: str
+    tags: tuple[str, ...]
+    version: int
+    content: str
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == PromptStatus.ACTIVE.value
+
+    @classmethod
+    def from_prompt(cls, prompt: Prompt, *, with_content: bool = True) -> Optional["LibraryDocument"]:
+        """Snapshot ``prompt``; ``with_content=False`` leaves ``content`` empty for loads that skipped it."""
+
+        version = prompt.current_version
+        if version is None:
+            return None
+        return cls(
+            id=prompt.id,
+            name=prompt.name,
+            display_name=prompt.display_name,
+            description=prompt.description,
+            item_type=getattr(prompt.item_type, "value", prompt.item_type),
+            status=getattr(prompt.status, "value", prompt.status),
+            tags=tuple(link.tag for link in prompt.tag_links),
+            version=version.version_number,
+            content=version.content if with_content else "",
+            created_at=prompt.created_at,
+            updated_at=prompt.updated_at,
+        )
+
+    @classmethod
+    def from_item(cls, row: Any) -> "LibraryDocument":
+        """Snapshot a ``library_items`` row; rows selected without ``content`` get an empty one."""
+
+        return cls(
+            id=row.id,
+            name=row.name,
+            display_name=row.title,
+            description=row.description,
+            item_type=row.item_type,
+            status=row.status,
+            tags=tuple(row.tags),
+            version=row.version,
+            content=row._mapping.get("content", ""),
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+
+    def to_item(self) -> dict[str, Any]:
+        """Payload in the shape of ``LibraryItemResponse``."""
+
+        return {
+            "id": self.id,
+            "title": self.display_name,
+            "body": self.content,
+            "item_type": self.item_type,
+            "tags": list(self.tags),
+            "version": self.version,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "source": "db",
+        }
+
+
+Listener = Callable[[list[LibraryDocument]], None]
+_listeners: list[Listener] = []
+
+
+def subscribe(listener: Listener) -> Listener:
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def record_change(db: AsyncSession, document: Optional[LibraryDocument]) -> None:
+    if document is not None:
+        db.info.setdefault(_PENDING_KEY, []).append(document)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed(session: Session) -> None:
+    documents = session.info.pop(_PENDING_KEY, None)
+    if not documents:
+        return
+    for listener in _listeners:
+        try:
+            listener(documents)
+        except Exception:  # pragma: no cover - a broken view must not fail the commit
+            logger.exception("library listener %r failed", listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,135 @@
+"""Streaming NDJSON export of the whole library.
+
+Rows come from a server-side cursor (``AsyncSession.stream`` with ``yield_per``) over a
+flat Core ``SELECT`` of prompts joined to their current version and its body, so no ORM graphs are
+built and only one batch is ever held in memory. Each batch's tags are fetched with
+one ``IN`` query and the batch is written out as one chunk of lines in the
+``PromptResponse`` shape (encoded exactly like the API's JSON), optionally gzip-compressed on the fly.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import ContentBlob, decode
+from app.models.prompt import Prompt, PromptTag, PromptVersion
+from app.services.facets import LibraryFilters
+
+BATCH_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# zlib window bits selecting a gzip header and trailer.
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+# The API's JSON encoding (app.api.responses), so export lines match it byte for byte.
+# SQLite hands back naive datetimes; everything is stored in UTC.
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+
+
+def _export_select(
+    filters: LibraryFilters,
+    updated_after: Optional[datetime],
+    updated_before: Optional[datetime],
+):
+    stmt = (
+        select(
+            Prompt.id,
+            Prompt.name,
+            Prompt.display_name,
+            Prompt.description,
+            Prompt.item_type,
+            Prompt.status,
+            Prompt.created_at,
+            Prompt.updated_at,
+            PromptVersion.id.label("version_id"),
+            PromptVersion.version_number,
+            PromptVersion.status.label("version_status"),
+            ContentBlob.encoding,
+            ContentBlob.data,
+            PromptVersion.created_at.label("version_created_at"),
+            PromptVersion.updated_at.label("version_updated_at"),
+        )
+        .outerjoin(PromptVersion, Prompt.current_version_id == PromptVersion.id)
+        .outerjoin(ContentBlob, PromptVersion.content_hash == ContentBlob.hash)
+        .where(*filters.criteria())
+        # Matches idx_prompts_updated_at_id, so Postgres streams without a sort.
+        .order_by(Prompt.updated_at, Prompt.id)
+    )
+    if updated_after is not None:
+        stmt = stmt.where(Prompt.updated_at >= updated_after)
+    if updated_before is not None:
+        stmt = stmt.where(Prompt.updated_at < updated_before)
+    return stmt
+
+
+def _line(row: Row, tags: list[str]) -> str:
+    version = None
+    if row.version_id is not None:
+        version = {
+            "id": row.version_id,
+            "version_number": row.version_number,
+            "status": row.version_status,
+            "content": decode(row.encoding, row.data),
+            "created_at": row.version_created_at,
+            "updated_at": row.version_updated_at,
+        }
+    record: dict[str, Any] = {
+        "id": row.id,
+        "name": row.name,
+        "display_name": row.display_name,
+        "description": row.description,
+        "item_type": row.item_type,
+        "tags": tags,
+        "status": row.status,
+        "current_version": version,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+    return orjson.dumps(record, option=_ORJSON_OPTIONS).decode() + "\n"
+
+
+async def _tags_for(db: AsyncSession, prompt_ids: Sequence[UUID]) -> dict[UUID, list[str]]:
+    result = await db.execute(
+        select(PromptTag.prompt_id, PromptTag.tag)
+        .where(PromptTag.prompt_id.in_(prompt_ids))
+        .order_by(PromptTag.prompt_id, PromptTag.tag)
+    )
+    tags: dict[UUID, list[str]] = defaultdict(list)
+    for prompt_id, tag in result:
+        tags[prompt_id].append(tag)
+    return tags
+
+
+async def ndjson_lines(
+    db: AsyncSession,
+    *,
+    filters: Optional[LibraryFilters] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """Yield the export one batch at a time, each chunk being whole NDJSON lines."""
+
+    stmt = _export_select(filters or LibraryFilters(), updated_after, updated_before)
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        tags = await _tags_for(db, [row.id for row in rows])
+        yield "".join(_line(row, tags.get(row.id, [])) for row in rows)
+
+
+async def gzip_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Compress a text stream into one gzip member without buffering it."""
+
+    compressor = zlib.compressobj(wbits=_GZIP_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,214 @@
+"""The ``library_items`` read model: one denormalized row per prompt.
+
+Library search, facet counts, delta sync and the in-memory indexes read prompts from
+``library_items`` with a single query, instead of joining ``prompts`` to the current
+version and its content blob and loading tags separately. A row is derived entirely
+from the normalized tables and is always written in the writer's transaction:
+
+- Core writers (prompt creation, bulk import) already hold the whole document and
+  call :func:`add` with :func:`item_row` for new prompts; :func:`refresh` reloads
+  changed ones.
+- ORM writes to prompts, versions or tags are picked up by a flush hook, so code that
+  edits mapped objects and commits never leaves a stale row behind.
+
+Bodies are compressed in ``content_blobs``, so rows are assembled in Python from the
+decoded text rather than by ``INSERT ... SELECT``; on Postgres the same pass computes
+``search_vector`` with :func:`~app.services.fulltext.document_vector`.
+
+:func:`rebuild` recomputes the whole table, for backfills and after out-of-band edits
+(``python -m app.commands rebuild-library-items``). Tags are stored sorted.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections.abc import Iterable, Sequence
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Executable, Select, delete, event, func, insert, literal_column, select, type_coerce
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.content import ContentBlob, decode
+from app.models.library import JSONList, LibraryItem
+from app.models.prompt import Prompt, PromptTag, PromptVersion
+from app.services import fulltext
+from app.services.library_events import LibraryDocument
+
+# Rows per multi-row INSERT on Postgres, where each row carries its own vector expression.
+_BATCH_SIZE = 500
+
+
+def _tags(dialect_name: str) -> ColumnElement[Any]:
+    if dialect_name == "postgresql":
+        tags = func.coalesce(
+            func.jsonb_agg(aggregate_order_by(PromptTag.tag, PromptTag.tag)), literal_column("'[]'::jsonb")
+        )
+    else:
+        # SQLite reads them through the (prompt_id, tag) primary key, already sorted.
+        tags = func.json_group_array(PromptTag.tag)
+    subquery = select(tags).where(PromptTag.prompt_id == Prompt.id).correlate(Prompt).scalar_subquery()
+    return type_coerce(subquery, JSONList)
+
+
+def _source(dialect_name: str, prompt_ids: Optional[list[UUID]] = None) -> Select:
+    rows = (
+        select(
+            Prompt.id,
+            Prompt.name,
+            Prompt.display_name,
+            Prompt.description,
+            Prompt.item_type,
+            Prompt.status,
+            _tags(dialect_name).label("tags"),
+            PromptVersion.id.label("version_id"),
+            PromptVersion.version_number,
+            ContentBlob.encoding,
+            ContentBlob.data,
+            Prompt.created_at,
+            Prompt.updated_at,
+        )
+        .join(PromptVersion, Prompt.current_version_id == PromptVersion.id)
+        .join(ContentBlob, PromptVersion.content_hash == ContentBlob.hash)
+    )
+    if prompt_ids is not None:
+        rows = rows.where(Prompt.id.in_(prompt_ids))
+    return rows
+
+
+def _loaded_row(row: Any) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "title": row.display_name,
+        "description": row.description,
+        "item_type": row.item_type,
+        "status": row.status,
+        "tags": list(row.tags),
+        "version_id": row.version_id,
+        "version": row.version_number,
+        "content": decode(row.encoding, row.data),
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def item_row(document: LibraryDocument, version_id: UUID) -> dict[str, Any]:
+    """The item of a document the writer already holds, for :func:`add`."""
+
+    return {
+        "id": document.id,
+        "name": document.name,
+        "title": document.display_name,
+        "description": document.description,
+        "item_type": document.item_type,
+        "status": document.status,
+        "tags": sorted(document.tags),
+        "version_id": version_id,
+        "version": document.version,
+        "content": document.content,
+        "created_at": document.created_at,
+        "updated_at": document.updated_at,
+    }
+
+
+def _inserts(dialect_name: str, rows: Sequence[dict[str, Any]]) -> list[tuple[Executable, Optional[list]]]:
+    """``(statement, parameters)`` pairs writing ``rows``."""
+
+    if not rows:
+        return []
+    if dialect_name != "postgresql":
+        return [(insert(LibraryItem), list(rows))]
+    statements: list[tuple[Executable, Optional[list]]] = []
+    for start in range(0, len(rows), _BATCH_SIZE):
+        values = [
+            {
+                **row,
+                "search_vector": fulltext.document_vector(
+                    display_name=row["title"],
+                    name=row["name"],
+                    tags=row["tags"],
+                    description=row["description"],
+                    content=row["content"],
+                ),
+            }
+            for row in rows[start : start + _BATCH_SIZE]
+        ]
+        statements.append((insert(LibraryItem).values(values), None))
+    return statements
+
+
+def _delete(prompt_ids: list[UUID]):
+    return delete(LibraryItem).where(LibraryItem.id.in_(prompt_ids))
+
+
+async def _write(db: AsyncSession, rows: Sequence[dict[str, Any]]) -> None:
+    for statement, parameters in _inserts(fulltext.dialect_name(db), rows):
+        await db.execute(statement, parameters)
+
+
+async def add(db: AsyncSession, rows: Iterable[dict[str, Any]]) -> None:
+    """Write the items (:func:`item_row`) of prompts created in this transaction."""
+
+    await _write(db, list({row["id"]: row for row in rows}.values()))
+
+
+async def refresh(db: AsyncSession, prompt_ids: Iterable[UUID]) -> None:
+    """Rewrite the items of prompts changed in this transaction (and drop deleted ones)."""
+
+    ids = list(dict.fromkeys(prompt_ids))
+    if ids:
+        await db.execute(_delete(ids))
+        result = await db.execute(_source(fulltext.dialect_name(db), ids))
+        await _write(db, [_loaded_row(row) for row in result])
+
+
+async def rebuild(db: AsyncSession, *, batch_size: int = 1000) -> int:
+    """Recompute every item from the normalized tables; returns the number of items."""
+
+    await db.execute(delete(LibraryItem))
+    count = 0
+    result = await db.stream(_source(fulltext.dialect_name(db)).execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        await _write(db, [_loaded_row(row) for row in rows])
+        count += len(rows)
+    return count
+
+
+def documents_select(*, with_content: bool = True) -> Select:
+    """Rows for :meth:`LibraryDocument.from_item`; ``with_content=False`` skips the body."""
+
+    columns = [
+        LibraryItem.id,
+        LibraryItem.name,
+        LibraryItem.title,
+        LibraryItem.description,
+        LibraryItem.item_type,
+        LibraryItem.status,
+        LibraryItem.tags,
+        LibraryItem.version,
+        LibraryItem.created_at,
+        LibraryItem.updated_at,
+    ]
+    if with_content:
+        columns.append(LibraryItem.content)
+    return select(*columns)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_flushed(session: Session, flush_context: Any) -> None:
+    prompt_ids: set[UUID] = set()
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Prompt):
+            prompt_ids.add(instance.id)
+        elif isinstance(instance, (PromptVersion, PromptTag)):
+            prompt_ids.add(instance.prompt_id)
+    if prompt_ids:
+        ids = list(prompt_ids)
+        connection = session.connection()
+        connection.execute(_delete(ids))
+        rows = [_loaded_row(row) for row in connection.execute(_source(connection.dialect.name, ids))]
+        for statement, parameters in _inserts(connection.dialect.name, rows):
+            connection.execute(statement, parameters)
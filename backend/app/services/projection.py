@@ -0,0 +1,139 @@
+"""Sparse fieldsets (``fields=``) for prompt and library responses.
+
+A fieldset names top-level response fields, comma separated; ``current_version``
+selects the whole nested version and ``current_version.<field>`` only some of its
+fields. ``id`` is always returned. Fieldsets become SQL projections: only the columns
+behind the requested fields are selected (``load_only``), relationships that are not
+needed are not loaded at all, and the version ``content`` is read only when asked for.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy.orm import load_only, noload, selectinload
+
+from app.models.prompt import Prompt, PromptVersion
+from app.schemas.library import LibraryItemResponse
+from app.schemas.prompt import PromptResponse, PromptVersionResponse
+
+PROMPT_FIELDS = frozenset(PromptResponse.model_fields)
+VERSION_FIELDS = frozenset(PromptVersionResponse.model_fields)
+LIBRARY_ITEM_FIELDS = frozenset(LibraryItemResponse.model_fields)
+# Library item fields that need the version body from the database.
+LIBRARY_BODY_FIELDS = frozenset({"body", "highlights"})
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Fieldset:
+    fields: frozenset[str]
+    version_fields: frozenset[str] = frozenset()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+
+def parse(spec: Optional[str], allowed: frozenset[str], nested: Optional[frozenset[str]] = None) -> Optional[Fieldset]:
+    """Parse a ``fields=`` value; ``None`` (or an empty value) means every field."""
+
+    if not spec or not spec.strip():
+        return None
+    fields: set[str] = {"id"}
+    version_fields: set[str] = set()
+    for raw in spec.split(","):
+        name = raw.strip()
+        if not name:
+            continue
+        parent, _, child = name.partition(".")
+        if child and nested is not None and parent == "current_version":
+            if child not in nested:
+                raise InvalidFields(name)
+            fields.add(parent)
+            version_fields.add(child)
+        elif name in allowed:
+            fields.add(name)
+            if name == "current_version" and nested is not None:
+                version_fields.update(nested)
+        else:
+            raise InvalidFields(name)
+    if version_fields:
+        version_fields.add("id")
+    return Fieldset(frozenset(fields), frozenset(version_fields))
+
+
+def parse_prompt_fields(spec: Optional[str]) -> Optional[Fieldset]:
+    return parse(spec, PROMPT_FIELDS, VERSION_FIELDS)
+
+
+def parse_library_fields(spec: Optional[str]) -> Optional[Fieldset]:
+    return parse(spec, LIBRARY_ITEM_FIELDS)
+
+
+# Response fields that are not plain columns of the same name.
+_PROMPT_RELATIONS = {"tags", "current_version"}
+
+
+def prompt_options(fieldset: Optional[Fieldset]) -> tuple[Any, ...]:
+    """Loader options for ``select(Prompt)`` that read only what ``fieldset`` needs.
+
+    ``updated_at`` is always loaded because keyset pages are cut on it.
+    """
+
+    if fieldset is None:
+        return (
+            # The version's body blob is joined in by default (PromptVersion.blob).
+            selectinload(Prompt.current_version),
+            selectinload(Prompt.tag_links),
+        )
+    columns = [getattr(Prompt, name) for name in sorted(fieldset.fields - _PROMPT_RELATIONS)]
+    options: list[Any] = [load_only(Prompt.id, Prompt.updated_at, Prompt.current_version_id, *columns)]
+    # Both relationships are ``lazy="selectin"`` on the model: switch them off unless asked for.
+    options.append(selectinload(Prompt.tag_links) if "tags" in fieldset else noload(Prompt.tag_links))
+    if fieldset.version_fields:
+        # ``content`` is read through the version's blob, not a column of its own.
+        version_columns = [getattr(PromptVersion, name) for name in sorted(fieldset.version_fields - {"content"})]
+        version = selectinload(Prompt.current_version)
+        if "content" in fieldset.version_fields:
+            options.append(version.load_only(PromptVersion.content_hash, *version_columns))
+        else:
+            options.append(version.options(load_only(*version_columns), noload(PromptVersion.blob)))
+    else:
+        options.append(noload(Prompt.current_version))
+    return tuple(options)
+
+
+def prompt_payload(prompt: Prompt, fieldset: Optional[Fieldset]) -> dict[str, Any]:
+    """A prompt in ``PromptResponse`` shape, restricted to ``fieldset``.
+
+    Read straight off the loaded attributes: the rows come from the database, so a
+    Pydantic validation pass would only cost time.
+    """
+
+    version_fields = VERSION_FIELDS if fieldset is None else fieldset.version_fields
+    payload: dict[str, Any] = {}
+    for name in PromptResponse.model_fields:
+        if fieldset is not None and name not in fieldset:
+            continue
+        if name == "tags":
+            payload[name] = [link.tag for link in prompt.tag_links]
+        elif name == "current_version":
+            version = prompt.current_version
+            payload[name] = (
+                None
+                if version is None
+                else {field: getattr(version, field) for field in PromptVersionResponse.model_fields if field in version_fields}
+            )
+        else:
+            payload[name] = getattr(prompt, name)
+    return payload
+
+
+def library_item(item: dict[str, Any], fieldset: Optional[Fieldset]) -> dict[str, Any]:
+    if fieldset is None:
+        return item
+    return {name: value for name, value in item.items() if name in fieldset}
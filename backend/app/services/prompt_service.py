@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
-from typing import Optional
-from uuid import UUID
+from typing import Any, Optional, Union
+from uuid import UUID, uuid4
 
-from sqlalchemy import Select, func, or_, select
+from sqlalchemy import ColumnElement, Select, case, func, insert, literal, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.models.library import LibraryItem
 from app.models.prompt import (
     Prompt,
     PromptItemType,
@@ -16,6 +18,27 @@ from app.models.prompt import (
     PromptVersion,
     PromptVersionStatus,
 )
+from app.schemas.library import BodyMode, SearchMode
+from app.core.config import get_settings
+from app.db import routing
+from app.services import (
+    changefeed,
+    content_store,
+    fulltext,
+    library_events,
+    library_items,
+    pagination,
+    projection,
+    snippets,
+    trigram,
+)
+from app.services.facets import Facets, LibraryFilters, count_facets, facet_counts
+from app.services.library_events import LibraryDocument
+from app.services.projection import Fieldset
+from app.services.result_cache import result_cache
+from app.services.search_index import library_index
+from app.services.suggest_index import Suggestion, suggest_index
+from app.services.vector_index import vector_index
 
 Cursor = str
 
@@ -25,35 +48,61 @@ async def list_prompts(
     *,
     limit: int = 50,
     since: Optional[datetime] = None,
+    after: Optional[pagination.Keyset] = None,
+    fields: Optional[Fieldset] = None,
 ) -> tuple[list[Prompt], Optional[Cursor]]:
-    query: Select[tuple[Prompt]] = select(Prompt).options(
-        selectinload(Prompt.current_version), selectinload(Prompt.tag_links)
-    )
+    """Prompts newest first, one keyset page at a time.
+
+    ``after`` is the decoded ``next_cursor`` of the previous page. ``since`` is the
+    incremental-sync filter: only prompts updated after that instant are listed.
+    ``fields`` restricts the columns and relationships that are loaded.
+    """
+
+    query: Select[tuple[Prompt]] = select(Prompt).options(*projection.prompt_options(fields))
     if since is not None:
         query = query.where(Prompt.updated_at > since)
 
-    query = query.order_by(Prompt.updated_at.desc()).limit(limit + 1)
+    query = pagination.seek(query, Prompt.updated_at, Prompt.id, after=after, limit=limit)
     result = await db.execute(query)
-    prompts = result.scalars().all()
+    return pagination.page(result.scalars().all(), limit, "updated_at")
 
-    next_cursor = None
-    if len(prompts) > limit:
-        last_prompt = prompts[limit]
-        next_cursor = last_prompt.updated_at.isoformat()
-        prompts = prompts[:limit]
 
-    return prompts, next_cursor
+async def list_prompt_page(
+    db: AsyncSession,
+    *,
+    limit: int = 50,
+    since: Optional[datetime] = None,
+    after: Optional[pagination.Keyset] = None,
+    fields: Optional[Fieldset] = None,
+) -> dict[str, Any]:
+    """``list_prompts`` as a ``PromptListResponse`` payload, served from the result cache."""
+
+    async def compute() -> dict[str, Any]:
+        prompts, next_cursor = await list_prompts(db, limit=limit, since=since, after=after, fields=fields)
+        items = [projection.prompt_payload(prompt, fields) for prompt in prompts]
+        return {"items": items, "next_cursor": next_cursor}
+
+    key = ("list", routing.source(db), since.isoformat() if since else None, after, limit, fields)
+    return await result_cache.get_or_compute(key, compute, replica=routing.is_replica(db))
 
 
-async def get_prompt(db: AsyncSession, prompt_id: UUID) -> Optional[Prompt]:
+async def get_prompt(db: AsyncSession, prompt_id: UUID, fields: Optional[Fieldset] = None) -> Optional[Prompt]:
     result = await db.execute(
-        select(Prompt)
-        .options(selectinload(Prompt.current_version), selectinload(Prompt.tag_links))
-        .where(Prompt.id == prompt_id)
+        select(Prompt).options(*projection.prompt_options(fields)).where(Prompt.id == prompt_id)
     )
     return result.scalar_one_or_none()
 
 
+async def get_prompt_stamp(db: AsyncSession, prompt_id: UUID) -> Optional[tuple[UUID, Optional[UUID], datetime]]:
+    """``(id, current_version_id, updated_at)`` of a prompt, without loading it."""
+
+    result = await db.execute(
+        select(Prompt.id, Prompt.current_version_id, Prompt.updated_at).where(Prompt.id == prompt_id)
+    )
+    row = result.one_or_none()
+    return None if row is None else tuple(row)
+
+
 async def create_prompt(
     db: AsyncSession,
     *,
@@ -66,44 +115,186 @@ async def create_prompt(
     notes: Optional[str],
     created_by: Optional[UUID] = None,
 ) -> Prompt:
-    now = datetime.now(timezone.utc)
-    prompt = Prompt(
-        name=name,
-        display_name=display_name,
-        description=description,
-        item_type=item_type,
-        status=PromptStatus.ACTIVE,
-        created_at=now,
-        updated_at=now,
-    )
+    """Insert a prompt with its first (approved) version.
 
-    if tags:
-        # Deduplicate while preserving order
-        seen = set()
-        prompt.tags = [tag for tag in tags if not (tag in seen or seen.add(tag))]
+    Ids and timestamps are generated here, so nothing has to be read back: the rows
+    go out as one ``INSERT`` per table (body, prompt, version, tags, library item) plus the
+    changefeed entry, and the returned ``Prompt`` is attached to ``db`` as if it had been loaded,
+    with its version and tags in place. ``fk_prompts_current_version`` is deferred to
+    commit, which lets the prompt row point at its version before the version exists.
+    """
 
-    version = PromptVersion(
-        prompt=prompt,
+    now = datetime.now(timezone.utc)
+    tags = list(dict.fromkeys(tags or ()))  # deduplicate, keeping order
+    prompt_id, version_id = uuid4(), uuid4()
+    prompt_row = {
+        "id": prompt_id,
+        "name": name,
+        "display_name": display_name,
+        "description": description,
+        "item_type": item_type.value,
+        "collection_id": None,
+        "owner_id": None,
+        "status": PromptStatus.ACTIVE.value,
+        "current_version_id": version_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+    [content_hash] = await content_store.put(db, [content])
+    version_row = version_values(
+        version_id,
+        prompt_id,
         version_number=1,
         status=PromptVersionStatus.APPROVED,
-        content=content,
+        content_hash=content_hash,
         notes=notes,
         created_by=created_by,
-        approved_by=created_by,
-        approved_at=now,
-        created_at=now,
-        updated_at=now,
+        now=now,
     )
+
+    await db.execute(insert(Prompt.__table__).values(prompt_row))
+    await db.execute(insert(PromptVersion.__table__).values(version_row))
+    if tags:
+        await db.execute(insert(PromptTag.__table__), [{"prompt_id": prompt_id, "tag": tag} for tag in tags])
+
+    version = PromptVersion(**version_row)
+    version.content = content
+    prompt = Prompt(**prompt_row)
+    prompt.versions = [version]
     prompt.current_version = version
+    prompt.tag_links = [PromptTag(prompt_id=prompt_id, tag=tag) for tag in tags]
+    document = LibraryDocument.from_prompt(prompt)
+    await library_items.add(db, [library_items.item_row(document, version_id)])
+    await changefeed.record(db, [prompt_id])
+    _attach(db, prompt, version, *prompt.tag_links)
+    library_events.record_change(db, document)
+    return prompt
+
 
-    db.add(prompt)
-    await db.flush()
-    await db.refresh(version)
-    await db.refresh(
-        prompt,
-        attribute_names=["current_version", "tag_links", "created_at", "updated_at"],
+def version_values(
+    version_id: UUID,
+    prompt_id: UUID,
+    *,
+    version_number: int,
+    status: PromptVersionStatus,
+    content_hash: str,
+    notes: Optional[str],
+    created_by: Optional[UUID],
+    now: datetime,
+) -> dict[str, Any]:
+    """A complete ``prompt_versions`` row; approved versions are approved by their author."""
+
+    approved = status == PromptVersionStatus.APPROVED
+    return {
+        "id": version_id,
+        "prompt_id": prompt_id,
+        "version_number": version_number,
+        "status": status.value,
+        "content_hash": content_hash,
+        "input_schema": None,
+        "parameters": None,
+        "notes": notes,
+        "created_by": created_by,
+        "approved_by": created_by if approved else None,
+        "approved_at": now if approved else None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _attach(db: AsyncSession, *instances: Any) -> None:
+    """Put objects whose rows were just inserted into ``db`` as persistent, without a SELECT."""
+
+    for instance in instances:
+        make_transient_to_detached(instance)
+    db.add_all(instances)
+
+
+async def suggest(*, prefix: str, limit: int = 10) -> list[Suggestion]:
+    """Top prompts whose title, name, title words or tags start with ``prefix``."""
+
+    await suggest_index.ensure_loaded()
+    return suggest_index.suggest(prefix, limit)
+
+
+async def search_library_page(
+    db: AsyncSession,
+    *,
+    query: str = "",
+    limit: int = 30,
+    mode: SearchMode = SearchMode.KEYWORD,
+    filters: Optional[LibraryFilters] = None,
+    facets: bool = False,
+    body: BodyMode = BodyMode.FULL,
+    fields: Optional[Fieldset] = None,
+) -> dict[str, Any]:
+    """Library search as a ``LibrarySearchResponse`` payload, optionally with facet counts.
+
+    Keyword searches are answered from the in-memory BM25 index when it is enabled and
+    loaded, without touching the database; otherwise this falls back to SQL. Results are
+    memoised in the result cache until the next committed library write. ``body``
+    selects full content, a highlighted snippet around the best match, or no body;
+    ``fields`` trims items to a sparse fieldset, and SQL searches skip reading version
+    bodies when it has neither ``body`` nor ``highlights``.
+    """
+
+    query = " ".join(query.lower().split())
+    filters = filters or LibraryFilters()
+    if fields is not None and not fields.fields & projection.LIBRARY_BODY_FIELDS:
+        body = BodyMode.NONE
+    return await result_cache.get_or_compute(
+        ("search", routing.source(db), query, limit, mode.value, filters, facets, body.value, fields),
+        lambda: _search_library_page(
+            db, query=query, limit=limit, mode=mode, filters=filters, facets=facets, body=body, fields=fields
+        ),
+        replica=routing.is_replica(db),
     )
-    return prompt
+
+
+async def _search_library_page(
+    db: AsyncSession,
+    *,
+    query: str,
+    limit: int,
+    mode: SearchMode,
+    filters: LibraryFilters,
+    facets: bool,
+    body: BodyMode,
+    fields: Optional[Fieldset],
+) -> dict[str, Any]:
+    if mode is SearchMode.KEYWORD and get_settings().search_index_enabled and library_index.ready:
+        if facets:
+            docs, counts = library_index.search_with_facets(query, limit, filters)
+        else:
+            docs, counts = library_index.search(query, limit, filters), None
+        return _page(_items(docs, query, body, fields), counts)
+
+    documents, matched = await _search(db, query, limit, mode, filters, with_content=body is not BodyMode.NONE)
+    counts = None
+    if facets:
+        counts = await facet_counts(db, matched) if isinstance(matched, Select) else count_facets(matched)
+    return _page(_items(documents, query, body, fields), counts)
+
+
+def _page(items: list[dict[str, Any]], counts: Optional[Facets]) -> dict[str, Any]:
+    # Payloads are rendered as-is (no response_model pass), so leave out what is unset.
+    return {"items": items} if counts is None else {"items": items, "facets": counts}
+
+
+def _items(
+    documents: Sequence[LibraryDocument], query: str, body: BodyMode, fields: Optional[Fieldset] = None
+) -> list[dict[str, Any]]:
+    items = [doc.to_item() for doc in documents]
+    if body is BodyMode.NONE:
+        for item in items:
+            del item["body"]
+    elif body is BodyMode.SNIPPET:
+        tokens = tuple(fulltext.tokenize(query))
+        for item, doc in zip(items, documents):
+            snippet = snippets.extract(doc.content, tokens)
+            item["body"] = snippet.text
+            item["highlights"] = [{"start": s, "end": e} for s, e in snippet.highlights]
+    return [projection.library_item(item, fields) for item in items]
 
 
 async def search_library(
@@ -111,49 +302,219 @@ async def search_library(
     *,
     query: str = "",
     limit: int = 30,
-) -> list[Prompt]:
+    mode: SearchMode = SearchMode.KEYWORD,
+    filters: Optional[LibraryFilters] = None,
+) -> list[LibraryDocument]:
+    """Rank the library for a search.
+
+    Ranking happens entirely in SQL so the best matches are never cut off by a
+    recency window. ``keyword`` uses the weighted ``search_vector`` with ``ts_rank_cd``
+    on Postgres and scored substring matching elsewhere; ``fuzzy`` tolerates typos via
+    trigram similarity; ``semantic`` ranks by embedding similarity and ``hybrid`` fuses
+    keyword and semantic rankings with reciprocal-rank fusion. ``filters`` restrict every
+    mode by item type, status and tags. Every mode reads the ``library_items`` read model.
+    """
+
+    documents, _ = await _search(db, query, limit, mode, filters or LibraryFilters())
+    return documents
+
+
+# The matched set behind a page of results: a SELECT of library item ids when the
+# search is expressed in SQL, otherwise the (already loaded) candidate documents.
+Matched = Union[Select, Sequence[LibraryDocument]]
+
+
+async def _search(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    mode: SearchMode,
+    filters: LibraryFilters,
+    *,
+    with_content: bool = True,
+) -> tuple[list[LibraryDocument], Matched]:
     term = query.strip().lower()
-    current_version = aliased(PromptVersion)
-    stmt: Select[Prompt] = (
-        select(Prompt)
-        .join(current_version, Prompt.current_version_id == current_version.id)
-        .options(selectinload(Prompt.current_version), selectinload(Prompt.tag_links))
-    )
+    if mode is SearchMode.FUZZY and trigram.words(term):
+        if fulltext.dialect_name(db) == "postgresql":
+            return await _fuzzy_search_pg(db, term, limit, filters, with_content=with_content)
+        return await _fuzzy_search_python(db, term, limit, filters)
+    if mode in (SearchMode.SEMANTIC, SearchMode.HYBRID) and term:
+        await vector_index.ensure_loaded()
+        # Filters are applied after the vector scan, so look further down the ranking.
+        k = limit * _FILTER_OVERFETCH if filters else limit
+        semantic_ids = [prompt_id for prompt_id, _ in vector_index.search(term, k)]
+        if mode is SearchMode.SEMANTIC:
+            documents = await _load_ranked(db, semantic_ids, filters=filters, with_content=with_content)
+            return documents[:limit], documents
+        keyword_hits, _ = await _keyword_search(db, term, limit, filters, with_content=with_content)
+        fused = _reciprocal_rank_fusion([[doc.id for doc in keyword_hits], semantic_ids])
+        candidates = fused if filters else fused[:limit]
+        documents = await _load_ranked(
+            db, candidates, known=keyword_hits, filters=filters, with_content=with_content
+        )
+        return documents[:limit], documents
+    return await _keyword_search(db, term, limit, filters, with_content=with_content)
+
+
+# Standard RRF damping constant (Cormack et al.); keeps one list's top hit from dominating.
+_RRF_K = 60
+_FILTER_OVERFETCH = 5
+
+
+def _reciprocal_rank_fusion(rankings: list[list[UUID]]) -> list[UUID]:
+    scores: dict[UUID, float] = {}
+    for ranking in rankings:
+        for rank, prompt_id in enumerate(ranking):
+            scores[prompt_id] = scores.get(prompt_id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+    return sorted(scores, key=lambda prompt_id: scores[prompt_id], reverse=True)
+
+
+async def _load_ranked(
+    db: AsyncSession,
+    prompt_ids: list[UUID],
+    known: Sequence[LibraryDocument] = (),
+    filters: Optional[LibraryFilters] = None,
+    with_content: bool = True,
+) -> list[LibraryDocument]:
+    """Load library items by id, preserving the given ranking order.
+
+    ``known`` documents are taken as-is and must already satisfy ``filters``.
+    """
+
+    by_id = {doc.id: doc for doc in known}
+    missing = [prompt_id for prompt_id in prompt_ids if prompt_id not in by_id]
+    if missing:
+        criteria = filters.criteria(LibraryItem) if filters else []
+        result = await db.execute(
+            library_items.documents_select(with_content=with_content).where(LibraryItem.id.in_(missing), *criteria)
+        )
+        by_id.update((doc.id, doc) for doc in map(LibraryDocument.from_item, result))
+    return [by_id[prompt_id] for prompt_id in prompt_ids if prompt_id in by_id]
+
 
+# Same order as the list endpoint, so browsing walks idx_library_items_updated_at_id.
+_RECENCY = (LibraryItem.updated_at.desc(), LibraryItem.id.desc())
+
+
+def _matched_ids(criteria: list[ColumnElement[bool]]) -> Select:
+    return select(LibraryItem.id).where(*criteria)
+
+
+def _tag_match(condition: ColumnElement[bool]) -> ColumnElement[bool]:
+    """Whether the item has a tag satisfying ``condition`` (correlated ``EXISTS``)."""
+
+    return select(PromptTag.prompt_id).where(PromptTag.prompt_id == LibraryItem.id, condition).exists()
+
+
+def _keyword_criteria(db: AsyncSession, term: str) -> tuple[list[ColumnElement[bool]], list[ColumnElement[Any]]]:
+    """WHERE criteria and relevance ordering for a keyword search."""
+
+    if term and fulltext.dialect_name(db) == "postgresql":
+        tsquery = fulltext.tsquery(term)
+        if tsquery is None:
+            return [], []
+        return (
+            [LibraryItem.search_vector.op("@@")(tsquery)],
+            [func.ts_rank_cd(LibraryItem.search_vector, tsquery).desc()],
+        )
     if term:
         pattern = f"%{term}%"
-        stmt = stmt.where(
-            or_(
-                func.lower(Prompt.display_name).like(pattern),
-                func.lower(Prompt.description).like(pattern),
-                func.lower(current_version.content).like(pattern),
-                Prompt.tag_links.any(func.lower(PromptTag.tag).like(pattern)),
-            )
+        title_hit = func.lower(LibraryItem.title).like(pattern)
+        tag_hit = _tag_match(func.lower(PromptTag.tag).like(pattern))
+        body_hit = func.lower(LibraryItem.content).like(pattern)
+        relevance = (
+            case((title_hit, 3), else_=0)
+            + case((tag_hit, 2), else_=0)
+            + case((body_hit, 1), else_=0)
+        )
+        return (
+            [or_(title_hit, func.lower(LibraryItem.description).like(pattern), body_hit, tag_hit)],
+            [relevance.desc()],
+        )
+    return [], []
+
+
+async def _keyword_search(
+    db: AsyncSession, term: str, limit: int, filters: LibraryFilters, *, with_content: bool = True
+) -> tuple[list[LibraryDocument], Select]:
+    criteria, relevance = _keyword_criteria(db, term)
+    criteria += filters.criteria(LibraryItem)
+
+    stmt = library_items.documents_select(with_content=with_content)
+    result = await db.execute(stmt.where(*criteria).order_by(*relevance, *_RECENCY).limit(limit))
+    return [LibraryDocument.from_item(row) for row in result], _matched_ids(criteria)
+
+
+async def _fuzzy_search_pg(
+    db: AsyncSession, term: str, limit: int, filters: LibraryFilters, *, with_content: bool = True
+) -> tuple[list[LibraryDocument], Select]:
+    # Scope the pg_trgm thresholds to this transaction so the %, <% operators (and
+    # therefore the GIN trigram indexes) filter at the same cut-off we rank with.
+    threshold = str(trigram.DEFAULT_THRESHOLD)
+    await db.execute(
+        select(
+            func.set_config("pg_trgm.similarity_threshold", threshold, True),
+            func.set_config("pg_trgm.word_similarity_threshold", threshold, True),
         )
+    )
+
+    words = trigram.words(term)
+    title_sim = func.greatest(
+        func.word_similarity(term, LibraryItem.title), func.word_similarity(term, LibraryItem.name)
+    )
+    # Tags are single words, so compare them against each query word instead of the phrase.
+    tag_match = or_(*(PromptTag.tag.op("%")(word) for word in words))
+    tag_sim = (
+        select(func.max(func.greatest(*(func.similarity(PromptTag.tag, word) for word in words))))
+        .where(PromptTag.prompt_id == LibraryItem.id, tag_match)
+        .correlate(LibraryItem)
+        .scalar_subquery()
+    )
+    relevance = title_sim * 3 + func.coalesce(tag_sim, 0) * 2
+    tsquery = fulltext.tsquery(term)
+    if tsquery is not None:
+        relevance = relevance + case((LibraryItem.search_vector.op("@@")(tsquery), 1), else_=0)
+
+    criteria = [
+        or_(
+            literal(term).op("<%")(LibraryItem.title),
+            literal(term).op("<%")(LibraryItem.name),
+            _tag_match(tag_match),
+        ),
+        *filters.criteria(LibraryItem),
+    ]
+    stmt = library_items.documents_select(with_content=with_content)
+    result = await db.execute(stmt.where(*criteria).order_by(relevance.desc(), *_RECENCY).limit(limit))
+    return [LibraryDocument.from_item(row) for row in result], _matched_ids(criteria)
 
-    # Fetch a window ordered by recency, then score in Python for simple relevance ranking.
-    stmt = stmt.order_by(Prompt.updated_at.desc()).limit(limit * 3)
-    result = await db.execute(stmt)
-    prompts = result.scalars().unique().all()
 
-    def score(p: Prompt) -> int:
-        if not term:
-            return 0
-        lower = term
-        title_hit = 3 if lower in p.display_name.lower() else 0
-        tag_hit = 2 if any(lower in tag.lower() for tag in p.tags) else 0
-        body_hit = 1 if p.current_version and lower in p.current_version.content.lower() else 0
-        return title_hit + tag_hit + body_hit
+async def _fuzzy_search_python(
+    db: AsyncSession, term: str, limit: int, filters: LibraryFilters
+) -> tuple[list[LibraryDocument], list[LibraryDocument]]:
+    """Fallback for engines without pg_trgm; scores every item in Python."""
 
+    result = await db.execute(library_items.documents_select().where(*filters.criteria(LibraryItem)))
+    words = trigram.words(term)
     min_dt = datetime.min.replace(tzinfo=timezone.utc)
-    ranked = sorted(
-        prompts,
-        key=lambda p: (
-            score(p),
-            p.updated_at or min_dt,
-            p.created_at or min_dt,
-            str(p.id),
+    scored: list[tuple[float, LibraryDocument]] = []
+    for doc in map(LibraryDocument.from_item, result):
+        title_sim = max(
+            trigram.word_similarity(term, doc.display_name),
+            trigram.word_similarity(term, doc.name),
+        )
+        tag_sim = max((trigram.similarity(word, tag) for word in words for tag in doc.tags), default=0.0)
+        if max(title_sim, tag_sim) < trigram.DEFAULT_THRESHOLD:
+            continue
+        body_hit = 1 if term in doc.content.lower() else 0
+        scored.append((title_sim * 3 + tag_sim * 2 + body_hit, doc))
+
+    scored.sort(
+        key=lambda entry: (
+            entry[0],
+            entry[1].updated_at or min_dt,
+            str(entry[1].id),
         ),
         reverse=True,
     )
-    return ranked[:limit]
+    matched = [doc for _, doc in scored]
+    return matched[:limit], matched
@@ -0,0 +1,153 @@
+"""Bounded result cache for hot library reads (search, list pages).
+
+Entries are tagged with the library *generation*, a counter bumped after every committed
+library write (via :mod:`app.services.library_events`). An entry from an older
+generation is never served, so invalidation is exact within a process; the TTL bounds
+staleness for writes made by other processes. Eviction is LRU by entry count.
+
+A write is on the primary before the replicas have it, so results read from a replica
+within ``replica_lag_seconds`` of a bump are returned but not stored: a lagging
+replica's answer would otherwise be cached under the new generation for the full TTL.
+
+Concurrent misses for the same key are coalesced (single flight): the first caller
+computes, everyone else awaits its result. If the first caller is cancelled (its client
+went away), the others retry rather than inherit the cancellation. Cached values are shared between requests
+and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from app.core.config import get_settings
+from app.services import library_events
+
+T = TypeVar("T")
+# Handed to coalesced callers when the computing caller was cancelled.
+_RETRY = object()
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    generation: int
+    expires_at: float
+
+
+class ResultCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: float = 30.0,
+        replica_lag_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.replica_lag_seconds = replica_lag_seconds
+        self.generation = 0
+        self._bumped_at = -math.inf
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[tuple[Hashable, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def bump(self, *_: object) -> None:
+        """Start a new generation; every existing entry becomes unservable."""
+
+        self.generation += 1
+        self._bumped_at = self._clock()
+        self._entries.clear()
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[T]], *, replica: bool = False
+    ) -> T:
+        """``replica``: ``compute`` reads a replica (which must also be part of ``key``)."""
+
+        if not self.enabled:
+            return await compute()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.generation == self.generation and entry.expires_at > self._clock():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            del self._entries[key]
+
+        generation = self.generation
+        flight_key = (key, generation)
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            self.coalesced += 1
+            value = await asyncio.shield(inflight)
+            if value is _RETRY:
+                return await self.get_or_compute(key, compute, replica=replica)
+            return value
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.set_result(_RETRY)
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(flight_key, None)
+
+        future.set_result(value)
+        # A write committed while we were computing: the value may already be stale.
+        lagging = replica and self._clock() - self._bumped_at < self.replica_lag_seconds
+        if generation == self.generation and not lagging:
+            self._store(key, value, generation)
+        return value
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        self._entries[key] = _Entry(value, generation, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "generation": self.generation,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+_settings = get_settings()
+result_cache = ResultCache(
+    max_entries=_settings.result_cache_max_entries,
+    ttl_seconds=_settings.result_cache_ttl_seconds,
+    # Replicas are assumed to catch up within the read-your-writes window.
+    replica_lag_seconds=_settings.read_your_writes_seconds,
+)
+library_events.subscribe(result_cache.bump)
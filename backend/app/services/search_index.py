@@ -0,0 +1,224 @@
+"""In-process BM25 index that serves keyword library search from memory.
+
+The index is optional (``SEARCH_INDEX_ENABLED``). It is loaded once at startup and then
+kept current through :mod:`app.services.library_events`, so every committed write is
+applied incrementally instead of triggering a rebuild. Like ``library_items``, it holds
+every prompt whatever its status; the ``status`` filter applies at query time, so
+results and facets match the SQL path.
+
+Layout: every document gets an integer slot. Each term owns two parallel arrays, slot
+ids (``array('I')``) and field-weighted term frequencies (``array('f')``), which keeps
+postings compact compared to per-document dicts. Removed documents leave a dead slot
+behind; postings are compacted once enough slots are dead.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import fulltext, library_events, library_items
+from app.services.facets import Facets, LibraryFilters, count_facets
+from app.services.library_events import LibraryDocument
+
+# Field boosts roughly mirror the title > tags > description > body weighting in SQL.
+FIELD_BOOSTS = {"title": 3.0, "tags": 2.0, "description": 1.2, "content": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Upper bound on vocabulary terms a trailing prefix expands to.
+MAX_PREFIX_EXPANSIONS = 50
+_COMPACT_MIN_DEAD = 1024
+
+
+def _field_texts(doc: LibraryDocument) -> dict[str, str]:
+    return {
+        "title": f"{doc.display_name} {doc.name}",
+        "tags": " ".join(doc.tags),
+        "description": doc.description or "",
+        "content": doc.content,
+    }
+
+
+def _weighted_terms(doc: LibraryDocument) -> tuple[Counter[str], float]:
+    weights: Counter[str] = Counter()
+    length = 0.0
+    for field, text in _field_texts(doc).items():
+        boost = FIELD_BOOSTS[field]
+        tokens = fulltext.tokenize(text)
+        length += boost * len(tokens)
+        for token in tokens:
+            weights[token] += boost
+    return weights, length
+
+
+def _recency_key(doc: LibraryDocument) -> tuple:
+    return (doc.updated_at, str(doc.id))
+
+
+class _Postings:
+    __slots__ = ("slots", "weights")
+
+    def __init__(self) -> None:
+        self.slots = array("I")
+        self.weights = array("f")
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        self.ready = False
+        self._loading = False
+        self._backlog: list[LibraryDocument] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._docs: list[Optional[LibraryDocument]] = []
+        self._lengths = array("f")
+        self._slot_by_id: dict[UUID, int] = {}
+        self._postings: dict[str, _Postings] = {}
+        self._df: Counter[str] = Counter()
+        self._vocabulary: list[str] = []
+        self._total_length = 0.0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the index from the database; writes committed meanwhile are replayed."""
+
+        self._loading = True
+        try:
+            result = await db.execute(library_items.documents_select())
+            self._rebuild([LibraryDocument.from_item(row) for row in result])
+        finally:
+            self._loading = False
+        backlog, self._backlog = self._backlog, []
+        self.apply(backlog)
+        self.ready = True
+
+    def apply(self, documents: Iterable[LibraryDocument]) -> None:
+        if not (self.ready or self._loading):
+            # Nothing loaded yet; the eventual load() reads these rows from the database.
+            return
+        if self._loading:
+            self._backlog.extend(documents)
+            return
+        for doc in documents:
+            self.upsert(doc)
+
+    def upsert(self, doc: LibraryDocument, *, bulk: bool = False) -> None:
+        """Index ``doc``; with ``bulk`` new terms are appended and the caller sorts once."""
+
+        self.remove(doc.id)
+        weights, length = _weighted_terms(doc)
+        slot = len(self._docs)
+        self._docs.append(doc)
+        self._lengths.append(length)
+        self._slot_by_id[doc.id] = slot
+        self._total_length += length
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                if bulk:
+                    self._vocabulary.append(term)
+                else:
+                    bisect.insort(self._vocabulary, term)
+            postings.slots.append(slot)
+            postings.weights.append(weight)
+            self._df[term] += 1
+
+    def remove(self, prompt_id: UUID) -> None:
+        slot = self._slot_by_id.pop(prompt_id, None)
+        if slot is None:
+            return
+        doc = self._docs[slot]
+        assert doc is not None
+        weights, _ = _weighted_terms(doc)
+        for term in weights:
+            self._df[term] -= 1
+        self._total_length -= self._lengths[slot]
+        self._docs[slot] = None
+        self._lengths[slot] = 0.0
+        self._dead += 1
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead * 4 >= len(self._docs):
+            self._compact()
+
+    def _compact(self) -> None:
+        self._rebuild([doc for doc in self._docs if doc is not None])
+
+    def _rebuild(self, documents: list[LibraryDocument]) -> None:
+        self._reset()
+        for doc in documents:
+            self.upsert(doc, bulk=True)
+        self._vocabulary.sort()
+
+    def _expand(self, token: str) -> list[str]:
+        start = bisect.bisect_left(self._vocabulary, token)
+        terms: list[str] = []
+        for term in self._vocabulary[start : start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            terms.append(term)
+        return terms
+
+    def _scored(self, query: str, filters: Optional[LibraryFilters]) -> dict[int, float]:
+        """BM25 score per matching live slot; every live slot scores 0 for an empty query."""
+
+        live = len(self._slot_by_id)
+        tokens = fulltext.tokenize(query)
+        if not live:
+            return {}
+        if not tokens:
+            scores = dict.fromkeys(self._slot_by_id.values(), 0.0)
+        else:
+            # The last token is usually still being typed: expand it as a prefix.
+            terms = set(tokens[:-1]) | set(self._expand(tokens[-1]))
+            avg_length = self._total_length / live or 1.0
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                df = self._df.get(term, 0)
+                if postings is None or df <= 0:
+                    continue
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                for slot, tf in zip(postings.slots, postings.weights):
+                    if self._docs[slot] is None:
+                        continue
+                    length = self._lengths[slot]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if filters:
+            scores = {slot: score for slot, score in scores.items() if filters.matches(self._docs[slot])}
+        return scores
+
+    def _top(self, scores: dict[int, float], limit: int) -> list[LibraryDocument]:
+        ranked = heapq.nlargest(
+            limit,
+            scores.items(),
+            key=lambda entry: (entry[1], _recency_key(self._docs[entry[0]])),
+        )
+        return [self._docs[slot] for slot, _ in ranked]
+
+    def search(
+        self, query: str, limit: int = 30, filters: Optional[LibraryFilters] = None
+    ) -> list[LibraryDocument]:
+        return self._top(self._scored(query, filters), limit)
+
+    def search_with_facets(
+        self, query: str, limit: int = 30, filters: Optional[LibraryFilters] = None
+    ) -> tuple[list[LibraryDocument], Facets]:
+        scores = self._scored(query, filters)
+        return self._top(scores, limit), count_facets(self._docs[slot] for slot in scores)
+
+
+library_index = SearchIndex()
+library_events.subscribe(library_index.apply)
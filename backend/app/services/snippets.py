@@ -0,0 +1,126 @@
+"""Query-dependent body snippets with highlight offsets for library search results.
+
+A scan of the lowercased body collects every word that starts with a query token;
+a two-pointer sweep over those matches then picks the ``SNIPPET_WIDTH`` window
+covering the most distinct tokens (then the most matches, then the earliest). Offsets
+in :class:`Snippet.highlights` index into :attr:`Snippet.text`, ellipses included.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+SNIPPET_WIDTH = 160
+ELLIPSIS = "…"
+# How far a window edge may move to avoid cutting a word in half.
+_SNAP = 20
+
+
+@dataclass(frozen=True, slots=True)
+class Snippet:
+    text: str
+    highlights: list[tuple[int, int]]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+@lru_cache(maxsize=256)
+def _pattern(tokens: tuple[str, ...]) -> re.Pattern[str]:
+    alternatives = "|".join(re.escape(token) for token in tokens)
+    return re.compile(rf"(?<!\w)(?:{alternatives})\w*", re.IGNORECASE)
+
+
+def _token(word: str, ordered: tuple[str, ...]) -> str:
+    word = word.lower()
+    return next((token for token in ordered if word.startswith(token)), word)
+
+
+def _find_matches(text: str, tokens: tuple[str, ...]) -> list[tuple[int, int, str]]:
+    """``(start, end, token)`` for every word in ``text`` starting with a query token."""
+
+    # Longest first so "python" wins over "py" at the same position.
+    ordered = tuple(sorted(set(tokens), key=len, reverse=True))
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Rare case-mappings change the length; offsets must index the original text.
+        return [
+            (m.start(), m.end(), _token(m.group(), ordered))
+            for m in _pattern(ordered).finditer(text)
+        ]
+
+    # str.find runs in C; scanning once per (short) query token beats a regex alternation.
+    found: dict[int, tuple[int, int, str]] = {}
+    for token in ordered:
+        pos = lowered.find(token)
+        while pos != -1:
+            if pos not in found and (pos == 0 or not _is_word_char(lowered[pos - 1])):
+                end = pos + len(token)
+                while end < len(lowered) and _is_word_char(lowered[end]):
+                    end += 1
+                found[pos] = (pos, end, token)
+            pos = lowered.find(token, pos + 1)
+    return sorted(found.values())
+
+
+def _best_window(matches: list[tuple[int, int, str]], width: int) -> tuple[int, int]:
+    """Index range ``[lo, hi)`` of the matches in the best window."""
+
+    best, best_score = (0, 1), (0, 0, 0)
+    seen: Counter[str] = Counter()
+    left = 0
+    for right, (_, end, token) in enumerate(matches):
+        seen[token] += 1
+        # A single match wider than the window still makes a window of its own.
+        while left < right and end - matches[left][0] > width:
+            seen[matches[left][2]] -= 1
+            if not seen[matches[left][2]]:
+                del seen[matches[left][2]]
+            left += 1
+        score = (len(seen), right - left + 1, -left)
+        if score > best_score:
+            best, best_score = (left, right + 1), score
+    return best
+
+
+def _snap_start(text: str, start: int) -> int:
+    if start <= 0:
+        return 0
+    space = text.find(" ", start, start + _SNAP)
+    return space + 1 if space != -1 else start
+
+
+def _snap_end(text: str, end: int) -> int:
+    if end >= len(text):
+        return len(text)
+    space = text.rfind(" ", end - _SNAP, end)
+    return space if space != -1 else end
+
+
+def extract(text: str, tokens: tuple[str, ...], width: int = SNIPPET_WIDTH) -> Snippet:
+    matches = _find_matches(text, tokens) if tokens else []
+
+    if matches:
+        lo, hi = _best_window(matches, width)
+        first, last = matches[lo][0], matches[hi - 1][1]
+        # Hashes, base64 and long URLs can outgrow the window; cut them at its width.
+        last = min(last, first + width)
+        start = max(0, first - (width - (last - first)) // 2)
+        end = min(len(text), start + width)
+        start = max(0, end - width)
+        start, end = min(_snap_start(text, start), first), max(_snap_end(text, end), last)
+    else:
+        first = -1
+        start, end = 0, _snap_end(text, min(len(text), width))
+
+    prefix = ELLIPSIS if start > 0 else ""
+    suffix = ELLIPSIS if end < len(text) else ""
+    shift = len(prefix) - start
+    highlights = [
+        (s + shift, min(e, end) + shift) for s, e, _ in matches if s >= start and (e <= end or s == first)
+    ]
+    return Snippet(prefix + text[start:end] + suffix, highlights)
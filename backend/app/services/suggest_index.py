@@ -0,0 +1,187 @@
+"""Prefix index behind ``GET /prompts/suggest`` (Spotlight typeahead).
+
+Keys (display name, machine name, every title word, every tag) are kept in one sorted
+list of ``(key, prompt_id)`` pairs, and prompts are also kept in precomputed score
+order. Two ``bisect`` calls size the run of keys matching a prefix. Narrow runs are
+scanned directly; broad ones (one or two typed characters) walk prompts best-first and
+stop after ``limit`` hits, which is quick precisely because matches are dense. The
+choice is made per lookup from the expected cost of each strategy.
+Results for hot prefixes are memoised until the next committed write.
+
+The index loads lazily, on the first lookup, from the primary (a replica may not have
+the latest writes yet); writes committed while it loads are replayed afterwards. Like
+keyword search it holds every prompt whatever its status.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import session as db_session
+from app.models.library import LibraryItem
+from app.services import library_events, trigram
+from app.services.library_events import LibraryDocument
+
+_CACHE_SIZE = 1024
+# Relative per-item cost of the best-first walk vs. scanning a key run (measured).
+_WALK_COST = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    id: UUID
+    title: str
+    score: float
+
+
+def _keys(display_name: str, name: str, tags: tuple[str, ...]) -> set[str]:
+    keys = {display_name.lower(), name.lower(), *(tag.lower() for tag in tags)}
+    keys.update(trigram.words(display_name))
+    keys.discard("")
+    return keys
+
+
+def _score(updated_at: datetime) -> float:
+    # Recency for now; usage-based popularity can be blended in here.
+    return updated_at.timestamp()
+
+
+def _rank_key(suggestion: Suggestion) -> tuple[float, str, UUID]:
+    # Ascending sort order == best first.
+    return (-suggestion.score, str(suggestion.id), suggestion.id)
+
+
+class SuggestIndex:
+    def __init__(self, sessions: Callable[[], async_sessionmaker[AsyncSession]]) -> None:
+        # Looked up per load so the session factory can be swapped (tests).
+        self._sessions = sessions
+        self.ready = False
+        self._loading = False
+        self._backlog: list[LibraryDocument] = []
+        self._lock = asyncio.Lock()
+        self._entries: list[tuple[str, UUID]] = []
+        self._keys_by_id: dict[UUID, set[str]] = {}
+        self._suggestions: dict[UUID, Suggestion] = {}
+        self._rank_keys: dict[UUID, tuple[float, str, UUID]] = {}
+        self._ranked: list[tuple[float, str, UUID]] = []
+        self._cache: OrderedDict[tuple[str, int], list[Suggestion]] = OrderedDict()
+
+    async def ensure_loaded(self) -> None:
+        if self.ready:
+            return
+        async with self._lock:
+            if not self.ready:
+                async with self._sessions()() as db:
+                    await self.load(db)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the index from ``db``; writes committed meanwhile are replayed."""
+
+        self._loading = True
+        try:
+            result = await db.execute(
+                select(LibraryItem.id, LibraryItem.title, LibraryItem.name, LibraryItem.updated_at, LibraryItem.tags)
+            )
+            items = result.all()
+        finally:
+            self._loading = False
+
+        self._entries = []
+        self._keys_by_id = {}
+        self._suggestions = {}
+        self._rank_keys = {}
+        for prompt_id, display_name, name, updated_at, tags in items:
+            keys = _keys(display_name, name, tuple(tags))
+            suggestion = Suggestion(prompt_id, display_name, _score(updated_at))
+            self._keys_by_id[prompt_id] = keys
+            self._suggestions[prompt_id] = suggestion
+            self._rank_keys[prompt_id] = _rank_key(suggestion)
+            self._entries.extend((key, prompt_id) for key in keys)
+        self._ranked = sorted(self._rank_keys.values())
+        self._entries.sort()
+        self._ranked.sort()
+        self._cache.clear()
+        self.ready = True
+        backlog, self._backlog = self._backlog, []
+        self.apply(backlog)
+
+    def apply(self, documents: list[LibraryDocument]) -> None:
+        if self._loading:
+            self._backlog.extend(documents)
+            return
+        if not self.ready:
+            # Nothing loaded yet; the eventual load() reads these rows from the database.
+            return
+        for doc in documents:
+            self._remove(doc.id)
+            self._insert(doc)
+        self._cache.clear()
+
+    def _insert(self, doc: LibraryDocument) -> None:
+        keys = _keys(doc.display_name, doc.name, doc.tags)
+        suggestion = Suggestion(doc.id, doc.display_name, _score(doc.updated_at))
+        self._keys_by_id[doc.id] = keys
+        self._suggestions[doc.id] = suggestion
+        rank_key = self._rank_keys[doc.id] = _rank_key(suggestion)
+        bisect.insort(self._ranked, rank_key)
+        for key in keys:
+            bisect.insort(self._entries, (key, doc.id))
+
+    def _remove(self, prompt_id: UUID) -> None:
+        for key in self._keys_by_id.pop(prompt_id, ()):
+            pos = bisect.bisect_left(self._entries, (key, prompt_id))
+            if pos < len(self._entries) and self._entries[pos] == (key, prompt_id):
+                del self._entries[pos]
+        self._suggestions.pop(prompt_id, None)
+        rank_key = self._rank_keys.pop(prompt_id, None)
+        if rank_key is not None:
+            pos = bisect.bisect_left(self._ranked, rank_key)
+            if pos < len(self._ranked) and self._ranked[pos] == rank_key:
+                del self._ranked[pos]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[Suggestion]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        # (prefix,) sorts before every (prefix..., id) pair; (prefix + max char,) after.
+        lo = bisect.bisect_left(self._entries, (prefix,))
+        hi = bisect.bisect_left(self._entries, (prefix + "\U0010ffff",))
+        run = hi - lo
+        # A best-first walk visits about limit * prompts / run prompts before it is done.
+        if run * run <= _WALK_COST * limit * len(self._ranked):
+            matched = {prompt_id for _, prompt_id in self._entries[lo:hi]}
+            best = heapq.nsmallest(limit, matched, key=self._rank_keys.__getitem__)
+            results = [self._suggestions[prompt_id] for prompt_id in best]
+        else:
+            results = []
+            for _, _, prompt_id in self._ranked:
+                if any(key.startswith(prefix) for key in self._keys_by_id[prompt_id]):
+                    results.append(self._suggestions[prompt_id])
+                    if len(results) == limit:
+                        break
+
+        self._cache[cache_key] = results
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return results
+
+
+suggest_index = SuggestIndex(lambda: db_session.AsyncSessionLocal)
+library_events.subscribe(suggest_index.apply)
@@ -0,0 +1,59 @@
+"""Pure-Python trigram scoring used when pg_trgm is unavailable (SQLite dev/test engine).
+
+Trigrams are extracted the way ``pg_trgm`` does it: text is lower-cased, split into
+alphanumeric words, and each word is padded with two leading spaces and one trailing
+space before slicing. Scores therefore line up closely with ``similarity()`` on Postgres.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Same default as pg_trgm.similarity_threshold / the fuzzy search mode.
+DEFAULT_THRESHOLD = 0.3
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _word_trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(text: str) -> set[str]:
+    grams: set[str] = set()
+    for word in words(text):
+        grams |= _word_trigrams(word)
+    return grams
+
+
+def similarity(left: str, right: str) -> float:
+    """Jaccard similarity of the two trigram sets, like ``pg_trgm.similarity``."""
+
+    a, b = trigrams(left), trigrams(right)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def word_similarity(query: str, text: str) -> float:
+    """How well every word of ``query`` is matched by some word of ``text``.
+
+    Each query word takes its best per-word similarity and the results are averaged, so
+    "pyhton revew" still scores well against "Python Code Review" even though the
+    whole-string similarity is diluted by the extra "code" word.
+    """
+
+    query_grams = [_word_trigrams(word) for word in words(query)]
+    text_grams = [_word_trigrams(word) for word in words(text)]
+    if not query_grams or not text_grams:
+        return 0.0
+
+    total = 0.0
+    for q in query_grams:
+        total += max(len(q & t) / len(q | t) for t in text_grams)
+    return total / len(query_grams)
@@ -0,0 +1,208 @@
+"""Buffered ingestion of usage events.
+
+``POST /usage`` validates events, hands them to :data:`usage_buffer` and answers 202
+without touching the database. A background task writes what is waiting as one
+multi-row ``INSERT`` per batch, in its own transaction:
+
+- A batch goes out as soon as ``batch_size`` events are waiting, and whatever is
+  waiting goes out every ``flush_interval_seconds`` otherwise.
+- The buffer holds at most ``max_events``. A request that does not fit is refused as
+  a whole (load shedding) and the API answers 503 with ``Retry-After``, so clients
+  back off instead of queueing unbounded work in the process.
+- Events naming a prompt or version that does not exist fail the batch's foreign
+  keys; the batch is retried without them. Any other write error drops the batch
+  with a log line: usage is best-effort and must never block the request path.
+- On shutdown the lifespan calls :meth:`UsageBuffer.stop`, which writes everything
+  still waiting before the process exits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import exc, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db import session as db_session
+from app.models.prompt import Prompt, PromptVersion
+from app.models.usage import UsageEvent
+from app.schemas.usage import UsageEventCreate
+
+logger = logging.getLogger(__name__)
+
+
+def rows(events: Iterable[UsageEventCreate], accepted_at: Optional[datetime] = None) -> list[dict[str, Any]]:
+    """``usage_events`` rows for validated events, stamped with the time they were accepted."""
+
+    created_at = accepted_at or datetime.now(timezone.utc)
+    return [
+        {
+            "prompt_id": event.prompt_id,
+            "version_id": event.version_id,
+            "user_id": event.user_id,
+            "client_type": event.client_type.value,
+            "project_key": event.project_key,
+            "context": event.context,
+            "created_at": created_at,
+        }
+        for event in events
+    ]
+
+
+class UsageBuffer:
+    def __init__(
+        self,
+        sessions: Callable[[], async_sessionmaker[AsyncSession]],
+        *,
+        max_events: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+    ) -> None:
+        # The session factory is looked up per batch so it can be swapped (tests).
+        self._sessions = sessions
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: deque[dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.accepted = 0
+        self.shed = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def offer(self, events: Sequence[dict[str, Any]]) -> bool:
+        """Queue ``events`` for writing; ``False`` (nothing queued) when they do not fit."""
+
+        if len(self._pending) + len(events) > self.max_events:
+            self.shed += len(events)
+            return False
+        self._pending.extend(events)
+        self.accepted += len(events)
+        self.start()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        """Start the writer task on the running loop, unless it is already running."""
+
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Write everything still waiting, then stop the writer; gives up after ``timeout``."""
+
+        if self._task is None:
+            await self.flush()
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning("Usage buffer drain timed out; dropping %d events", len(self._pending))
+            self.failed += len(self._pending)
+            self._pending.clear()
+        self._task = None
+
+    async def flush(self) -> None:
+        """Write everything waiting, one batch at a time."""
+
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            await self._write(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self._closing:
+                return
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            try:
+                await self._insert(batch)
+            except exc.IntegrityError:
+                known = await self._known(batch)
+                self.rejected += len(batch) - len(known)
+                batch = known
+                if batch:
+                    await self._insert(batch)
+        except Exception:
+            logger.exception("Dropping a batch of %d usage events", len(batch))
+            self.failed += len(batch)
+            return
+        if batch:
+            self.written += len(batch)
+            self.batches += 1
+
+    async def _insert(self, batch: list[dict[str, Any]]) -> None:
+        async with self._sessions()() as db:
+            # executemany, not one VALUES list: the statement (and its bind parameter count)
+            # stays the same whatever the batch size, so the driver prepares it once and
+            # large batches stay under Postgres' 32,767 parameters per statement.
+            await db.execute(insert(UsageEvent), batch)
+            await db.commit()
+
+    async def _known(self, batch: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """The events of ``batch`` whose prompt and version exist."""
+
+        prompt_ids = {row["prompt_id"] for row in batch}
+        version_ids = {row["version_id"] for row in batch if row["version_id"] is not None}
+        async with self._sessions()() as db:
+            prompts = set((await db.execute(select(Prompt.id).where(Prompt.id.in_(prompt_ids)))).scalars())
+            versions = set()
+            if version_ids:
+                versions = set(
+                    (await db.execute(select(PromptVersion.id).where(PromptVersion.id.in_(version_ids)))).scalars()
+                )
+        return [
+            row
+            for row in batch
+            if row["prompt_id"] in prompts and (row["version_id"] is None or row["version_id"] in versions)
+        ]
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "pending": len(self._pending),
+            "max_events": self.max_events,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "accepted": self.accepted,
+            "shed": self.shed,
+            "written": self.written,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+_settings = get_settings()
+usage_buffer = UsageBuffer(
+    lambda: db_session.AsyncSessionLocal,
+    max_events=_settings.usage_buffer_max_events,
+    batch_size=_settings.usage_flush_batch_size,
+    flush_interval_seconds=_settings.usage_flush_interval_seconds,
+)
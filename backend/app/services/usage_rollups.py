@@ -0,0 +1,366 @@
+"""Hourly and daily usage rollups, and the usage summary built on them.
+
+``usage_events`` grows with every copy and call, so summaries do not aggregate it.
+:func:`compact` folds events into ``usage_rollups_hourly`` and ``usage_rollups_daily``
+(counts per bucket, prompt, user and client type) up to a watermark. :func:`summary`
+then answers a date range with one query (after reading the watermark) that stitches
+together:
+
+- the daily rollup for whole days,
+- the hourly rollup for whole hours around those days,
+- raw events for partial hours at either end and for the tail after the watermark.
+
+Its cost follows the number of days in the range, not the number of events.
+
+Compaction runs out of band (``python -m app.commands compact-usage``, e.g. from cron
+every few minutes). It rolls up whole hours that ended at least
+``usage_rollup_lag_seconds`` ago, long enough for the ingestion buffer to have written
+them, one day per transaction. The watermark advances in the same transaction as the
+counts, under a row lock, so a failed or concurrent run never counts an event twice.
+:func:`apply_retention` then removes raw events older than ``usage_raw_retention_days``
+but never past the watermark: on Postgres by dropping monthly partitions, elsewhere
+with a ``DELETE``.
+
+:func:`ensure_partitions` creates the monthly partitions ahead of time, at app startup
+and on every compaction run. Events for a month without a partition land in
+``usage_events_default``, which retention never drops. The next run therefore gives
+those months their partition as well and moves the rows over, so they age out normally.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, DateTime, Select, delete, func, literal, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.prompt import Prompt
+from app.models.usage import ANONYMOUS_USER, UsageEvent, UsageRollupDaily, UsageRollupHourly, UsageRollupState
+from app.schemas.usage import UsageGroupBy
+from app.services import fulltext
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "usage_events"
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+PARTITION_PREFIX = "usage_events_p"
+DEFAULT_PARTITION = "usage_events_default"
+# pg_advisory_xact_lock key serialising ensure_partitions() across workers and cron.
+_PARTITIONS_LOCK_KEY = 0x75736167
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+# strftime() formats matching how SQLAlchemy stores DATETIME on SQLite.
+_SQLITE_BUCKETS = {"hour": "%Y-%m-%d %H:00:00.000000", "day": "%Y-%m-%d 00:00:00.000000"}
+_ROLLUPS = ((UsageRollupHourly, "hour"), (UsageRollupDaily, "day"))
+_KEY = ("bucket", "prompt_id", "user_id", "client_type")
+
+
+def _utc(value: datetime) -> datetime:
+    """SQLite hands back naive datetimes; everything here is UTC."""
+
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return _utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    floor = floor_hour(value)
+    return floor if floor == _utc(value) else floor + HOUR
+
+
+def floor_day(value: datetime) -> datetime:
+    return floor_hour(value).replace(hour=0)
+
+
+def ceil_day(value: datetime) -> datetime:
+    floor = floor_day(value)
+    return floor if floor == _utc(value) else floor + DAY
+
+
+def _bucket(dialect_name: str, column: ColumnElement, unit: str) -> ColumnElement:
+    if dialect_name == "postgresql":
+        # Truncate in UTC whatever the session's TimeZone is.
+        return func.timezone("UTC", func.date_trunc(unit, func.timezone("UTC", column)), type_=DateTime(timezone=True))
+    return func.strftime(_SQLITE_BUCKETS[unit], column, type_=DateTime(timezone=True))
+
+
+def _user(column: ColumnElement) -> ColumnElement:
+    return func.coalesce(column, literal(ANONYMOUS_USER, UsageEvent.user_id.type))
+
+
+def _roll_up(dialect_name: str, table: Any, unit: str, start: datetime, end: datetime):
+    """Add the events created in ``[start, end)`` to ``table``'s counts."""
+
+    bucket = _bucket(dialect_name, UsageEvent.created_at, unit)
+    user = _user(UsageEvent.user_id)
+    rows = (
+        select(bucket, UsageEvent.prompt_id, user, UsageEvent.client_type, func.count())
+        .where(UsageEvent.created_at >= start, UsageEvent.created_at < end)
+        .group_by(bucket, UsageEvent.prompt_id, user, UsageEvent.client_type)
+    )
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    stmt = dialect.insert(table).from_select([*_KEY, "count"], rows)
+    # A day spans many runs, so daily rows already exist; hourly rows never do.
+    return stmt.on_conflict_do_update(index_elements=list(_KEY), set_={"count": table.count + stmt.excluded.count})
+
+
+async def _state(db: AsyncSession) -> Optional[UsageRollupState]:
+    result = await db.execute(
+        select(UsageRollupState)
+        .where(UsageRollupState.name == STATE_NAME)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def watermark(db: AsyncSession) -> Optional[datetime]:
+    """Events created before this are in the rollups; ``None`` before the first run."""
+
+    value = await db.scalar(select(UsageRollupState.watermark).where(UsageRollupState.name == STATE_NAME))
+    return _utc(value) if value is not None else None
+
+
+async def compact(
+    db: AsyncSession, *, now: Optional[datetime] = None, lag_seconds: Optional[int] = None
+) -> Optional[datetime]:
+    """Roll up every whole hour that ended ``lag_seconds`` before ``now``; returns the watermark.
+
+    Commits once per day rolled up.
+    """
+
+    now = _utc(now or datetime.now(timezone.utc))
+    if lag_seconds is None:
+        lag_seconds = get_settings().usage_rollup_lag_seconds
+    target = floor_hour(now - timedelta(seconds=lag_seconds))
+    dialect_name = fulltext.dialect_name(db)
+
+    state = await _state(db)
+    if state is None:
+        first = await db.scalar(select(func.min(UsageEvent.created_at)))
+        if first is None:
+            await db.rollback()
+            return None
+        state = UsageRollupState(name=STATE_NAME, watermark=floor_hour(first))
+        db.add(state)
+        await db.commit()
+        state = await _state(db)
+
+    while _utc(state.watermark) < target:
+        start = _utc(state.watermark)
+        end = min(floor_day(start) + DAY, target)
+        for table, unit in _ROLLUPS:
+            await db.execute(_roll_up(dialect_name, table, unit, start, end))
+        state.watermark = end
+        await db.commit()
+        state = await _state(db)
+    mark = _utc(state.watermark)
+    await db.commit()
+    return mark
+
+
+def _partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def _is_partitioned(db: AsyncSession) -> bool:
+    if fulltext.dialect_name(db) != "postgresql":
+        return False
+    # Dev databases built with create_all() have a plain table.
+    query = text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'usage_events'::regclass)")
+    return bool(await db.scalar(query))
+
+
+async def _partitions(db: AsyncSession) -> list[str]:
+    result = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'usage_events'::regclass"
+        )
+    )
+    return list(result.scalars())
+
+
+async def _create_partition(db: AsyncSession, name: str, month: datetime, upper: datetime) -> None:
+    # A partition can't be added while the default partition holds rows in its range, so
+    # build it detached, move those rows in and attach it, with inserts into the default
+    # partition held off until the transaction commits.
+    await db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    await db.execute(text(f"CREATE TABLE {name} (LIKE usage_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": month, "upper": upper},
+    )
+    await db.execute(
+        text(
+            f"ALTER TABLE usage_events ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    )
+
+
+def partition_months(
+    now: datetime, ahead: int, stray: Optional[datetime] = None
+) -> list[tuple[datetime, datetime]]:
+    """``(start, end)`` of every month from ``stray``'s (or the current one) to ``ahead`` months out."""
+
+    current = floor_day(now).replace(day=1)
+    month = current if stray is None else min(current, floor_day(stray).replace(day=1))
+    last = current
+    for _ in range(ahead):
+        last = _next_month(last)
+    months = []
+    while month <= last:
+        months.append((month, _next_month(month)))
+        month = _next_month(month)
+    return months
+
+
+async def ensure_partitions(db: AsyncSession, *, now: Optional[datetime] = None, ahead: Optional[int] = None) -> list[str]:
+    """Create missing monthly ``usage_events`` partitions (Postgres); returns their names.
+
+    Covers the current month, ``ahead`` months out, and every earlier month with rows
+    in the default partition, whose rows are moved into the new partition. Rows dated
+    past the last month covered stay in the default partition and are logged.
+    """
+
+    if not await _is_partitioned(db):
+        return []
+    if ahead is None:
+        ahead = get_settings().usage_partitions_ahead
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PARTITIONS_LOCK_KEY})
+    existing = set(await _partitions(db))
+    earliest, latest = (
+        await db.execute(text(f"SELECT min(created_at), max(created_at) FROM {DEFAULT_PARTITION}"))
+    ).one()
+    stray = None if earliest is None else _utc(earliest)
+    months = partition_months(_utc(now or datetime.now(timezone.utc)), ahead, stray)
+    created = []
+    for month, upper in months:
+        name = _partition_name(month)
+        if name not in existing:
+            await _create_partition(db, name, month, upper)
+            created.append(name)
+    if latest is not None and _utc(latest) >= months[-1][1]:
+        logger.warning(
+            "%s holds usage events up to %s, past the last partition; retention never removes them",
+            DEFAULT_PARTITION,
+            latest,
+        )
+    return created
+
+
+async def apply_retention(
+    db: AsyncSession, *, now: Optional[datetime] = None, retention_days: Optional[int] = None
+) -> int:
+    """Remove rolled-up raw events past retention; returns partitions dropped or rows deleted."""
+
+    if retention_days is None:
+        retention_days = get_settings().usage_raw_retention_days
+    mark = await watermark(db)
+    if mark is None:
+        return 0
+    cutoff = min(floor_day(_utc(now or datetime.now(timezone.utc)) - timedelta(days=retention_days)), mark)
+    if not await _is_partitioned(db):
+        result = await db.execute(delete(UsageEvent).where(UsageEvent.created_at < cutoff))
+        return result.rowcount
+    dropped = 0
+    for name in await _partitions(db):
+        match = _PARTITION_RE.match(name)
+        if match is None:
+            continue  # the default partition; ensure_partitions() moves its rows out
+        month = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+        if _next_month(month) <= cutoff:
+            await db.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+    return dropped
+
+
+def _segment(source: Any, start: datetime, end: datetime, group_by: UsageGroupBy, prompt_id: Optional[UUID]) -> Select:
+    if source is UsageEvent:
+        when, amount, user = UsageEvent.created_at, func.count(), _user(UsageEvent.user_id)
+    else:
+        when, amount, user = source.bucket, func.sum(source.count), source.user_id
+    key = {
+        UsageGroupBy.PROMPT: source.prompt_id,
+        UsageGroupBy.USER: user,
+        UsageGroupBy.CLIENT_TYPE: source.client_type,
+        UsageGroupBy.COLLECTION: Prompt.collection_id,
+    }[group_by]
+    stmt = select(key.label("key"), amount.label("count")).where(when >= start, when < end)
+    if group_by == UsageGroupBy.COLLECTION:
+        stmt = stmt.join(Prompt, Prompt.id == source.prompt_id)
+    if prompt_id is not None:
+        stmt = stmt.where(source.prompt_id == prompt_id)
+    return stmt.group_by(key)
+
+
+def segments(start: datetime, end: datetime, mark: Optional[datetime]) -> list[tuple[Any, datetime, datetime]]:
+    """``(source, start, end)`` ranges that together cover ``[start, end)`` exactly once."""
+
+    start, end = _utc(start), _utc(end)
+    if start >= end:
+        return []
+    hours_start = min(ceil_hour(start), end)
+    hours_end = hours_start if mark is None else max(hours_start, min(floor_hour(end), mark))
+    days_start, days_end = ceil_day(hours_start), floor_day(hours_end)
+    if days_start >= days_end:
+        days_start = days_end = hours_end
+    ranges = [
+        (UsageEvent, start, hours_start),
+        (UsageRollupHourly, hours_start, days_start),
+        (UsageRollupDaily, days_start, days_end),
+        (UsageRollupHourly, days_end, hours_end),
+        (UsageEvent, hours_end, end),
+    ]
+    return [(source, lo, hi) for source, lo, hi in ranges if lo < hi]
+
+
+def _key(value: Any) -> Optional[str]:
+    if value is None or value == ANONYMOUS_USER:
+        return None
+    return str(value)
+
+
+async def summary(
+    db: AsyncSession,
+    *,
+    start: datetime,
+    end: datetime,
+    group_by: UsageGroupBy = UsageGroupBy.PROMPT,
+    prompt_id: Optional[UUID] = None,
+) -> dict[str, Any]:
+    """Usage counts in ``[start, end)`` per ``group_by`` key, as a ``UsageSummaryResponse``."""
+
+    parts = [_segment(source, lo, hi, group_by, prompt_id) for source, lo, hi in segments(start, end, await watermark(db))]
+    items: list[dict[str, Any]] = []
+    if parts:
+        combined = union_all(*parts).subquery()
+        total_count = func.sum(combined.c.count).label("count")
+        result = await db.execute(
+            select(combined.c.key, total_count).group_by(combined.c.key).order_by(total_count.desc(), combined.c.key)
+        )
+        items = [{"key": _key(key), "count": int(count)} for key, count in result]
+    return {
+        "from": start,
+        "to": end,
+        "group_by": group_by,
+        "prompt_id": prompt_id,
+        "total": sum(item["count"] for item in items),
+        "items": items,
+    }
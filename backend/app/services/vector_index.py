@@ -0,0 +1,392 @@
+"""NumPy vector index behind the ``semantic`` and ``hybrid`` search modes.
+
+Embeddings of ``display_name + description + content`` live in one contiguous float32
+matrix. With ``VECTOR_INDEX_PATH`` set the matrix is a memory-mapped ``.npy`` file and
+row metadata (prompt id + ``updated_at``) sits next to it, so a restart only re-embeds
+prompts that changed while the process was down. Queries are scored with a single
+matrix product and ``argpartition`` top-k.
+
+Past ``IVF_MIN_ROWS`` rows the index also trains a coarse k-means partitioning (IVF);
+queries then score only the rows of the ``IVF_PROBES`` nearest partitions.
+
+The index holds prompts of every status, like keyword search; status filters apply to
+the ranked ids afterwards. :meth:`VectorIndex.load` reads the library from the primary
+and embeds it (plus any k-means training) in the default executor, so a lazy first load
+does not stall the event loop.
+
+Committed writes reach :meth:`VectorIndex.apply` from the after-commit hook, so it only
+does per-document work there: the metadata file is rewritten at most every
+``META_SAVE_SECONDS``, and k-means (re)training runs in the default executor.
+Several workers may share one ``VECTOR_INDEX_PATH``: the first to take the lock file
+next to it maintains the files, the others read them at startup and then keep
+their copy in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db import session as db_session
+from app.services import embeddings, library_events, library_items
+from app.services.library_events import LibraryDocument
+
+logger = logging.getLogger(__name__)
+
+IVF_MIN_ROWS = 50_000
+IVF_PROBES = 8
+META_SAVE_SECONDS = 5.0
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_LIST = 40
+_INITIAL_CAPACITY = 1024
+_NIL = UUID(int=0)
+
+
+def document_text(doc: LibraryDocument) -> str:
+    return "\n".join(part for part in (doc.display_name, doc.description, doc.content) if part)
+
+
+def _kmeans(data: np.ndarray, nlist: int) -> np.ndarray:
+    """Spherical k-means centroids for the unit rows of ``data``."""
+
+    rng = np.random.default_rng(0)
+    centroids = np.array(data[rng.choice(len(data), size=nlist, replace=False)])
+    for _ in range(_KMEANS_ITERATIONS):
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = data[assignments == cluster]
+            if len(members):
+                centroid = members.mean(axis=0)
+                norm = np.linalg.norm(centroid)
+                centroids[cluster] = centroid / norm if norm > 0 else centroid
+    return centroids.astype(np.float32)
+
+
+def _lock(path: Path):
+    """An exclusive, non-blocking lock on ``path``; ``None`` when another process holds it."""
+
+    if sys.platform == "win32":
+        return open(path, "a")  # single-worker platforms
+    import fcntl
+
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class VectorIndex:
+    def __init__(
+        self, sessions: Callable[[], async_sessionmaker[AsyncSession]], path: Optional[str] = None
+    ) -> None:
+        # Looked up per load so the session factory can be swapped (tests).
+        self._sessions = sessions
+        self.ready = False
+        self._loading = False
+        self._backlog: list[LibraryDocument] = []
+        self._lock = asyncio.Lock()
+        self._path = Path(path) if path else None
+        # Whether this process maintains the files at _path (see _lock()).
+        self._writable = False
+        self._lock_handle = None
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._training: Optional[asyncio.Future] = None
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        # Built in memory; load() moves it into the memory-mapped file when persisted.
+        self._matrix = np.zeros(
+            (max(capacity, _INITIAL_CAPACITY), embeddings.DIMENSIONS), dtype=np.float32
+        )
+        self._ids: list[UUID] = []
+        self._stamps: list[float] = []
+        self._row_by_id: dict[UUID, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_rows = 0
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    # -- storage -----------------------------------------------------------------------
+
+    @property
+    def _meta_path(self) -> Optional[Path]:
+        return self._path.with_suffix(".meta.npz") if self._path else None
+
+    def _tmp_path(self, suffix: str) -> Path:
+        assert self._path is not None
+        return self._path.with_suffix(f".{os.getpid()}.tmp{suffix}")
+
+    def _acquire(self) -> bool:
+        if self._path is not None and self._lock_handle is None:
+            self._lock_handle = _lock(self._path.with_suffix(".lock"))
+        return self._lock_handle is not None
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        shape = (capacity, embeddings.DIMENSIONS)
+        if not self._writable:
+            return np.zeros(shape, dtype=np.float32)
+        tmp = self._tmp_path(".npy")
+        return np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+
+    def _grow(self) -> None:
+        old = self._matrix
+        new = self._allocate(len(old) * 2)
+        new[: len(old)] = old
+        self._matrix = self._commit_storage(new)
+
+    def _commit_storage(self, matrix: np.ndarray) -> np.ndarray:
+        """Move a freshly allocated memmap into place (no-op for in-memory storage)."""
+
+        if not self._writable:
+            return matrix
+        matrix.flush()
+        del matrix
+        os.replace(self._tmp_path(".npy"), self._path)
+        return np.load(self._path, mmap_mode="r+")
+
+    def _save_meta(self) -> None:
+        self._save_handle = None
+        if not self._writable:
+            return
+        self._matrix.flush()
+        ids = np.array([row_id.bytes for row_id in self._ids], dtype="S16")
+        tmp = self._tmp_path(".npz")
+        np.savez(tmp, ids=ids, stamps=np.array(self._stamps, dtype=np.float64))
+        os.replace(tmp, self._meta_path)
+
+    def _schedule_save(self) -> None:
+        """Save the metadata soon, once for any number of writes in between."""
+
+        if not self._writable or self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_meta()
+            return
+        self._save_handle = loop.call_later(META_SAVE_SECONDS, self._save_meta)
+
+    def flush(self) -> None:
+        """Write pending metadata now (on shutdown)."""
+
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_meta()
+
+    def _read_persisted(self) -> dict[UUID, tuple[float, np.ndarray]]:
+        if self._path is None or not self._path.exists() or not self._meta_path.exists():
+            return {}
+        try:
+            matrix = np.load(self._path, mmap_mode="r")
+            meta = np.load(self._meta_path)
+        except (OSError, ValueError):
+            logger.warning("ignoring unreadable vector index at %s", self._path)
+            return {}
+        if matrix.shape[1] != embeddings.DIMENSIONS:
+            return {}
+        persisted = {}
+        for row, (raw_id, stamp) in enumerate(zip(meta["ids"], meta["stamps"])):
+            row_id = UUID(bytes=bytes(raw_id).ljust(16, b"\0"))
+            if row_id != _NIL:
+                persisted[row_id] = (float(stamp), np.array(matrix[row]))
+        return persisted
+
+    # -- loading and incremental updates ---------------------------------------------
+
+    async def ensure_loaded(self) -> None:
+        if self.ready:
+            return
+        async with self._lock:
+            if not self.ready:
+                async with self._sessions()() as db:
+                    await self.load(db)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build from ``db`` off the event loop; writes committed meanwhile are replayed."""
+
+        self._loading = True
+        try:
+            result = await db.execute(library_items.documents_select())
+            documents = [LibraryDocument.from_item(row) for row in result]
+            stale = await asyncio.get_running_loop().run_in_executor(None, self._build, documents)
+        finally:
+            self._loading = False
+        self._built(stale)
+
+    def build(self, documents: list[LibraryDocument]) -> None:
+        """(Re)build from a full snapshot, reusing persisted vectors that are still current."""
+
+        self._built(self._build(documents))
+
+    def _build(self, documents: list[LibraryDocument]) -> int:
+
+        persisted = self._read_persisted()
+        self._reset(len(documents))
+        stale = []
+        for doc in documents:
+            saved = persisted.get(doc.id)
+            if saved is not None and saved[0] == doc.updated_at.timestamp():
+                self._store(doc, saved[1])
+            else:
+                stale.append(doc)
+        if stale:
+            matrix = embeddings.embed([document_text(doc) for doc in stale])
+            for doc, vector in zip(stale, matrix):
+                self._store(doc, vector)
+        self._writable = self._acquire()
+        if self._writable:
+            mapped = self._allocate(len(self._matrix))
+            mapped[:] = self._matrix
+            self._matrix = self._commit_storage(mapped)
+        self._train_if_due()
+        self._save_meta()
+        return len(stale)
+
+    def _built(self, stale: int) -> None:
+        self.ready = True
+        backlog, self._backlog = self._backlog, []
+        self.apply(backlog)
+        logger.info("vector index built: %d rows, %d re-embedded", len(self), stale)
+
+    def apply(self, documents: list[LibraryDocument]) -> None:
+        if self._loading:
+            self._backlog.extend(documents)
+            return
+        if not self.ready or not documents:
+            return
+        matrix = embeddings.embed([document_text(doc) for doc in documents])
+        for doc, vector in zip(documents, matrix):
+            self._store(doc, vector)
+        self._schedule_training()
+        self._schedule_save()
+
+    def _store(self, doc: LibraryDocument, vector: np.ndarray) -> None:
+        row = self._row_by_id.get(doc.id)
+        if row is None:
+            row = len(self._ids)
+            self._ids.append(_NIL)
+            self._stamps.append(0.0)
+            if row >= len(self._matrix):
+                self._grow()
+            self._row_by_id[doc.id] = row
+        self._matrix[row] = vector
+        self._ids[row] = doc.id
+        self._stamps[row] = doc.updated_at.timestamp()
+        if self._centroids is not None:
+            self._assign_rows(np.array([row]))
+
+    # -- IVF partitioning ---------------------------------------------------------------
+
+    def _training_due(self) -> bool:
+        rows = len(self._ids)
+        return rows >= IVF_MIN_ROWS and not (self._trained_rows and rows < self._trained_rows * 2)
+
+    def _training_sample(self) -> tuple[np.ndarray, int]:
+        rows = len(self._ids)
+        nlist = max(1, int(math.sqrt(rows)))
+        rng = np.random.default_rng(0)
+        # Train on a sample (a copy); assigning every row to its nearest centroid comes after.
+        sample = rng.choice(rows, size=min(rows, _KMEANS_SAMPLE_PER_LIST * nlist), replace=False)
+        return self._matrix[np.sort(sample)], nlist
+
+    def _install(self, centroids: np.ndarray) -> None:
+        rows = len(self._ids)
+        self._centroids = centroids
+        self._assignments = np.zeros(len(self._matrix), dtype=np.int32)
+        self._assign_rows(np.arange(rows))
+        self._trained_rows = rows
+
+    def _train_if_due(self) -> None:
+        if self._training_due():
+            self._install(_kmeans(*self._training_sample()))
+
+    def _schedule_training(self) -> None:
+        """Retrain in the executor when due; rows stored meanwhile are assigned on install."""
+
+        if self._training is not None or not self._training_due():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._train_if_due()
+            return
+        data, nlist = self._training_sample()
+        self._training = loop.run_in_executor(None, _kmeans, data, nlist)
+        self._training.add_done_callback(self._trained)
+
+    def _trained(self, future: asyncio.Future) -> None:
+        self._training = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error("vector index training failed", exc_info=future.exception())
+            return
+        self._install(future.result())
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        assert self._centroids is not None
+        if len(self._assignments) < len(self._matrix):
+            grown = np.zeros(len(self._matrix), dtype=np.int32)
+            grown[: len(self._assignments)] = self._assignments
+            self._assignments = grown
+        self._assignments[rows] = np.argmax(self._matrix[rows] @ self._centroids.T, axis=1)
+
+    # -- queries ------------------------------------------------------------------------
+
+    def top_k(self, queries: np.ndarray, k: int) -> list[list[tuple[UUID, float]]]:
+        """Cosine top-k for a batch of unit query vectors."""
+
+        rows = len(self._ids)
+        if rows == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        results = []
+        for query in queries:
+            if self._centroids is not None:
+                probes = np.argsort(self._centroids @ query)[-IVF_PROBES:]
+                candidates = np.flatnonzero(np.isin(self._assignments[:rows], probes))
+                scores = self._matrix[candidates] @ query
+            else:
+                # Score the contiguous block directly; fancy indexing would copy the matrix.
+                candidates = np.arange(rows)
+                scores = self._matrix[:rows] @ query
+            if len(candidates) == 0:
+                results.append([])
+                continue
+            count = min(k, len(candidates))
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.argsort(-scores[best])]
+            results.append(
+                [
+                    (self._ids[candidates[i]], float(scores[i]))
+                    for i in best
+                    if self._ids[candidates[i]] != _NIL
+                ]
+            )
+        return results
+
+    def search(self, query: str, k: int = 30, min_score: float = 0.1) -> list[tuple[UUID, float]]:
+        if not query.strip():
+            return []
+        [hits] = self.top_k(embeddings.embed([query]), k)
+        return [(prompt_id, score) for prompt_id, score in hits if score >= min_score]
+
+
+vector_index = VectorIndex(lambda: db_session.AsyncSessionLocal, get_settings().vector_index_path)
+library_events.subscribe(vector_index.apply)
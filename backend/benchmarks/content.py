@@ -0,0 +1,175 @@
+"""Version body storage benchmark: ``content_blobs`` against plain text columns.
+
+Loads the synthetic corpus, copies every version body into a scratch table laid out
+as ``prompt_versions.content`` used to be (one uncompressed ``TEXT`` per version), and
+compares the two:
+
+- size: bytes of body text against bytes stored after deduplication and compression,
+  plus on-disk table sizes on Postgres;
+- read latency: p50/p95 of fetching one version's body by id, and of a page of
+  ``--page`` bodies, including decompression for the blob store.
+
+    python -m benchmarks.content --size 10k
+    python -m benchmarks.content --database-url postgresql+asyncpg://... --size 100k
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections.abc import Iterable
+from typing import Any, Optional
+
+PLAIN_TABLE = "bench_plain_versions"
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--size", default="10k", help="corpus size: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="skip loading; the corpus is already there")
+    parser.add_argument("--reads", type=int, default=500, help="measured reads per layout")
+    parser.add_argument("--page", type=int, default=50, help="bodies per page read")
+    return parser.parse_args(argv)
+
+
+def storage(texts: Iterable[str]) -> dict[str, Any]:
+    """What storing ``texts`` (one per version) costs as plain text and as blobs."""
+
+    from app.models.content import ZLIB, blob_row
+
+    versions = 0
+    plain_bytes = 0
+    blobs: dict[str, dict[str, Any]] = {}
+    for text in texts:
+        versions += 1
+        row = blob_row(text)
+        plain_bytes += row["size"]
+        blobs.setdefault(row["hash"], row)
+    stored_bytes = sum(len(blob["data"]) for blob in blobs.values())
+    return {
+        "versions": versions,
+        "distinct_bodies": len(blobs),
+        "compressed_bodies": sum(blob["encoding"] == ZLIB for blob in blobs.values()),
+        "plain_mb": round(plain_bytes / 2**20, 2),
+        "stored_mb": round(stored_bytes / 2**20, 2),
+        "stored_ratio": round(stored_bytes / plain_bytes, 3) if plain_bytes else None,
+    }
+
+
+def _timings(samples: list[float]) -> dict[str, float]:
+    from benchmarks.run import percentile
+
+    return {"p50_ms": round(percentile(samples, 50), 3), "p95_ms": round(percentile(samples, 95), 3)}
+
+
+async def _time_reads(db, reads: list[list[Any]], fetch) -> list[float]:
+    samples = []
+    for ids in reads:
+        started = time.perf_counter()
+        bodies = await fetch(db, ids)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert len(bodies) == len(ids)
+    return samples
+
+
+async def run(args: argparse.Namespace, database_url: str) -> dict[str, Any]:
+    from sqlalchemy import Column, MetaData, Table, Text, func, select, text
+    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.models.content import ContentBlob, decode
+    from app.models.prompt import PromptVersion
+    from benchmarks import corpus
+    from benchmarks.run import prepare
+
+    size = corpus.SIZES.get(args.size.lower()) or int(args.size)
+    engine = create_async_engine(database_url)
+    await prepare(engine, args, size)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    plain = Table(
+        PLAIN_TABLE,
+        MetaData(),
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("content", Text, nullable=False),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(plain.drop, checkfirst=True)
+        await conn.run_sync(plain.create)
+
+    texts: list[str] = []
+    version_ids: list[Any] = []
+    async with session_factory() as db:
+        result = await db.stream(
+            select(PromptVersion.id, ContentBlob.encoding, ContentBlob.data)
+            .join(PromptVersion.blob)
+            .execution_options(yield_per=2_000)
+        )
+        async for rows in result.partitions():
+            batch = [{"id": row.id, "content": decode(row.encoding, row.data)} for row in rows]
+            await db.execute(plain.insert(), batch)
+            version_ids.extend(row["id"] for row in batch)
+            texts.extend(row["content"] for row in batch)
+        await db.commit()
+    report: dict[str, Any] = {"database": engine.dialect.name, "size": size, **storage(texts)}
+    del texts
+
+    async with session_factory() as db:
+        if engine.dialect.name == "postgresql":
+            await db.execute(text(f"ANALYZE {PLAIN_TABLE}"))
+            for name, table in (("plain_table_mb", PLAIN_TABLE), ("blob_table_mb", "content_blobs")):
+                relation_size = await db.scalar(select(func.pg_total_relation_size(table)))
+                report[name] = round(relation_size / 2**20, 2)
+
+    async def fetch_plain(db, ids):
+        return list((await db.execute(select(plain.c.content).where(plain.c.id.in_(ids)))).scalars())
+
+    async def fetch_blobs(db, ids):
+        rows = await db.execute(
+            select(ContentBlob.encoding, ContentBlob.data).join(PromptVersion.blob).where(PromptVersion.id.in_(ids))
+        )
+        return [decode(encoding, data) for encoding, data in rows]
+
+    rng = random.Random(args.seed)
+    shapes = {"one": [[rng.choice(version_ids)] for _ in range(args.reads)]}
+    shapes["page"] = [rng.sample(version_ids, min(args.page, len(version_ids))) for _ in range(args.reads)]
+    async with session_factory() as db:
+        for shape, reads in shapes.items():
+            for layout, fetch in (("plain", fetch_plain), ("blobs", fetch_blobs)):
+                await _time_reads(db, reads[:20], fetch)  # warm up caches and prepared statements
+                report[f"{shape}_{layout}"] = _timings(await _time_reads(db, reads, fetch))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(plain.drop)
+    await engine.dispose()
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    # app.* reads settings at import time; point them at the benchmark database.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("APP_ENV", "bench")
+    try:
+        report = asyncio.run(run(args, database_url))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    for key, value in report.items():
+        print(f"{key:<20}{value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
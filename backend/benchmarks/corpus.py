@@ -0,0 +1,189 @@
+"""Deterministic synthetic prompt library for search benchmarks.
+
+The same ``(size, seed)`` always yields byte-identical prompts, so runs on different
+machines (and before/after a change) search the same data. Tags follow a Zipf-like
+distribution, roughly a third of the content is Chinese, and every prompt has one to
+four versions of which the last approved one is current.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.models.content import digest
+from app.models.prompt import Prompt, PromptTag, PromptVersion
+from app.services import content_store, library_items
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Ordered by popularity: earlier entries are drawn far more often (Zipf, s=1).
+TAGS = [
+    "python", "review", "sql", "writing", "support", "onboarding", "debugging", "testing",
+    "security", "email", "summary", "translation", "data", "api", "frontend", "devops",
+    "incident", "legal", "marketing", "hr", "finance", "design", "research", "docs",
+    "golang", "rust", "kubernetes", "terraform", "analytics", "sales", "中文", "翻译",
+]
+TOPICS = [
+    "code review", "pull request", "unit tests", "sql query", "incident report",
+    "release notes", "customer reply", "meeting summary", "api design", "bug triage",
+    "data pipeline", "security audit", "onboarding guide", "refactoring plan",
+    "performance tuning", "error handling", "translation", "product spec",
+]
+TOPICS_ZH = [
+    "代码审查", "单元测试", "数据库查询", "事故报告", "发布说明", "客户回复",
+    "会议纪要", "接口设计", "缺陷分类", "性能优化", "错误处理", "产品需求",
+]
+VERBS = ["Write", "Review", "Summarize", "Draft", "Explain", "Improve", "Translate", "Check"]
+ADJECTIVES = ["Quick", "Detailed", "Friendly", "Strict", "Concise", "Senior", "Bilingual"]
+SENTENCES = [
+    "You are an experienced engineer helping a teammate with {topic}.",
+    "Focus on correctness first, then readability and naming.",
+    "List the three most important issues and explain why each one matters.",
+    "Keep the answer under two hundred words and use bullet points.",
+    "If something is ambiguous, ask one clarifying question before answering.",
+    "Point out risky changes to {topic} and suggest a safer alternative.",
+    "Use the team's style guide and prefer small, reviewable steps.",
+    "Return the result as markdown with a short summary at the top.",
+]
+SENTENCES_ZH = [
+    "你是一名资深工程师，请帮助同事完成{topic}。",
+    "先关注正确性，再关注可读性和命名。",
+    "列出最重要的三个问题，并说明原因。",
+    "回答控制在两百字以内，使用要点列表。",
+    "如果需求不明确，请先提出一个澄清问题。",
+]
+
+
+@dataclass(frozen=True, slots=True)
+class CorpusPrompt:
+    id: uuid.UUID
+    name: str
+    display_name: str
+    description: str
+    item_type: str
+    status: str
+    tags: tuple[str, ...]
+    versions: tuple[str, ...] = field(repr=False)
+    created_at: datetime
+    updated_at: datetime
+
+
+def _zipf_weights(count: int) -> list[float]:
+    return [1.0 / rank for rank in range(1, count + 1)]
+
+
+_TAG_WEIGHTS = _zipf_weights(len(TAGS))
+_TOPIC_WEIGHTS = _zipf_weights(len(TOPICS))
+
+
+def _content(rng: random.Random, topic: str, chinese: bool) -> str:
+    if chinese:
+        zh_topic = rng.choice(TOPICS_ZH)
+        sentences = [s.format(topic=zh_topic) for s in rng.sample(SENTENCES_ZH, k=3)]
+        # Mixed-language prompts are common; keep an English line in most of them.
+        if rng.random() < 0.7:
+            sentences.append(SENTENCES[0].format(topic=topic))
+    else:
+        sentences = [s.format(topic=topic) for s in rng.sample(SENTENCES, k=rng.randint(3, 6))]
+    # Multi-KB bodies are typical for real prompts: repeat the instructions as sections.
+    sections = rng.randint(1, 8)
+    return "\n\n".join(" ".join(rng.sample(sentences, k=len(sentences))) for _ in range(sections))
+
+
+def generate(size: int, seed: int = 42) -> Iterator[CorpusPrompt]:
+    rng = random.Random(seed)
+    for index in range(size):
+        topic = rng.choices(TOPICS, weights=_TOPIC_WEIGHTS)[0]
+        chinese = rng.random() < 0.3
+        verb, adjective = rng.choice(VERBS), rng.choice(ADJECTIVES)
+        display_name = f"{adjective} {topic.title()} {verb}"
+        if chinese:
+            display_name += f" · {rng.choice(TOPICS_ZH)}"
+        tags = tuple(dict.fromkeys(rng.choices(TAGS, weights=_TAG_WEIGHTS, k=rng.randint(1, 4))))
+        created_at = EPOCH + timedelta(minutes=index * 7 + rng.randint(0, 6))
+        versions = tuple(_content(rng, topic, chinese) for _ in range(rng.randint(1, 4)))
+        yield CorpusPrompt(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            name=f"{verb}-{topic}-{index}".lower().replace(" ", "-"),
+            display_name=display_name,
+            description=f"{verb} {topic} ({adjective.lower()})",
+            item_type=rng.choices(["prompt", "snippet", "faq"], weights=[8, 3, 1])[0],
+            status="archived" if rng.random() < 0.05 else "active",
+            tags=tags,
+            versions=versions,
+            created_at=created_at,
+            updated_at=created_at + timedelta(hours=rng.randint(0, 24 * 90)),
+        )
+
+
+def _rows(batch: list[CorpusPrompt]) -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+    prompts, versions, tags, current = [], [], [], []
+    for prompt in batch:
+        prompts.append(
+            {
+                "id": prompt.id,
+                "name": prompt.name,
+                "display_name": prompt.display_name,
+                "description": prompt.description,
+                "item_type": prompt.item_type,
+                "status": prompt.status,
+                "created_at": prompt.created_at,
+                "updated_at": prompt.updated_at,
+            }
+        )
+        version_id = None
+        for number, content in enumerate(prompt.versions, start=1):
+            version_id = uuid.uuid5(prompt.id, str(number))
+            versions.append(
+                {
+                    "id": version_id,
+                    "prompt_id": prompt.id,
+                    "version_number": number,
+                    "status": "approved",
+                    "content_hash": digest(content),
+                    "created_at": prompt.created_at,
+                    "updated_at": prompt.updated_at,
+                }
+            )
+        tags.extend({"prompt_id": prompt.id, "tag": tag} for tag in prompt.tags)
+        current.append({"prompt_id": prompt.id, "version_id": version_id})
+    return prompts, versions, tags, current
+
+
+async def load(engine: AsyncEngine, size: int, seed: int = 42, batch_size: int = 2_000) -> None:
+    """Bulk-insert the corpus into an empty schema (Core inserts, one commit per batch)."""
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    set_current = (
+        update(Prompt.__table__)
+        .where(Prompt.__table__.c.id == bindparam("prompt_id"))
+        .values(current_version_id=bindparam("version_id"))
+    )
+    batch: list[CorpusPrompt] = []
+    for prompt in generate(size, seed):
+        batch.append(prompt)
+        if len(batch) == batch_size:
+            await _insert(session_factory, batch, set_current)
+            batch = []
+    if batch:
+        await _insert(session_factory, batch, set_current)
+
+
+async def _insert(session_factory, batch: list[CorpusPrompt], set_current) -> None:
+    prompts, versions, tags, current = _rows(batch)
+    async with session_factory() as db:
+        await content_store.put(db, [content for prompt in batch for content in prompt.versions])
+        await db.execute(Prompt.__table__.insert(), prompts)
+        await db.execute(PromptVersion.__table__.insert(), versions)
+        await db.execute(PromptTag.__table__.insert(), tags)
+        await db.execute(set_current, current)
+        await library_items.refresh(db, [row["id"] for row in prompts])
+        await db.commit()
@@ -0,0 +1,107 @@
+"""NDJSON export benchmark: throughput and memory of ``library_export.ndjson_lines``.
+
+Streams the whole synthetic corpus to nowhere and samples the process RSS after every
+batch. With a server-side cursor the RSS growth should stay flat as ``--size`` grows.
+
+    python -m benchmarks.export --size 100k
+    python -m benchmarks.export --database-url postgresql+asyncpg://... --size 1m --gzip
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--size", default="10k", help="corpus size: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="skip loading; the corpus is already there")
+    parser.add_argument("--gzip", action="store_true", help="compress the stream as the endpoint would")
+    return parser.parse_args(argv)
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+async def run(args: argparse.Namespace, database_url: str) -> dict[str, Any]:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.services import library_export
+    from benchmarks import corpus
+    from benchmarks.run import prepare
+
+    size = corpus.SIZES.get(args.size.lower()) or int(args.size)
+    engine = create_async_engine(database_url)
+    await prepare(engine, args, size)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    lines = 0
+    sent = 0
+    start_rss = peak_rss = rss_mb()
+    started = time.perf_counter()
+    async with session_factory() as db:
+        chunks = library_export.ndjson_lines(db)
+        if args.gzip:
+            stream = library_export.gzip_chunks(chunks)
+            async for data in stream:
+                sent += len(data)
+                peak_rss = max(peak_rss, rss_mb())
+        else:
+            async for chunk in chunks:
+                lines += chunk.count("\n")
+                sent += len(chunk.encode())
+                peak_rss = max(peak_rss, rss_mb())
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return {
+        "database": engine.dialect.name,
+        "size": size,
+        "gzip": args.gzip,
+        "lines": lines if not args.gzip else size,
+        "seconds": round(elapsed, 2),
+        "prompts_per_second": round(size / elapsed),
+        "mb_sent": round(sent / 2**20, 1),
+        "rss_start_mb": round(start_rss, 1),
+        "rss_growth_mb": round(peak_rss - start_rss, 1),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    # app.* reads settings at import time; point them at the benchmark database.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("APP_ENV", "bench")
+    try:
+        report = asyncio.run(run(args, database_url))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    for key, value in report.items():
+        print(f"{key:<20}{value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,314 @@
+"""Query-plan regression check for the hot service queries.
+
+Seeds the synthetic corpus into SQLite (a temporary file by default) or Postgres, runs
+each scenario below through the real service function while capturing the SQL it
+sends, and ``EXPLAIN``\\ s every captured ``SELECT``. A scenario fails when a plan
+reads a large table sequentially or sorts where an index should supply the order:
+
+- Postgres: ``Seq Scan`` on a large table, or a ``Sort`` / ``Incremental Sort`` node.
+- SQLite: ``SCAN <large table>`` (except walking an ordering index newest first,
+  which ``LIMIT`` cuts short), or ``USE TEMP B-TREE``.
+
+Scenarios that rank, aggregate or filter down to a matched set (search relevance, tag
+filters, facet counts, changefeed batches) are allowed to sort that set. SQLite
+keyword search matches with ``LIKE '%term%'``, which no index serves, so it may scan
+``library_items`` there; on Postgres the same search must go through the GIN indexes.
+
+    python -m benchmarks.plans
+    python -m benchmarks.plans --database-url postgresql+asyncpg://.../scratch --size 10k
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+LARGE_TABLES = frozenset(
+    {"prompts", "prompt_versions", "prompt_tags", "library_changes", "library_items", "content_blobs"}
+)
+# Indexes a LIMIT query may walk in order (SQLite reports these walks as SCAN).
+ORDERED_INDEXES = frozenset({"idx_prompts_updated_at_id", "idx_library_items_updated_at_id"})
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    """Real keys from the seeded database for scenarios to look up."""
+
+    prompt_id: Any
+    name: str
+    updated_at: Any
+    tag: str
+    word: str
+    last_seq: int
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    name: str
+    run: Callable[[Any, Sample], Awaitable[Any]]
+    allow_sort: bool = False
+    sqlite_scans: frozenset[str] = frozenset()
+    dialects: tuple[str, ...] = ("postgresql", "sqlite")
+
+
+@dataclass(slots=True)
+class Finding:
+    scenario: str
+    statement: str
+    problems: list[str]
+    plan: list[str] = field(default_factory=list)
+
+
+def _scenarios() -> list[Scenario]:
+    from app.schemas import SearchMode
+    from app.services import batch_get, changefeed, projection, prompt_service
+    from app.services.facets import LibraryFilters
+
+    def search(**kwargs: Any):
+        return lambda db, sample: prompt_service.search_library_page(db, limit=30, **kwargs)
+
+    def tagged(**kwargs: Any):
+        return lambda db, sample: prompt_service.search_library_page(
+            db, limit=30, filters=LibraryFilters.build(tags=[sample.tag]), **kwargs
+        )
+
+    return [
+        Scenario("list_prompts", lambda db, sample: prompt_service.list_prompts(db, limit=50)),
+        Scenario(
+            "list_prompts_next_page",
+            lambda db, sample: prompt_service.list_prompts(db, limit=50, after=(sample.updated_at, sample.prompt_id)),
+        ),
+        Scenario(
+            "list_prompts_since",
+            lambda db, sample: prompt_service.list_prompts(db, limit=50, since=sample.updated_at),
+        ),
+        Scenario(
+            "list_prompts_sparse",
+            lambda db, sample: prompt_service.list_prompts(
+                db, limit=50, fields=projection.parse_prompt_fields("display_name,tags")
+            ),
+        ),
+        Scenario("get_prompt", lambda db, sample: prompt_service.get_prompt(db, sample.prompt_id)),
+        Scenario("search_library_browse", search(query="")),
+        # Driven from idx_prompt_tags_tag; the tag's prompts are then sorted by recency.
+        Scenario("search_library_tag", tagged(query=""), allow_sort=True),
+        Scenario("search_library_facets", tagged(query="", facets=True), allow_sort=True),
+        Scenario(
+            "search_library_keyword",
+            lambda db, sample: prompt_service.search_library_page(db, query=sample.word, limit=30),
+            allow_sort=True,
+            sqlite_scans=frozenset({"library_items"}),
+        ),
+        Scenario(
+            "search_library_fuzzy",
+            lambda db, sample: prompt_service.search_library_page(
+                db, query=sample.word[:-1], limit=30, mode=SearchMode.FUZZY
+            ),
+            allow_sort=True,
+            dialects=("postgresql",),  # SQLite scores fuzzy matches in Python
+        ),
+        Scenario(
+            "batch_get",
+            lambda db, sample: batch_get.batch_get(
+                db, [batch_get.BatchKey(id=sample.prompt_id), batch_get.BatchKey(name=sample.name, version_number=1)]
+            ),
+        ),
+        Scenario(
+            "library_changes_tail",
+            lambda db, sample: changefeed.changes_page(
+                db, token=changefeed.encode_token(max(sample.last_seq - 50, 0)), limit=100
+            ),
+            allow_sort=True,
+        ),
+    ]
+
+
+def _sqlite_problems(lines: list[str], scenario: Scenario) -> list[str]:
+    problems = []
+    for line in lines:
+        match = _SQLITE_SCAN.match(line)
+        if match:
+            # Aliased tables show up as e.g. prompt_versions_1.
+            table = re.sub(r"_\d+$", "", match.group(1))
+            if table in LARGE_TABLES and table not in scenario.sqlite_scans and match.group(2) not in ORDERED_INDEXES:
+                problems.append(f"full scan: {line}")
+        elif line.startswith("USE TEMP B-TREE") and not scenario.allow_sort:
+            problems.append(f"sort: {line}")
+    return problems
+
+
+def _postgres_problems(node: dict[str, Any], scenario: Scenario) -> list[str]:
+    problems = []
+    node_type = node["Node Type"]
+    if node_type == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+        problems.append(f"sequential scan on {node['Relation Name']}")
+    elif node_type in ("Sort", "Incremental Sort") and not scenario.allow_sort:
+        problems.append(f"{node_type.lower()} on {', '.join(node.get('Sort Key', []))}")
+    for child in node.get("Plans", []):
+        problems.extend(_postgres_problems(child, scenario))
+    return problems
+
+
+def _postgres_lines(node: dict[str, Any], depth: int = 0) -> list[str]:
+    target = node.get("Index Name") or node.get("Relation Name") or ""
+    lines = [f"{'  ' * depth}{node['Node Type']} {target}".rstrip()]
+    for child in node.get("Plans", []):
+        lines.extend(_postgres_lines(child, depth + 1))
+    return lines
+
+
+async def explain(conn, statement: str, params: Any, scenario: Scenario) -> tuple[list[str], list[str]]:
+    """``(plan lines, problems)`` for one captured statement."""
+
+    if conn.dialect.name == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", params)
+        document = result.scalar_one()
+        plan = (json.loads(document) if isinstance(document, str) else document)[0]["Plan"]
+        return _postgres_lines(plan), _postgres_problems(plan, scenario)
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params)
+    lines = [row[-1] for row in result]
+    return lines, _sqlite_problems(lines, scenario)
+
+
+async def sample(session_factory) -> Sample:
+    from sqlalchemy import func, select
+
+    from app.models.library import LibraryChange
+    from app.models.prompt import Prompt, PromptTag
+
+    async with session_factory() as db:
+        # Somewhere in the middle, so "next page" and "since" are not trivially empty.
+        count = (await db.execute(select(func.count()).select_from(Prompt))).scalar_one()
+        prompt = (
+            await db.execute(
+                select(Prompt.id, Prompt.name, Prompt.updated_at, Prompt.display_name)
+                .order_by(Prompt.updated_at.desc(), Prompt.id.desc())
+                .offset(count // 2)
+                .limit(1)
+            )
+        ).one()
+        tag = (
+            await db.execute(select(PromptTag.tag).group_by(PromptTag.tag).order_by(func.count().desc()).limit(1))
+        ).scalar_one()
+        last_seq = (await db.execute(select(func.max(LibraryChange.seq)))).scalar_one() or 0
+    word = max(prompt.display_name.split(), key=len).lower()
+    return Sample(prompt.id, prompt.name, prompt.updated_at, tag, word, last_seq)
+
+
+async def check(engine, scenarios: Optional[list[Scenario]] = None) -> list[Finding]:
+    """Run every scenario against ``engine`` and return the plans that break the rules."""
+
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.services.result_cache import result_cache
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    keys = await sample(session_factory)
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    findings: list[Finding] = []
+    max_entries, result_cache.max_entries = result_cache.max_entries, 0
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        for scenario in scenarios or _scenarios():
+            if engine.dialect.name not in scenario.dialects:
+                continue
+            async with session_factory() as db:
+                captured.clear()
+                await scenario.run(db, keys)
+                statements = list(captured)
+                conn = await db.connection()
+                for statement, params in statements:
+                    lines, problems = await explain(conn, statement, params, scenario)
+                    if problems:
+                        findings.append(Finding(scenario.name, statement, problems, lines))
+                await db.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        result_cache.max_entries = max_entries
+    return findings
+
+
+async def seed(engine, size: int, seed_value: int = 42) -> None:
+    """Load the corpus into a fresh schema, log one change per prompt, and ANALYZE."""
+
+    from sqlalchemy import text
+
+    from app.db.base import Base
+    from benchmarks import corpus
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await corpus.load(engine, size, seed_value)
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO library_changes (prompt_id) SELECT id FROM prompts ORDER BY updated_at"))
+        await conn.execute(text("ANALYZE"))
+
+
+def format_findings(findings: list[Finding]) -> str:
+    lines = []
+    for finding in findings:
+        lines.append(f"{finding.scenario}: {'; '.join(finding.problems)}")
+        lines.append(f"    {' '.join(finding.statement.split())[:160]}")
+        lines.extend(f"    | {line}" for line in finding.plan)
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="a scratch database (its tables are dropped); defaults to SQLite")
+    parser.add_argument("--size", default="10k", help="corpus size: 1k, 10k, 100k or a number")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding; the corpus is already there")
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace, database_url: str) -> int:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from benchmarks import corpus
+
+    engine = create_async_engine(database_url)
+    try:
+        if not args.reuse:
+            await seed(engine, corpus.SIZES.get(args.size.lower()) or int(args.size))
+        findings = await check(engine)
+    finally:
+        await engine.dispose()
+    if findings:
+        print(format_findings(findings))
+        return 1
+    print("all query plans use indexes")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    os.environ.setdefault("APP_ENV", "bench")
+    if args.database_url:
+        return asyncio.run(_main(args, args.database_url))
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(_main(args, f"sqlite+aiosqlite:///{Path(tmp) / 'plans.db'}"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Search benchmark runner.
+
+Loads the synthetic corpus into SQLite (a temporary file by default) or Postgres,
+replays the Spotlight workload against ``prompt_service.search_library_page`` for each
+search mode, and reports latency percentiles, SQL statements per request and (on
+Postgres) rows scanned per request. Results can be saved as a baseline and compared
+against one; the exit status is non-zero on a p95 regression (and, with
+``--enforce-target``, when a mode misses the p95 target).
+
+    python -m benchmarks.run --size 10k
+    python -m benchmarks.run --database-url postgresql+asyncpg://... --size 100k
+    python -m benchmarks.run --compare benchmarks/baselines/sqlite-1k.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Architecture spec: "Prompt search: p95 < 200 ms for typical queries".
+TARGET_P95_MS = 200.0
+# Ignore p95 changes below this many milliseconds: timer and scheduler noise.
+NOISE_FLOOR_MS = 1.0
+WARMUP_REQUESTS = 20
+MODES = ("keyword", "fuzzy", "semantic", "hybrid")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--size", default="1k", help="corpus size: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per mode")
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--body", default="full", choices=["full", "snippet", "none"])
+    parser.add_argument("--reuse", action="store_true", help="skip loading; the corpus is already there")
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--save-baseline", type=Path, help="write the JSON report as a new baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = 25%%)")
+    parser.add_argument(
+        "--enforce-target", action="store_true", help=f"fail when a mode's p95 is over {TARGET_P95_MS:.0f} ms"
+    )
+    return parser.parse_args(argv)
+
+
+def percentile(samples: list[float], pct: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+async def _rows_scanned(session_factory) -> Optional[int]:
+    """Total tuples read by scans on user tables (Postgres only)."""
+
+    from sqlalchemy import text
+
+    async with session_factory() as db:
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        try:
+            # PG15+ publishes backend statistics lazily; flush ours before reading.
+            await db.execute(text("SELECT pg_stat_force_next_flush()"))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+        result = await db.execute(
+            text(
+                "SELECT coalesce(sum(seq_tup_read + coalesce(idx_tup_fetch, 0)), 0) "
+                "FROM pg_stat_user_tables"
+            )
+        )
+        return int(result.scalar_one())
+
+
+async def prepare(engine, args: argparse.Namespace, size: int) -> None:
+    from sqlalchemy import text
+
+    from app.db.base import Base
+    from benchmarks import corpus
+
+    if args.reuse:
+        return
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    await corpus.load(engine, size, args.seed)
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+    print(f"loaded {size} prompts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+async def run(args: argparse.Namespace, database_url: str) -> dict[str, Any]:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.schemas import BodyMode, SearchMode
+    from app.services import prompt_service
+    from app.services.result_cache import result_cache
+    from benchmarks import corpus, workload
+
+    size = corpus.SIZES.get(args.size.lower()) or int(args.size)
+    engine_options: dict[str, Any] = {}
+    if database_url.startswith("postgresql"):
+        # One connection, so pg_stat counters can be flushed from the backend that ran the queries.
+        engine_options = {"pool_size": 1, "max_overflow": 0}
+    engine = create_async_engine(database_url, **engine_options)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await prepare(engine, args, size)
+
+    statements = 0
+
+    def count_statement(*_: Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    if not args.cache:
+        result_cache.max_entries = 0
+
+    queries = workload.generate(args.requests + WARMUP_REQUESTS)
+    report: dict[str, Any] = {
+        "database": engine.dialect.name,
+        "size": size,
+        "seed": args.seed,
+        "requests": args.requests,
+        "limit": args.limit,
+        "body": args.body,
+        "cache": args.cache,
+        "python": platform.python_version(),
+        "target_p95_ms": TARGET_P95_MS,
+        "modes": {},
+    }
+    for mode_name in args.modes.split(","):
+        mode = SearchMode(mode_name)
+        latencies: list[float] = []
+        for index, query in enumerate(queries):
+            if index == WARMUP_REQUESTS:
+                rows_before = await _rows_scanned(session_factory)
+                statements = 0
+            started = time.perf_counter()
+            async with session_factory() as db:
+                await prompt_service.search_library_page(
+                    db, query=query.text, limit=args.limit, mode=mode, body=BodyMode(args.body)
+                )
+            if index >= WARMUP_REQUESTS:
+                latencies.append((time.perf_counter() - started) * 1000)
+        executed = statements
+        rows_after = await _rows_scanned(session_factory)
+        p95 = percentile(latencies, 95)
+        report["modes"][mode_name] = {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(p95, 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "max_ms": round(max(latencies), 3),
+            "queries_per_request": round(executed / len(latencies), 2),
+            "rows_scanned_per_request": (
+                None
+                if rows_before is None or rows_after is None
+                else round((rows_after - rows_before) / len(latencies), 1)
+            ),
+            "meets_target": p95 < TARGET_P95_MS,
+        }
+    await engine.dispose()
+    return report
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Human-readable p95 regressions of ``report`` relative to ``baseline``."""
+
+    regressions = []
+    for mode, current in report["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        before, after = previous["p95_ms"], current["p95_ms"]
+        if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_MS:
+            regressions.append(f"{mode}: p95 {before:.1f} ms -> {after:.1f} ms")
+    return regressions
+
+
+def format_table(report: dict[str, Any], baseline: Optional[dict[str, Any]] = None) -> str:
+    lines = [
+        f"{report['database']} · {report['size']} prompts · {report['requests']} requests/mode "
+        f"· target p95 < {report['target_p95_ms']:.0f} ms",
+        f"{'mode':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>8}{'rows/req':>10}{'vs base':>9}  target",
+    ]
+    for mode, stats in report["modes"].items():
+        rows = stats["rows_scanned_per_request"]
+        delta = ""
+        previous = (baseline or {}).get("modes", {}).get(mode)
+        if previous:
+            delta = f"{(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+        lines.append(
+            f"{mode:<10}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+            f"{stats['queries_per_request']:>8.1f}{'n/a' if rows is None else rows:>10}"
+            f"{delta:>9}  {'ok' if stats['meets_target'] else 'MISSED'}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    # app.* reads settings at import time; point them at the benchmark database.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("APP_ENV", "bench")
+
+    try:
+        report = asyncio.run(run(args, database_url))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_table(report, baseline))
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2) + "\n")
+
+    failed = False
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        failed = bool(regressions)
+    missed = [mode for mode, stats in report["modes"].items() if not stats["meets_target"]]
+    if missed:
+        print(f"p95 target of {TARGET_P95_MS:.0f} ms missed: {', '.join(missed)}", file=sys.stderr)
+        failed = failed or args.enforce_target
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+"""Response serializer micro-benchmark on library search payloads.
+
+Compares what it costs to turn a 30-item (Spotlight page) and a 500-item payload into
+bytes: FastAPI's default ``response_model`` path (validate, dump to JSON-compatible
+Python, ``json.dumps``), Pydantic's own ``dump_json`` after validation, and the
+trusted-payload path used by ``app.api.responses`` (orjson, MessagePack).
+
+    python -m benchmarks.serializers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import timeit
+from collections.abc import Callable
+from typing import Any, Optional
+
+SIZES = (30, 500)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="items per payload")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the best one is reported")
+    return parser.parse_args(argv)
+
+
+def payload(size: int) -> dict[str, Any]:
+    """A ``LibrarySearchResponse`` payload as ``search_library_page`` builds it."""
+
+    from benchmarks import corpus
+
+    items = [
+        {
+            "id": prompt.id,
+            "title": prompt.display_name,
+            "body": prompt.versions[-1],
+            "item_type": prompt.item_type,
+            "tags": list(prompt.tags),
+            "version": len(prompt.versions),
+            "created_at": prompt.created_at,
+            "updated_at": prompt.updated_at,
+            "source": "db",
+        }
+        for prompt in corpus.generate(size)
+    ]
+    return {"items": items}
+
+
+def serializers() -> dict[str, Callable[[dict[str, Any]], bytes]]:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from app.api.responses import FastJSONResponse, MsgPackResponse
+    from app.schemas import LibrarySearchResponse
+
+    adapter = TypeAdapter(LibrarySearchResponse)
+
+    def fastapi_default(data: dict[str, Any]) -> bytes:
+        # serialize_response + JSONResponse.render for a route with response_model.
+        validated = adapter.validate_python(data)
+        content = jsonable_encoder(adapter.dump_python(validated, mode="json", exclude_none=True))
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def pydantic_dump_json(data: dict[str, Any]) -> bytes:
+        return adapter.dump_json(adapter.validate_python(data), exclude_none=True)
+
+    json_response = FastJSONResponse.__new__(FastJSONResponse)
+    msgpack_response = MsgPackResponse.__new__(MsgPackResponse)
+    return {
+        "fastapi default": fastapi_default,
+        "pydantic dump_json": pydantic_dump_json,
+        "orjson (trusted)": json_response.render,
+        "msgpack (trusted)": msgpack_response.render,
+    }
+
+
+def run(sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    results = []
+    candidates = serializers()
+    for size in sizes:
+        data = payload(size)
+        for name, serialize in candidates.items():
+            timer = timeit.Timer(lambda: serialize(data))
+            number, _ = timer.autorange()
+            best = min(timer.repeat(repeat=repeat, number=number)) / number
+            results.append({"items": size, "serializer": name, "us": best * 1e6, "bytes": len(serialize(data))})
+    return results
+
+
+def format_table(results: list[dict[str, Any]]) -> str:
+    lines = [f"{'items':>6}  {'serializer':<20}{'µs/payload':>12}{'KiB':>9}{'speedup':>9}"]
+    baseline: dict[int, float] = {}
+    for row in results:
+        base = baseline.setdefault(row["items"], row["us"])
+        lines.append(
+            f"{row['items']:>6}  {row['serializer']:<20}{row['us']:>12.1f}"
+            f"{row['bytes'] / 1024:>9.1f}{base / row['us']:>8.1f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    # app.* reads settings at import time; nothing here touches the database.
+    os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    os.environ.setdefault("APP_ENV", "bench")
+    print(format_table(run([int(size) for size in args.sizes.split(",")], args.repeat)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+"""Usage ingestion benchmark: buffered batches against one INSERT and commit per event.
+
+Seeds a small corpus for the events to reference, then writes ``--events`` usage events
+through :class:`~app.services.usage_ingest.UsageBuffer` from ``--producers`` concurrent
+producers sending ``--per-request`` events at a time, as ``POST /usage`` would. A
+producer whose request is shed yields and retries, so the run also reports how often
+the buffer pushed back. For comparison, ``--direct`` events (default: a tenth of
+``--events``) are written the naive way, each in its own transaction.
+
+It then loads ``--history`` events spread over the past ``--history-days``, rolls them
+up with :func:`~app.services.usage_rollups.compact` and times the usage summary over
+that whole range against the same ``GROUP BY`` run on the raw events.
+
+    python -m benchmarks.usage --events 100000
+    python -m benchmarks.usage --events 10000 --history 1000000 --history-days 365
+    python -m benchmarks.usage --database-url postgresql+asyncpg://... --events 1000000 --batch-size 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--size", default="1k", help="corpus size: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="skip loading; the corpus is already there")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--direct", type=int, help="events written one transaction each")
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--per-request", type=int, default=1, help="events per simulated request")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-events", type=int, default=10_000)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--history", type=int, default=200_000, help="older events for the summary timing")
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5, help="summary runs; the median is reported")
+    return parser.parse_args(argv)
+
+
+def make_events(targets: list[tuple[Any, Any]], count: int, seed: int) -> list[dict[str, Any]]:
+    """``count`` validated usage rows spread over ``targets`` (prompt id, version id) pairs."""
+
+    from app.models.usage import UsageClientType
+    from app.schemas.usage import UsageEventCreate
+    from app.services.usage_ingest import rows
+
+    rng = random.Random(seed)
+    clients = list(UsageClientType)
+    users = [None] + [uuid.UUID(int=rng.getrandbits(128)) for _ in range(50)]
+    events = []
+    for _ in range(count):
+        prompt_id, version_id = rng.choice(targets)
+        events.append(
+            UsageEventCreate(
+                prompt_id=prompt_id,
+                version_id=version_id,
+                user_id=rng.choice(users),
+                client_type=rng.choice(clients),
+                project_key=f"project-{rng.randint(1, 20)}",
+                context={"language": rng.choice(["python", "go", "sql", "markdown"])},
+            )
+        )
+    return rows(events)
+
+
+def make_history(
+    targets: list[tuple[Any, Any]], count: int, days: int, seed: int, end: datetime
+) -> list[dict[str, Any]]:
+    """Like :func:`make_events`, but created at random times in the ``days`` before ``end``."""
+
+    rng = random.Random(seed + 1)
+    events = make_events(targets, count, seed)
+    for event in events:
+        event["created_at"] = end - timedelta(seconds=rng.uniform(0, days * 86400))
+    return events
+
+
+async def _median_ms(repeat: int, call) -> float:
+    timings = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+async def run(args: argparse.Namespace, database_url: str) -> dict[str, Any]:
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from app.models.prompt import Prompt
+    from app.models.usage import UsageEvent
+    from app.schemas.usage import UsageGroupBy
+    from app.services import usage_rollups
+    from app.services.usage_ingest import UsageBuffer
+    from benchmarks import corpus
+    from benchmarks.run import prepare
+
+    size = corpus.SIZES.get(args.size.lower()) or int(args.size)
+    engine = create_async_engine(database_url)
+    await prepare(engine, args, size)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        targets = [tuple(row) for row in await db.execute(select(Prompt.id, Prompt.current_version_id))]
+
+    events = make_events(targets, args.events, args.seed)
+    buffer = UsageBuffer(
+        lambda: session_factory,
+        max_events=args.max_events,
+        batch_size=args.batch_size,
+        flush_interval_seconds=args.flush_interval,
+    )
+    retries = 0
+
+    async def produce(share: list[dict[str, Any]]) -> None:
+        nonlocal retries
+        for start in range(0, len(share), args.per_request):
+            request = share[start : start + args.per_request]
+            while not buffer.offer(request):
+                retries += 1
+                await asyncio.sleep(0.001)
+            await asyncio.sleep(0)  # let other requests (and the writer) in, as a server would
+
+    started = time.perf_counter()
+    await asyncio.gather(*(produce(events[i :: args.producers]) for i in range(args.producers)))
+    accepted = time.perf_counter() - started
+    await buffer.stop(timeout=600)
+    buffered = time.perf_counter() - started
+
+    direct_events = events[: args.direct if args.direct is not None else max(1, args.events // 10)]
+    started = time.perf_counter()
+    for row in direct_events:
+        async with session_factory() as db:
+            await db.execute(insert(UsageEvent), [row])
+            await db.commit()
+    direct = time.perf_counter() - started
+
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=args.history_days)
+    history = make_history(targets, args.history, args.history_days, args.seed, now)
+    async with session_factory() as db:
+        for offset in range(0, len(history), args.batch_size):
+            await db.execute(insert(UsageEvent), history[offset : offset + args.batch_size])
+        await db.commit()
+        started = time.perf_counter()
+        await usage_rollups.compact(db, now=now, lag_seconds=0)
+        compact_seconds = time.perf_counter() - started
+
+        async def rolled_up() -> None:
+            await usage_rollups.summary(db, start=start, end=now, group_by=UsageGroupBy.PROMPT)
+
+        async def raw() -> None:
+            query = (
+                select(UsageEvent.prompt_id, func.count())
+                .where(UsageEvent.created_at >= start, UsageEvent.created_at < now)
+                .group_by(UsageEvent.prompt_id)
+            )
+            (await db.execute(query)).all()
+
+        summary_ms = await _median_ms(args.repeat, rolled_up)
+        raw_ms = await _median_ms(args.repeat, raw)
+    await engine.dispose()
+
+    stats = buffer.stats()
+    return {
+        "database": engine.dialect.name,
+        "events": args.events,
+        "per_request": args.per_request,
+        "batch_size": args.batch_size,
+        "accept_per_second": round(args.events / accepted),
+        "buffered_per_second": round(stats["written"] / buffered),
+        "direct_per_second": round(len(direct_events) / direct),
+        "speedup": round((stats["written"] / buffered) / (len(direct_events) / direct), 1),
+        "batches": stats["batches"],
+        "shed_requests_retried": retries,
+        "failed": stats["failed"] + stats["rejected"],
+        "history_events": len(history),
+        "compact_seconds": round(compact_seconds, 2),
+        "summary_ms": summary_ms,
+        "raw_group_by_ms": raw_ms,
+        "summary_speedup": round(raw_ms / summary_ms, 1) if summary_ms else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    # app.* reads settings at import time; point them at the benchmark database.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("APP_ENV", "bench")
+    try:
+        report = asyncio.run(run(args, database_url))
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    for key, value in report.items():
+        print(f"{key:<24}{value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
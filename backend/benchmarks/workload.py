@@ -0,0 +1,57 @@
+"""Spotlight-shaped query workload.
+
+Spotlight fires a search on (debounced) keystrokes, so real traffic is dominated by
+prefix bursts ("p", "py", "pyt", ... "python review"), followed by repeated popular
+terms, an empty query when the palette opens, and a tail of misses and typos.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+from benchmarks.corpus import TAGS, TOPICS, TOPICS_ZH
+
+# Share of each kind of request in the workload.
+MIX = {"prefix": 0.45, "popular": 0.25, "empty": 0.05, "typo": 0.1, "miss": 0.1, "chinese": 0.05}
+
+
+@dataclass(frozen=True, slots=True)
+class WorkloadQuery:
+    kind: str
+    text: str
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 4:
+        return word
+    pos = rng.randrange(1, len(word) - 1)
+    return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2 :]
+
+
+def generate(count: int, seed: int = 7) -> list[WorkloadQuery]:
+    rng = random.Random(seed)
+    kinds = list(MIX)
+    weights = list(MIX.values())
+    popular = TAGS[:8] + TOPICS[:6]
+    queries: list[WorkloadQuery] = []
+    while len(queries) < count:
+        kind = rng.choices(kinds, weights=weights)[0]
+        if kind == "prefix":
+            target = rng.choice(popular)
+            # Debounced typing: not every keystroke reaches the server.
+            for end in range(1, len(target) + 1):
+                if end == len(target) or rng.random() < 0.5:
+                    queries.append(WorkloadQuery(kind, target[:end]))
+        elif kind == "popular":
+            queries.append(WorkloadQuery(kind, rng.choice(popular)))
+        elif kind == "empty":
+            queries.append(WorkloadQuery(kind, ""))
+        elif kind == "typo":
+            queries.append(WorkloadQuery(kind, _typo(rng, rng.choice(TOPICS))))
+        elif kind == "miss":
+            letters = "bcdfghjklmnpqrstvwxz"
+            queries.append(WorkloadQuery(kind, "".join(rng.choices(letters, k=rng.randint(5, 9)))))
+        else:
+            queries.append(WorkloadQuery(kind, rng.choice(TOPICS_ZH)))
+    return queries[:count]
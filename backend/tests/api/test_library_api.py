@@ -0,0 +1,80 @@
+import json
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_library_changes_returns_deltas_and_next_token(api_client: AsyncClient) -> None:
+    token = None
+    while True:
+        body = (await api_client.get("/api/v1/library/changes", params={"token": token} if token else {})).json()
+        token = body["next_token"]
+        if not body["has_more"]:
+            break
+
+    suffix = uuid.uuid4().hex[:8]
+    created = await api_client.post(
+        "/api/v1/prompts",
+        json={"name": f"sync-{suffix}", "display_name": f"Sync {suffix}", "content": "synced", "tags": ["sync"]},
+    )
+    assert created.status_code == 201
+
+    response = await api_client.get("/api/v1/library/changes", params={"token": token})
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["id"], item["op"]) for item in body["items"]] == [(created.json()["id"], "upsert")]
+    assert body["items"][0]["item"]["tags"] == ["sync"]
+    assert body["next_token"] != token
+
+    again = (await api_client.get("/api/v1/library/changes", params={"token": body["next_token"]})).json()
+    assert again == {"items": [], "next_token": body["next_token"], "has_more": False}
+
+
+async def test_library_changes_rejects_bad_tokens_and_limits(api_client: AsyncClient) -> None:
+    assert (await api_client.get("/api/v1/library/changes", params={"token": "garbage!"})).status_code == 400
+    assert (await api_client.get("/api/v1/library/changes", params={"limit": 0})).status_code == 422
+
+
+async def test_library_export_streams_ndjson_with_optional_gzip(api_client: AsyncClient) -> None:
+    marker = f"export-{uuid.uuid4().hex[:8]}"
+    for idx in range(3):
+        created = await api_client.post(
+            "/api/v1/prompts",
+            json={"name": f"{marker}-{idx}", "display_name": f"Export {idx}", "content": "x", "tags": [marker]},
+        )
+        assert created.status_code == 201
+
+    plain = await api_client.get(
+        "/api/v1/library/export", params={"tag": marker}, headers={"Accept-Encoding": "identity"}
+    )
+    assert plain.status_code == 200
+    assert plain.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in plain.headers
+    assert [json.loads(line)["name"] for line in plain.text.splitlines()] == [f"{marker}-{idx}" for idx in range(3)]
+    # Encoded like the API's JSON: compact, UUIDs as strings, UTC timestamps with "Z".
+    first = plain.text.splitlines()[0]
+    line = json.loads(first)
+    assert first == json.dumps(line, ensure_ascii=False, separators=(",", ":"))
+    assert line["updated_at"].endswith("Z") and line["current_version"]["created_at"].endswith("Z")
+    assert line.keys() == (await api_client.get(f"/api/v1/prompts/{line['id']}")).json().keys()
+
+    compressed = await api_client.get(
+        "/api/v1/library/export", params={"tag": marker}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert compressed.headers["content-encoding"] == "gzip"
+    # httpx decodes Content-Encoding transparently.
+    assert compressed.text == plain.text
+
+    for refused in ("gzip;q=0", "gzip; q=0.0, identity", "*;q=0.5, gzip;q=0"):
+        response = await api_client.get(
+            "/api/v1/library/export", params={"tag": marker}, headers={"Accept-Encoding": refused}
+        )
+        assert "content-encoding" not in response.headers, refused
+        assert response.text == plain.text
+    wildcard = await api_client.get(
+        "/api/v1/library/export", params={"tag": marker}, headers={"Accept-Encoding": "br;q=1, *;q=0.1"}
+    )
+    assert wildcard.headers["content-encoding"] == "gzip"
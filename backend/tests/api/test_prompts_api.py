@@ -1,8 +1,12 @@
+import json
 import uuid
 from datetime import datetime, timedelta
 
+import msgpack
 import pytest
+from fastapi import Request, Response
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 
 from app.api.v1 import prompts as prompts_api
@@ -110,6 +114,10 @@ async def test_create_prompt_duplicate_name_returns_400(api_client: AsyncClient)
     assert duplicate.json()["detail"] == "Prompt name already exists"
 
 
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "headers": [], "query_string": b""})
+
+
 async def test_route_list_prompts_direct(db_session) -> None:
     payload = PromptCreate(
         name="direct-call",
@@ -122,13 +130,13 @@ async def test_route_list_prompts_direct(db_session) -> None:
     )
     await prompts_api.create_prompt(payload, db_session)
 
-    result = await prompts_api.list_prompts(db=db_session)
-    assert result["items"]
+    result = await prompts_api.list_prompts(_request(), Response(), db=db_session)
+    assert json.loads(result.body)["items"]
 
 
 async def test_route_get_prompt_not_found_raises(db_session) -> None:
     with pytest.raises(Exception):
-        await prompts_api.get_prompt(uuid.uuid4(), db=db_session)
+        await prompts_api.get_prompt(uuid.uuid4(), _request(), Response(), db=db_session)
 
 
 async def test_route_create_prompt_rolls_back_on_integrity_error(monkeypatch, db_session) -> None:
@@ -171,3 +179,360 @@ async def test_search_endpoint_returns_library_shape(api_client: AsyncClient) ->
     assert items[0]["title"] == payload["display_name"]
     assert items[0]["body"] == payload["content"]
     assert set(items[0]["tags"]) == {"library", "qa"}
+
+
+async def test_search_endpoint_fuzzy_mode_tolerates_typos(api_client: AsyncClient) -> None:
+    payload = {
+        "name": "python-code-review",
+        "display_name": "Python Code Review",
+        "description": None,
+        "item_type": "prompt",
+        "tags": ["python"],
+        "content": "Review the diff for bugs",
+        "notes": None,
+    }
+    create_response = await api_client.post("/api/v1/prompts", json=payload)
+    assert create_response.status_code == 201
+
+    keyword = await api_client.get("/api/v1/prompts/search", params={"query": "pyhton revew"})
+    assert keyword.json()["items"] == []
+
+    fuzzy = await api_client.get(
+        "/api/v1/prompts/search", params={"query": "pyhton revew", "mode": "fuzzy"}
+    )
+    assert fuzzy.status_code == 200
+    assert fuzzy.json()["items"][0]["title"] == "Python Code Review"
+
+
+async def test_search_endpoint_rejects_unknown_mode(api_client: AsyncClient) -> None:
+    response = await api_client.get("/api/v1/prompts/search", params={"mode": "psychic"})
+
+    assert response.status_code == 422
+
+
+async def test_suggest_endpoint_returns_ids_and_titles(api_client: AsyncClient) -> None:
+    payload = {
+        "name": "typeahead-target",
+        "display_name": "Typeahead Target",
+        "description": None,
+        "item_type": "prompt",
+        "tags": ["spotlight"],
+        "content": "body is not part of suggestions",
+        "notes": None,
+    }
+    create_response = await api_client.post("/api/v1/prompts", json=payload)
+    assert create_response.status_code == 201
+
+    response = await api_client.get("/api/v1/prompts/suggest", params={"prefix": "typea"})
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {"id": create_response.json()["id"], "title": "Typeahead Target"}
+    ]
+
+
+async def test_cached_search_sees_new_prompts_and_reports_metrics(api_client: AsyncClient) -> None:
+    params = {"query": "Cache  Invalidation"}
+    before = await api_client.get("/api/v1/prompts/search", params=params)
+    again = await api_client.get("/api/v1/prompts/search", params={"query": "cache invalidation"})
+    assert before.json()["items"] == again.json()["items"] == []
+
+    payload = {
+        "name": "cache-invalidation",
+        "display_name": "Cache Invalidation",
+        "description": None,
+        "item_type": "prompt",
+        "tags": [],
+        "content": "one of the two hard things",
+        "notes": None,
+    }
+    assert (await api_client.post("/api/v1/prompts", json=payload)).status_code == 201
+
+    after = await api_client.get("/api/v1/prompts/search", params=params)
+    assert [item["title"] for item in after.json()["items"]] == ["Cache Invalidation"]
+
+    metrics = await api_client.get("/api/v1/metrics/cache")
+    assert metrics.status_code == 200
+    stats = metrics.json()["result_cache"]
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 2
+
+
+async def test_db_metrics_report_pool_state(api_client: AsyncClient) -> None:
+    metrics = await api_client.get("/api/v1/metrics/db")
+    assert metrics.status_code == 200
+    stats = metrics.json()["pool"]
+    assert stats["pool_class"]
+    assert set(stats["wait_ms"]) == {"count", "mean", "max", "buckets"}
+    assert metrics.json()["replicas"] == {}
+
+
+async def test_search_endpoint_filters_and_returns_facets(api_client: AsyncClient) -> None:
+    for suffix, item_type in (("one", "prompt"), ("two", "snippet")):
+        payload = {
+            "name": f"facet-api-{suffix}",
+            "display_name": f"Facetapi {suffix}",
+            "description": None,
+            "item_type": item_type,
+            "tags": ["facetapi"],
+            "content": "body",
+            "notes": None,
+        }
+        assert (await api_client.post("/api/v1/prompts", json=payload)).status_code == 201
+
+    response = await api_client.get(
+        "/api/v1/prompts/search",
+        params={"query": "facetapi", "item_type": "snippet", "facets": "true"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["title"] for item in body["items"]] == ["Facetapi two"]
+    assert body["facets"]["item_type"] == [{"value": "snippet", "count": 1}]
+    assert body["facets"]["tag"] == [{"value": "facetapi", "count": 1}]
+
+    invalid = await api_client.get("/api/v1/prompts/search", params={"status": "deleted"})
+    assert invalid.status_code == 422
+
+
+async def test_search_endpoint_body_modes(api_client: AsyncClient) -> None:
+    content = "lorem ipsum dolor sit amet. " * 200 + "the bodymode marker sits here. " + "tail " * 200
+    payload = {
+        "name": "body-mode",
+        "display_name": "Body Mode",
+        "description": None,
+        "item_type": "prompt",
+        "tags": [],
+        "content": content,
+        "notes": None,
+    }
+    assert (await api_client.post("/api/v1/prompts", json=payload)).status_code == 201
+
+    full = await api_client.get("/api/v1/prompts/search", params={"query": "bodymode"})
+    snippet = await api_client.get(
+        "/api/v1/prompts/search", params={"query": "bodymode", "body": "snippet"}
+    )
+    none = await api_client.get("/api/v1/prompts/search", params={"query": "bodymode", "body": "none"})
+
+    assert full.json()["items"][0]["body"] == content
+    item = snippet.json()["items"][0]
+    assert [item["body"][h["start"] : h["end"]] for h in item["highlights"]] == ["bodymode"]
+    assert len(snippet.content) * 10 < len(full.content)
+    assert "body" not in none.json()["items"][0]
+
+
+async def test_list_prompts_follows_next_cursor_and_rejects_garbage(api_client: AsyncClient) -> None:
+    for idx in range(3):
+        payload = {
+            "name": f"cursor-page-{idx}",
+            "display_name": f"Cursor Page {idx}",
+            "description": None,
+            "item_type": "prompt",
+            "tags": [],
+            "content": "body",
+            "notes": None,
+        }
+        assert (await api_client.post("/api/v1/prompts", json=payload)).status_code == 201
+
+    first = (await api_client.get("/api/v1/prompts", params={"limit": 2})).json()
+    second = (
+        await api_client.get("/api/v1/prompts", params={"limit": 2, "cursor": first["next_cursor"]})
+    ).json()
+
+    first_ids = {item["id"] for item in first["items"]}
+    assert second["items"]
+    assert first_ids.isdisjoint(item["id"] for item in second["items"])
+    assert first["items"][-1]["updated_at"] >= second["items"][0]["updated_at"]
+
+    invalid = await api_client.get("/api/v1/prompts", params={"cursor": "not-a-cursor"})
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"] == "Invalid cursor"
+
+
+async def test_import_prompts_accepts_json_arrays_and_ndjson(api_client: AsyncClient) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    rows = [{"name": f"imp-{suffix}-{idx}", "display_name": f"Imported {idx}", "content": "x"} for idx in range(3)]
+
+    response = await api_client.post("/api/v1/prompts:import", json=rows)
+    assert response.status_code == 200
+    assert [item["index"] for item in response.json()["created"]] == [0, 1, 2]
+    fetched = await api_client.get(f"/api/v1/prompts/{response.json()['created'][0]['id']}")
+    assert fetched.json()["current_version"]["content"] == "x"
+
+    ndjson = "\n".join(json.dumps(row) for row in [rows[0], {"name": f"imp-{suffix}-new", "display_name": "N", "content": "y"}])
+    response = await api_client.post(
+        "/api/v1/prompts:import", content=ndjson, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["created"]] == [f"imp-{suffix}-new"]
+    assert response.json()["errors"] == [{"index": 0, "name": rows[0]["name"], "error": "name already exists"}]
+
+    bad = await api_client.post("/api/v1/prompts:import", content="{}", headers={"Content-Type": "application/json"})
+    assert bad.status_code == 400
+
+
+async def test_get_prompt_honours_etag_and_if_modified_since(api_client: AsyncClient, db_session) -> None:
+    created = await api_client.post(
+        "/api/v1/prompts",
+        json={"name": f"etag-{uuid.uuid4().hex[:8]}", "display_name": "ETag", "content": "v1"},
+    )
+    url = f"/api/v1/prompts/{created.json()['id']}"
+
+    first = await api_client.get(url)
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    cached = await api_client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert (await api_client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})).status_code == 304
+    assert (await api_client.get(url, headers={"If-Modified-Since": last_modified})).status_code == 304
+    assert (
+        await api_client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    ).status_code == 200
+    # If-None-Match takes precedence over a matching If-Modified-Since.
+    assert (
+        await api_client.get(url, headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified})
+    ).status_code == 200
+
+    prompt = await prompts_api.prompt_service.get_prompt(db_session, uuid.UUID(created.json()["id"]))
+    prompt.updated_at = prompt.updated_at - timedelta(days=1)
+    await db_session.commit()
+
+    changed = await api_client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_list_and_search_use_a_weak_library_etag(api_client: AsyncClient) -> None:
+    listed = await api_client.get("/api/v1/prompts")
+    etag = listed.headers["etag"]
+    assert etag.startswith('W/"')
+    assert (await api_client.get("/api/v1/prompts", headers={"If-None-Match": etag})).status_code == 304
+
+    searched = await api_client.get("/api/v1/prompts/search", params={"query": "etag"})
+    assert searched.headers["etag"] == etag
+    assert (
+        await api_client.get("/api/v1/prompts/search", params={"query": "etag"}, headers={"If-None-Match": etag})
+    ).status_code == 304
+
+    packed = await api_client.get("/api/v1/prompts", headers={"Accept": "application/msgpack"})
+    assert packed.headers["etag"] != etag
+    stale_json = {"Accept": "application/msgpack", "If-None-Match": etag}
+    assert (await api_client.get("/api/v1/prompts", headers=stale_json)).status_code == 200
+
+    await api_client.post(
+        "/api/v1/prompts",
+        json={"name": f"etag-list-{uuid.uuid4().hex[:8]}", "display_name": "ETag List", "content": "x"},
+    )
+    refreshed = await api_client.get("/api/v1/prompts", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+
+async def test_cached_list_and_search_answer_without_sql(api_client: AsyncClient, test_engine) -> None:
+    params = {"query": f"no-sql-{uuid.uuid4().hex[:8]}"}
+    first = await api_client.get("/api/v1/prompts/search", params=params)
+    await api_client.get("/api/v1/prompts")
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        again = await api_client.get("/api/v1/prompts/search", params=params)
+        listed = await api_client.get("/api/v1/prompts", headers={"If-None-Match": first.headers["etag"]})
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert again.status_code == 200 and again.headers["etag"] == first.headers["etag"]
+    assert listed.status_code == 304
+    assert statements == []
+
+
+async def test_read_endpoints_speak_msgpack_on_request(api_client: AsyncClient) -> None:
+    created = await api_client.post(
+        "/api/v1/prompts",
+        json={"name": f"msgpack-{uuid.uuid4().hex[:8]}", "display_name": "MsgPack", "content": "packed", "tags": ["mp"]},
+    )
+    url = f"/api/v1/prompts/{created.json()['id']}"
+
+    as_json = await api_client.get(url)
+    as_msgpack = await api_client.get(url, headers={"Accept": "application/msgpack"})
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert as_msgpack.headers["vary"] == "Accept"
+    assert as_msgpack.headers["etag"] != as_json.headers["etag"]
+    revalidated = await api_client.get(
+        url, headers={"Accept": "application/msgpack", "If-None-Match": as_msgpack.headers["etag"]}
+    )
+    assert (revalidated.status_code, revalidated.headers["vary"]) == (304, "Accept")
+    assert (await api_client.get(url, headers={"If-None-Match": as_msgpack.headers["etag"]})).status_code == 200
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json() == created.json()
+
+    search = await api_client.get(
+        "/api/v1/prompts/search", params={"query": "msgpack"}, headers={"Accept": "application/msgpack"}
+    )
+    assert msgpack.unpackb(search.content)["items"][0]["title"] == "MsgPack"
+
+
+async def test_fields_parameter_returns_sparse_payloads(api_client: AsyncClient) -> None:
+    marker = uuid.uuid4().hex[:8]
+    created = (
+        await api_client.post(
+            "/api/v1/prompts",
+            json={"name": f"sparse-{marker}", "display_name": "Sparse", "content": f"sparse body {marker}", "tags": ["sp"]},
+        )
+    ).json()
+
+    got = await api_client.get(
+        f"/api/v1/prompts/{created['id']}", params={"fields": "display_name,current_version.version_number"}
+    )
+    assert got.json() == {
+        "id": created["id"],
+        "display_name": "Sparse",
+        "current_version": {"id": created["current_version"]["id"], "version_number": 1},
+    }
+
+    listed = await api_client.get("/api/v1/prompts", params={"fields": "name,tags"})
+    assert all(set(item) == {"id", "name", "tags"} for item in listed.json()["items"])
+
+    searched = await api_client.get("/api/v1/prompts/search", params={"query": marker, "fields": "title"})
+    assert searched.json()["items"] == [{"id": created["id"], "title": "Sparse"}]
+
+    for url in ("/api/v1/prompts", "/api/v1/prompts/search", f"/api/v1/prompts/{created['id']}"):
+        bad = await api_client.get(url, params={"query": "x", "fields": "id,secret"})
+        assert bad.status_code == 400
+        assert bad.json()["detail"] == "Unknown field: secret"
+
+
+async def test_batch_get_resolves_ids_and_names_in_one_request(api_client: AsyncClient) -> None:
+    marker = uuid.uuid4().hex[:8]
+    created = (
+        await api_client.post(
+            "/api/v1/prompts",
+            json={"name": f"batch-api-{marker}", "display_name": "Batch", "content": "batched"},
+        )
+    ).json()
+
+    response = await api_client.post(
+        "/api/v1/prompts:batchGet",
+        json={
+            "keys": [
+                {"name": created["name"], "version_number": 1},
+                {"id": str(uuid.uuid4())},
+                {"id": created["id"]},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    pinned, missing, by_id = response.json()["results"]
+    assert pinned["prompt"]["id"] == by_id["prompt"]["id"] == created["id"]
+    assert by_id["prompt"]["current_version"]["content"] == "batched"
+    assert pinned["version"]["id"] == created["current_version"]["id"]
+    assert missing == {"key": missing["key"], "prompt": None, "version": None, "error": "not_found"}
+
+    both = await api_client.post(
+        "/api/v1/prompts:batchGet", json={"keys": [{"id": created["id"], "name": created["name"]}]}
+    )
+    assert both.status_code == 422
+    too_many = await api_client.post("/api/v1/prompts:batchGet", json={"keys": [{"name": "x"}] * 501})
+    assert too_many.status_code == 422
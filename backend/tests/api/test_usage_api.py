@@ -0,0 +1,83 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.usage import UsageEvent
+from app.services.usage_ingest import usage_buffer
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _prompt(api_client: AsyncClient) -> dict:
+    suffix = uuid.uuid4().hex[:8]
+    created = await api_client.post(
+        "/api/v1/prompts", json={"name": f"usage-{suffix}", "display_name": "Usage", "content": "x"}
+    )
+    assert created.status_code == 201
+    return created.json()
+
+
+async def test_usage_accepts_single_events_and_batches(api_client: AsyncClient, db_session: AsyncSession) -> None:
+    prompt = await _prompt(api_client)
+    marker = uuid.uuid4().hex[:8]
+    event = {
+        "prompt_id": prompt["id"],
+        "version_id": prompt["current_version"]["id"],
+        "client_type": "desktop",
+        "project_key": marker,
+        "context": {"language": "python"},
+    }
+
+    single = await api_client.post("/api/v1/usage", json=event)
+    batch = await api_client.post("/api/v1/usage", json={"events": [event, {**event, "client_type": "codex"}]})
+    assert (single.status_code, single.json()) == (202, {"accepted": 1})
+    assert (batch.status_code, batch.json()) == (202, {"accepted": 2})
+
+    await usage_buffer.stop()
+    result = await db_session.execute(
+        select(UsageEvent.client_type, func.count()).where(UsageEvent.project_key == marker).group_by(UsageEvent.client_type)
+    )
+    assert dict(result.all()) == {"desktop": 2, "codex": 1}
+
+
+async def test_usage_rejects_invalid_events(api_client: AsyncClient) -> None:
+    prompt = await _prompt(api_client)
+
+    bad_type = await api_client.post("/api/v1/usage", json={"prompt_id": prompt["id"], "client_type": "fax"})
+    empty = await api_client.post("/api/v1/usage", json={"events": []})
+    assert (bad_type.status_code, empty.status_code) == (422, 422)
+
+
+async def test_usage_sheds_load_with_503_when_the_buffer_is_full(
+    api_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prompt = await _prompt(api_client)
+    monkeypatch.setattr(usage_buffer, "max_events", 0)
+
+    response = await api_client.post("/api/v1/usage", json={"prompt_id": prompt["id"]})
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+
+
+async def test_usage_summary_counts_events_per_group(api_client: AsyncClient) -> None:
+    prompt = await _prompt(api_client)
+    events = [{"prompt_id": prompt["id"], "client_type": client} for client in ("cli", "cli", "desktop")]
+    assert (await api_client.post("/api/v1/usage", json={"events": events})).status_code == 202
+    await usage_buffer.stop()
+
+    response = await api_client.get(
+        "/api/v1/usage/summary", params={"prompt_id": prompt["id"], "group_by": "client_type"}
+    )
+    backwards = await api_client.get(
+        "/api/v1/usage/summary", params={"from": "2024-02-01T00:00:00Z", "to": "2024-01-01T00:00:00Z"}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["group_by"], body["prompt_id"], body["total"]) == ("client_type", prompt["id"], 3)
+    assert body["items"] == [{"key": "cli", "count": 2}, {"key": "desktop", "count": 1}]
+    assert backwards.status_code == 400
@@ -24,7 +24,7 @@ app_config._get_settings.cache_clear()
 importlib.reload(app_config)
 importlib.reload(app_session)
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
 from app.db.base import Base
 from app import main
 
@@ -61,6 +61,7 @@ async def app_client(db_session: AsyncSession) -> AsyncIterator[AsyncClient]:
         yield db_session
 
     main.app.dependency_overrides[get_db] = _override_get_db
+    main.app.dependency_overrides[get_read_db] = _override_get_db
     transport = ASGITransport(app=main.app)
     async with AsyncClient(transport=transport, base_url="http://testserver") as client:
         yield client
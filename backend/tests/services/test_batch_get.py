@@ -0,0 +1,75 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import PromptVersion, PromptVersionStatus
+from app.services import batch_get, prompt_service
+from app.services.batch_get import BatchKey
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _create(db: AsyncSession, name: str, **extra):
+    return await prompt_service.create_prompt(
+        db, name=name, display_name=name.title(), description=None, content=f"{name} v1", notes=None, **extra
+    )
+
+
+async def test_batch_get_keeps_request_order_and_marks_misses(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    first = await _create(db_session, f"batch-{marker}-a", tags=["z", "a"])
+    second = await _create(db_session, f"batch-{marker}-b")
+    db_session.add(
+        PromptVersion(
+            prompt_id=second.id, version_number=2, status=PromptVersionStatus.DRAFT, content="b v2 draft"
+        )
+    )
+    await db_session.commit()
+    missing = uuid.uuid4()
+
+    result = await batch_get.batch_get(
+        db_session,
+        [
+            BatchKey(name=second.name),
+            BatchKey(id=missing),
+            BatchKey(id=first.id),
+            BatchKey(name=second.name, version_number=2),
+            BatchKey(id=first.id, version_number=7),
+            BatchKey(name="nope-" + marker),
+        ],
+    )
+
+    errors = [item["error"] for item in result["results"]]
+    assert errors == [None, "not_found", None, None, "version_not_found", "not_found"]
+    by_name, _, by_id, pinned, _, _ = result["results"]
+    assert by_name["key"] == {"id": None, "name": second.name, "version_number": None}
+    assert by_name["prompt"]["current_version"]["content"] == f"{second.name} v1"
+    assert by_name["version"] is None
+    assert by_id["prompt"]["id"] == first.id
+    assert by_id["prompt"]["tags"] == ["a", "z"]
+    assert pinned["prompt"]["current_version"]["version_number"] == 1
+    assert pinned["version"]["version_number"] == 2
+    assert pinned["version"]["content"] == "b v2 draft"
+
+
+async def test_batch_get_uses_three_queries_whatever_the_batch_size(db_session: AsyncSession, test_engine) -> None:
+    marker = uuid.uuid4().hex[:8]
+    prompts = [await _create(db_session, f"batch-many-{marker}-{idx}", tags=[marker]) for idx in range(30)]
+    await db_session.commit()
+    keys = [BatchKey(id=prompt.id) for prompt in prompts[:15]] + [
+        BatchKey(name=prompt.name, version_number=1) for prompt in prompts[15:]
+    ]
+
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        result = await batch_get.batch_get(db_session, keys)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 3
+    assert [item["prompt"]["name"] for item in result["results"]] == [prompt.name for prompt in prompts]
+    assert all(item["prompt"]["tags"] == [marker] for item in result["results"])
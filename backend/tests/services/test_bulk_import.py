@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import bulk_import, changefeed, prompt_service
+
+pytestmark = pytest.mark.asyncio
+
+
+def _row(name: str, **extra) -> dict:
+    return {"name": name, "display_name": name.title(), "content": f"{name} body", **extra}
+
+
+async def test_parse_reads_arrays_and_ndjson() -> None:
+    assert bulk_import.parse(b'[{"name": "a"}]', ndjson=False) == [{"name": "a"}]
+    assert bulk_import.parse(b'{"name": "a"}\n\nnot json\n{"name": "b"}\n', ndjson=True) == [
+        {"name": "a"},
+        None,
+        {"name": "b"},
+    ]
+    for body in (b"{", b'{"name": "a"}'):
+        with pytest.raises(bulk_import.InvalidImport):
+            bulk_import.parse(body, ndjson=False)
+    with pytest.raises(bulk_import.InvalidImport):
+        bulk_import.parse(b'{"name": "\xff"}\n', ndjson=True)
+
+
+async def test_validate_reports_each_bad_row_up_front() -> None:
+    valid, errors = bulk_import.validate(
+        [_row("ok"), None, {"name": "no-content"}, _row("ok"), _row("typed", item_type="nope")]
+    )
+
+    assert [index for index, _ in valid] == [0]
+    assert [(error.index, error.name) for error in errors] == [
+        (1, None),
+        (2, "no-content"),
+        (3, "ok"),
+        (4, "typed"),
+    ]
+    assert errors[2].error == "duplicate name in request"
+    assert errors[1].error.startswith("invalid: display_name")
+
+
+async def test_validate_reports_values_longer_than_their_columns() -> None:
+    valid, errors = bulk_import.validate(
+        [_row("n" * 256), _row("long-title", display_name="t" * 256), _row("long-tag", tags=["ok", "x" * 65]), _row("fits")]
+    )
+
+    assert [payload.name for _, payload in valid] == ["fits"]
+    assert [error.error for error in errors] == [
+        "invalid: name: at most 255 characters",
+        "invalid: display_name: at most 255 characters",
+        "invalid: tags.1: at most 64 characters",
+    ]
+
+
+async def test_import_creates_prompts_and_reports_conflicts_per_row(
+    db_session: AsyncSession, test_engine
+) -> None:
+    marker = uuid.uuid4().hex[:6]
+    existing = await prompt_service.create_prompt(
+        db_session, name=f"bulk-{marker}-2", display_name="Taken", description=None, content="x", notes=None
+    )
+    await db_session.commit()
+    token = (await changefeed.changes_page(db_session, token=None, limit=changefeed.MAX_BATCH))["next_token"]
+    while True:
+        page = await changefeed.changes_page(db_session, token=token, limit=changefeed.MAX_BATCH)
+        token = page["next_token"]
+        if not page["has_more"]:
+            break
+
+    rows = [_row(f"bulk-{marker}-{idx}", tags=["bulk", "bulk", marker]) for idx in range(5)]
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        result = await bulk_import.import_prompts(db_session, rows, chunk_size=2)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert [item["index"] for item in result["created"]] == [0, 1, 3, 4]
+    assert result["errors"] == [{"index": 2, "name": existing.name, "error": "name already exists"}]
+    # Five INSERTs per chunk (prompts, versions, tags, library items, changefeed), whatever its size.
+    inserts = [sql for sql in statements if sql.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 3 * 6
+
+    created = await prompt_service.get_prompt(db_session, result["created"][0]["id"])
+    assert created is not None
+    assert created.current_version is not None
+    assert created.current_version.content == f"bulk-{marker}-0 body"
+    assert [link.tag for link in created.tag_links] == sorted(["bulk", marker])
+
+    feed = await changefeed.changes_page(db_session, token=token)
+    assert [item["id"] for item in feed["items"]] == [item["id"] for item in result["created"]]
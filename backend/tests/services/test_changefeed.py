@@ -0,0 +1,87 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import PromptStatus
+from app.services import changefeed, prompt_service
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _drain(db: AsyncSession, token=None) -> tuple[list[dict], str]:
+    items: list[dict] = []
+    while True:
+        page = await changefeed.changes_page(db, token=token, limit=changefeed.MAX_BATCH)
+        items.extend(page["items"])
+        token = page["next_token"]
+        if not page["has_more"]:
+            return items, token
+
+
+async def _create(db: AsyncSession, name: str):
+    return await prompt_service.create_prompt(
+        db, name=name, display_name=name.title(), description=None, content="body", notes=None
+    )
+
+
+async def test_token_round_trip_and_rejects_garbage() -> None:
+    assert changefeed.decode_token(changefeed.encode_token(42)) == 42
+    assert changefeed.decode_token(None) == 0
+    assert changefeed.decode_token("") == 0
+    for bad in ("%%%", "bm9wZQ", changefeed.encode_token(-1)):
+        with pytest.raises(changefeed.InvalidSyncToken):
+            changefeed.decode_token(bad)
+
+
+async def test_changes_since_token_are_deltas_with_tombstones(db_session: AsyncSession) -> None:
+    _, token = await _drain(db_session)
+
+    # Nothing new: an empty page and the same token, so idle clients cost one tiny query.
+    idle = await changefeed.changes_page(db_session, token=token)
+    assert idle == {"items": [], "next_token": token, "has_more": False}
+
+    kept = await _create(db_session, f"feed-kept-{uuid.uuid4().hex[:6]}")
+    archived = await _create(db_session, f"feed-archived-{uuid.uuid4().hex[:6]}")
+    await db_session.commit()
+
+    items, token = await _drain(db_session, token)
+    assert [(item["id"], item["op"]) for item in items] == [(kept.id, "upsert"), (archived.id, "upsert")]
+    assert items[0]["item"]["title"] == kept.display_name
+    assert items[0]["item"]["body"] == "body"
+
+    archived.status = PromptStatus.ARCHIVED.value
+    await changefeed.record(db_session, [archived.id])
+    await db_session.commit()
+
+    items, token = await _drain(db_session, token)
+    assert items == [{"id": archived.id, "op": "delete", "item": None}]
+    assert (await changefeed.changes_page(db_session, token=token))["items"] == []
+
+
+async def test_changes_are_paged_and_deduplicated(db_session: AsyncSession) -> None:
+    _, token = await _drain(db_session)
+    created = [await _create(db_session, f"feed-page-{idx}-{uuid.uuid4().hex[:6]}") for idx in range(5)]
+    await db_session.commit()
+    # A second change to the first prompt moves it to the end instead of repeating it.
+    await changefeed.record(db_session, [created[0].id])
+    await db_session.commit()
+
+    seen = []
+    while True:
+        page = await changefeed.changes_page(db_session, token=token, limit=2)
+        assert len(page["items"]) <= 2
+        seen.extend(item["id"] for item in page["items"])
+        token = page["next_token"]
+        if not page["has_more"]:
+            break
+
+    assert seen == [prompt.id for prompt in created[1:]] + [created[0].id]
+
+
+async def test_rolled_back_writes_leave_no_changes(db_session: AsyncSession) -> None:
+    _, token = await _drain(db_session)
+    await _create(db_session, f"feed-rollback-{uuid.uuid4().hex[:6]}")
+    await db_session.rollback()
+
+    assert (await changefeed.changes_page(db_session, token=token))["items"] == []
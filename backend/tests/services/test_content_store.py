@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import PLAIN, ZLIB, ContentBlob, decode, digest
+from app.models.prompt import PromptVersion
+from app.services import content_store, prompt_service
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _blob(db: AsyncSession, content_hash: str) -> ContentBlob:
+    return (await db.execute(select(ContentBlob).where(ContentBlob.hash == content_hash))).scalar_one()
+
+
+async def test_put_stores_each_body_once_and_compresses_large_ones(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex
+    large = f"{marker} " + "Summarize the meeting notes below. " * 30
+    small = f"{marker} short"
+
+    hashes = await content_store.put(db_session, [large, small, large])
+    again = await content_store.put(db_session, [small])
+    await db_session.commit()
+
+    assert hashes == [digest(large), digest(small), digest(large)] and again == [digest(small)]
+    count = await db_session.scalar(select(func.count()).select_from(ContentBlob).where(ContentBlob.hash.in_(hashes)))
+    assert count == 2
+    stored_large, stored_small = await _blob(db_session, hashes[0]), await _blob(db_session, hashes[1])
+    assert stored_large.encoding == ZLIB and len(stored_large.data) < stored_large.size == len(large.encode())
+    assert stored_small.encoding == PLAIN and decode(stored_small.encoding, stored_small.data) == small
+
+
+async def test_prompts_with_the_same_body_share_a_blob(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    body = f"shared body {marker} " * 20
+    first, second = [
+        await prompt_service.create_prompt(
+            db_session, name=f"blob-{marker}-{idx}", display_name="Shared", description=None, content=body, notes=None
+        )
+        for idx in range(2)
+    ]
+    await db_session.commit()
+
+    assert first.current_version.content_hash == second.current_version.content_hash == digest(body)
+    db_session.expunge_all()
+    version = await db_session.get(PromptVersion, first.current_version_id)
+    # The blob is joined in with the version but only decompressed when read.
+    assert "text" not in version.blob.__dict__
+    assert version.content == body
+    assert version.blob.__dict__["text"] == body
+
+
+async def test_assigning_content_through_the_orm_stores_the_blob(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    prompt = await prompt_service.create_prompt(
+        db_session, name=f"blob-orm-{marker}", display_name="Orm", description=None, content="v1", notes=None
+    )
+    await db_session.commit()
+
+    prompt.current_version.content = f"edited {marker}"
+    await db_session.commit()
+
+    assert prompt.current_version.content_hash == digest(f"edited {marker}")
+    assert (await _blob(db_session, digest(f"edited {marker}"))).text == f"edited {marker}"
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import PromptItemType
+from app.schemas import SearchMode
+from app.services import prompt_service
+from app.services.facets import LibraryFilters
+
+pytestmark = pytest.mark.asyncio
+
+
+async def seed(db: AsyncSession, marker: str) -> None:
+    rows = [
+        ("alpha", PromptItemType.PROMPT, ["python", "review"]),
+        ("beta", PromptItemType.PROMPT, ["python"]),
+        ("gamma", PromptItemType.SNIPPET, ["python", "sql"]),
+        ("delta", PromptItemType.FAQ, ["onboarding"]),
+    ]
+    for suffix, item_type, tags in rows:
+        await prompt_service.create_prompt(
+            db,
+            name=f"{marker}-{suffix}",
+            display_name=f"{marker.title()} {suffix.title()}",
+            description=None,
+            item_type=item_type,
+            tags=tags,
+            content=f"{marker} body",
+            notes=None,
+        )
+    await db.commit()
+
+
+def counts(facet: list[dict]) -> dict[str, int]:
+    return {entry["value"]: entry["count"] for entry in facet}
+
+
+async def test_keyword_facets_count_the_whole_matched_set(db_session: AsyncSession) -> None:
+    await seed(db_session, "facetkw")
+
+    page = await prompt_service.search_library_page(
+        db_session, query="facetkw", limit=1, facets=True
+    )
+
+    assert len(page["items"]) == 1
+    facets = page["facets"]
+    assert counts(facets["item_type"]) == {"prompt": 2, "snippet": 1, "faq": 1}
+    assert counts(facets["status"]) == {"active": 4}
+    assert facets["tag"][0] == {"value": "python", "count": 3}
+    assert counts(facets["tag"]) == {"python": 3, "review": 1, "sql": 1, "onboarding": 1}
+
+
+async def test_filters_narrow_results_and_facets(db_session: AsyncSession) -> None:
+    await seed(db_session, "facetflt")
+
+    filters = LibraryFilters.build(item_types=[PromptItemType.PROMPT], tags=["python"])
+    page = await prompt_service.search_library_page(
+        db_session, query="facetflt", filters=filters, facets=True
+    )
+
+    assert sorted(item["title"] for item in page["items"]) == ["Facetflt Alpha", "Facetflt Beta"]
+    assert counts(page["facets"]["item_type"]) == {"prompt": 2}
+    assert counts(page["facets"]["tag"]) == {"python": 2, "review": 1}
+
+    both_tags = LibraryFilters.build(tags=["python", "review"])
+    hits = await prompt_service.search_library(db_session, query="facetflt", filters=both_tags)
+    assert [prompt.name for prompt in hits] == ["facetflt-alpha"]
+
+
+async def test_fuzzy_fallback_applies_filters_and_counts_in_python(
+    db_session: AsyncSession,
+) -> None:
+    await seed(db_session, "quokka")
+
+    page = await prompt_service.search_library_page(
+        db_session,
+        query="quoka",
+        mode=SearchMode.FUZZY,
+        filters=LibraryFilters.build(item_types=["snippet", "faq"]),
+        facets=True,
+    )
+
+    assert sorted(item["title"] for item in page["items"]) == ["Quokka Delta", "Quokka Gamma"]
+    assert counts(page["facets"]["item_type"]) == {"snippet": 1, "faq": 1}
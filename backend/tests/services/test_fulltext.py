@@ -0,0 +1,9 @@
+from app.services import fulltext
+
+
+def test_build_tsquery_uses_prefix_terms() -> None:
+    assert fulltext.build_tsquery("Pyth  code-rev") == "'pyth':* & 'code':* & 'rev':*"
+
+
+def test_build_tsquery_ignores_punctuation_only_terms() -> None:
+    assert fulltext.build_tsquery("  ?! ") is None
@@ -0,0 +1,95 @@
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.prompt import PromptItemType
+from app.services import library_export, prompt_service
+from app.services.facets import LibraryFilters
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _seed(db: AsyncSession, marker: str, count: int) -> list:
+    prompts = []
+    for idx in range(count):
+        prompts.append(
+            await prompt_service.create_prompt(
+                db,
+                name=f"{marker}-{idx}",
+                display_name=f"Export {idx}",
+                description=None,
+                item_type=PromptItemType.SNIPPET if idx % 2 else PromptItemType.PROMPT,
+                tags=[marker, "export"],
+                content=f"body {idx} ✓",
+                notes=None,
+            )
+        )
+    await db.commit()
+    return prompts
+
+
+async def _collect(chunks) -> list[str]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_export_streams_batches_of_whole_lines(db_session: AsyncSession) -> None:
+    marker = f"exp-{uuid.uuid4().hex[:6]}"
+    prompts = await _seed(db_session, marker, 5)
+
+    chunks = await _collect(
+        library_export.ndjson_lines(db_session, filters=LibraryFilters.build(tags=[marker]), batch_size=2)
+    )
+
+    assert len(chunks) == 3
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [record["id"] for record in records] == [str(prompt.id) for prompt in prompts]
+    assert records[0]["tags"] == sorted([marker, "export"])
+    assert records[0]["current_version"]["content"] == "body 0 ✓"
+    assert records[0]["current_version"]["version_number"] == 1
+
+
+async def test_export_filters_by_item_type_and_updated_range(db_session: AsyncSession) -> None:
+    marker = f"exp-{uuid.uuid4().hex[:6]}"
+    prompts = await _seed(db_session, marker, 4)
+    base = datetime(1990, 1, 1, tzinfo=timezone.utc)
+    for idx, prompt in enumerate(prompts):
+        prompt.updated_at = base + timedelta(days=idx)
+    await db_session.commit()
+
+    snippets = await _collect(
+        library_export.ndjson_lines(
+            db_session, filters=LibraryFilters.build(item_types=["snippet"], tags=[marker])
+        )
+    )
+    assert [json.loads(line)["name"] for line in "".join(snippets).splitlines()] == [
+        f"{marker}-1",
+        f"{marker}-3",
+    ]
+
+    ranged = await _collect(
+        library_export.ndjson_lines(
+            db_session,
+            filters=LibraryFilters.build(tags=[marker]),
+            updated_after=base + timedelta(days=1),
+            updated_before=base + timedelta(days=3),
+        )
+    )
+    assert [json.loads(line)["name"] for line in "".join(ranged).splitlines()] == [
+        f"{marker}-1",
+        f"{marker}-2",
+    ]
+
+
+async def test_gzip_chunks_produce_one_valid_member() -> None:
+    async def text():
+        for idx in range(100):
+            yield f'{{"n":{idx}}}\n'
+
+    compressed = b"".join(await _collect(library_export.gzip_chunks(text())))
+
+    assert gzip.decompress(compressed).decode().splitlines()[-1] == '{"n":99}'
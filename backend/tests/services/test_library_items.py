@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.library import LibraryItem
+from app.models.prompt import PromptTag
+from app.services import library_items, prompt_service
+from app.services.facets import LibraryFilters
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _create(db: AsyncSession, name: str, **extra):
+    return await prompt_service.create_prompt(
+        db, name=name, display_name=name.title(), description=None, content=f"{name} v1", notes=None, **extra
+    )
+
+
+async def _item(db: AsyncSession, prompt_id) -> LibraryItem:
+    result = await db.execute(
+        select(LibraryItem).where(LibraryItem.id == prompt_id).execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def test_created_prompt_has_a_library_item(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    prompt = await _create(db_session, f"items-new-{marker}", tags=["zeta", marker, "alpha"])
+    await db_session.commit()
+
+    item = await _item(db_session, prompt.id)
+    assert item.title == prompt.display_name
+    assert item.tags == sorted(["zeta", marker, "alpha"])
+    assert (item.version, item.version_id, item.content) == (1, prompt.current_version_id, f"items-new-{marker} v1")
+    assert item.status == "active"
+
+
+async def test_orm_writes_refresh_the_item_in_the_same_transaction(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    prompt = await _create(db_session, f"items-orm-{marker}", tags=["first"])
+    await db_session.commit()
+    prompt_id, title = prompt.id, prompt.display_name
+
+    prompt.display_name = f"Renamed {marker}"
+    db_session.add(PromptTag(prompt_id=prompt.id, tag="second"))
+    prompt.current_version.content = "edited body"
+    await db_session.flush()
+
+    item = await _item(db_session, prompt.id)
+    assert (item.title, item.tags, item.content) == (f"Renamed {marker}", ["first", "second"], "edited body")
+
+    await db_session.rollback()
+    item = await _item(db_session, prompt_id)
+    assert (item.title, item.tags) == (title, ["first"])
+
+
+async def test_rebuild_restores_missing_and_stale_items(db_session: AsyncSession) -> None:
+    marker = uuid.uuid4().hex[:8]
+    kept = await _create(db_session, f"items-rebuild-a-{marker}")
+    lost = await _create(db_session, f"items-rebuild-b-{marker}")
+    await db_session.commit()
+    await db_session.execute(delete(LibraryItem).where(LibraryItem.id == lost.id))
+    await db_session.execute(LibraryItem.__table__.update().where(LibraryItem.id == kept.id).values(title="stale"))
+    await db_session.commit()
+
+    count = await library_items.rebuild(db_session)
+    await db_session.commit()
+
+    assert count >= 2
+    assert (await _item(db_session, lost.id)).title == lost.display_name
+    assert (await _item(db_session, kept.id)).title == kept.display_name
+
+
+async def test_search_reads_the_read_model_in_one_query(db_session: AsyncSession, test_engine) -> None:
+    marker = uuid.uuid4().hex[:8]
+    for idx in range(3):
+        await _create(db_session, f"items-search-{marker}-{idx}", tags=[marker, "shared"])
+    await db_session.commit()
+
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        hits = await prompt_service.search_library(
+            db_session, query=marker, limit=10, filters=LibraryFilters.build(tags=["shared"])
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert "library_items" in statements[0] and "prompt_versions" not in statements[0]
+    assert sorted(doc.name for doc in hits) == [f"items-search-{marker}-{idx}" for idx in range(3)]
+    assert all(doc.tags == tuple(sorted([marker, "shared"])) for doc in hits)
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+
+from app.models.prompt import Prompt
+from app.services import pagination
+
+
+def test_cursor_round_trip_is_opaque_and_url_safe() -> None:
+    keyset = (datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc), uuid.uuid4())
+    token = pagination.encode_cursor(*keyset)
+
+    assert pagination.decode_cursor(token) == keyset
+    assert "=" not in token and "/" not in token and "+" not in token
+
+
+@pytest.mark.parametrize("token", ["", "garbage", "Zm9v", "MjAyNC0wNi0wMXxub3QtYS11dWlk"])
+def test_decode_rejects_malformed_cursors(token: str) -> None:
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.decode_cursor(token)
+
+
+def test_seek_uses_a_row_value_predicate_and_fetches_one_extra_row() -> None:
+    keyset = (datetime(2024, 6, 1, tzinfo=timezone.utc), uuid.uuid4())
+    stmt = pagination.seek(select(Prompt.id), Prompt.updated_at, Prompt.id, after=keyset, limit=20)
+    sql = str(stmt.compile(dialect=sqlite.dialect()))
+
+    assert "(prompts.updated_at, prompts.id) < (?, ?)" in sql
+    assert "ORDER BY prompts.updated_at DESC, prompts.id DESC" in sql
+    assert stmt._limit == 21
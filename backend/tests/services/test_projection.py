@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.prompt import PromptResponse
+from app.services import projection, prompt_service
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_parse_always_keeps_id_and_expands_nested_fields() -> None:
+    assert projection.parse_prompt_fields(None) is None
+    assert projection.parse_prompt_fields(" ") is None
+
+    fieldset = projection.parse_prompt_fields("display_name, tags,current_version.version_number")
+    assert fieldset.fields == {"id", "display_name", "tags", "current_version"}
+    assert fieldset.version_fields == {"id", "version_number"}
+
+    whole = projection.parse_prompt_fields("current_version")
+    assert whole.version_fields == projection.VERSION_FIELDS
+
+
+@pytest.mark.parametrize("spec", ["nope", "current_version.nope", "tags.name"])
+async def test_parse_rejects_unknown_fields(spec: str) -> None:
+    with pytest.raises(projection.InvalidFields):
+        projection.parse_prompt_fields(spec)
+
+
+async def test_library_fields_have_no_nested_version() -> None:
+    assert projection.parse_library_fields("title,tags").fields == {"id", "title", "tags"}
+    with pytest.raises(projection.InvalidFields):
+        projection.parse_library_fields("current_version.content")
+
+
+async def test_sparse_list_selects_only_the_requested_columns(db_session: AsyncSession, test_engine) -> None:
+    marker = uuid.uuid4().hex[:8]
+    created = await prompt_service.create_prompt(
+        db_session,
+        name=f"projection-{marker}",
+        display_name="Projection",
+        description="long description",
+        content="heavy body",
+        notes=None,
+        tags=["proj"],
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        fieldset = projection.parse_prompt_fields("display_name,tags")
+        page = await prompt_service.list_prompt_page(db_session, limit=5, fields=fieldset)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    sql = "\n".join(statements)
+    assert "prompts.description" not in sql
+    assert "prompt_versions" not in sql
+    assert "prompt_tags" in sql
+    item = next(item for item in page["items"] if item["id"] == created.id)
+    assert item == {"id": created.id, "display_name": "Projection", "tags": ["proj"]}
+
+
+async def test_full_get_reads_content_and_bare_get_skips_it(db_session: AsyncSession, test_engine) -> None:
+    created = await prompt_service.create_prompt(
+        db_session,
+        name=f"projection-get-{uuid.uuid4().hex[:8]}",
+        display_name="Projection Get",
+        description=None,
+        content="deferred body",
+        notes="deferred notes",
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        fieldset = projection.parse_prompt_fields("current_version.version_number")
+        sparse = await prompt_service.get_prompt(db_session, created.id, fieldset)
+        payload = projection.prompt_payload(sparse, fieldset)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    sql = "\n".join(statements)
+    assert "content_blobs" not in sql
+    assert "prompt_tags" not in sql
+    assert payload == {"id": created.id, "current_version": {"id": created.current_version_id, "version_number": 1}}
+
+    db_session.expunge_all()
+    full = await prompt_service.get_prompt(db_session, created.id)
+    assert full.current_version.content == "deferred body"
+    # Columns no response needs stay deferred.
+    assert {"notes", "input_schema", "parameters"} <= inspect(full.current_version).unloaded
+
+
+async def test_full_payload_matches_the_response_model(db_session: AsyncSession) -> None:
+    created = await prompt_service.create_prompt(
+        db_session,
+        name=f"payload-{uuid.uuid4().hex[:8]}",
+        display_name="Payload",
+        description=None,
+        tags=["b", "a"],
+        content="body",
+        notes=None,
+    )
+    prompt = await prompt_service.get_prompt(db_session, created.id)
+
+    payload = projection.prompt_payload(prompt, None)
+    assert PromptResponse.model_validate(payload).model_dump() == PromptResponse.model_validate(prompt).model_dump()
+    assert set(payload) == projection.PROMPT_FIELDS
@@ -2,10 +2,11 @@ from datetime import datetime, timedelta, timezone
 import uuid
 
 import pytest
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.prompt import PromptItemType, PromptStatus, PromptVersionStatus
-from app.services import prompt_service
+from app.services import pagination, prompt_service
 
 pytestmark = pytest.mark.asyncio
 
@@ -34,6 +35,44 @@ async def test_create_prompt_sets_defaults(db_session: AsyncSession) -> None:
     assert prompt.current_version.approved_at is not None
 
 
+async def test_create_prompt_writes_each_table_once_and_reads_nothing_back(
+    db_session: AsyncSession, test_engine
+) -> None:
+    marker = uuid.uuid4().hex[:8]
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        prompt = await prompt_service.create_prompt(
+            db_session,
+            name=f"svc-single-{marker}",
+            display_name="Single Round Trip",
+            description=None,
+            tags=["one", "two", "one"],
+            content="body",
+            notes=None,
+        )
+        await db_session.commit()
+        # Everything the response needs is already on the returned object.
+        assert prompt.current_version.content == "body"
+        assert prompt.tags == ["one", "two"]
+        assert prompt.current_version_id == prompt.current_version.id
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+    # The body, prompts, prompt_versions, prompt_tags (one executemany), the read model and the change log.
+    assert [statement.split()[2] for statement in statements] == [
+        "content_blobs",
+        "prompts",
+        "prompt_versions",
+        "prompt_tags",
+        "library_items",
+        "library_changes",
+    ]
+    stored = await prompt_service.get_prompt(db_session, prompt.id)
+    assert stored is prompt
+
+
 async def test_get_prompt_returns_none_for_missing(db_session: AsyncSession) -> None:
     result = await prompt_service.get_prompt(db_session, uuid.uuid4())
     assert result is None
@@ -87,3 +126,102 @@ async def test_search_library_matches_tags_and_content(db_session: AsyncSession)
     hits = await prompt_service.search_library(db_session, query="testing", limit=10)
     assert hits
     assert hits[0].display_name == "QA Checklist"
+
+
+async def test_search_library_ranks_beyond_recency_window(db_session: AsyncSession) -> None:
+    now = datetime.now(timezone.utc)
+    best = await prompt_service.create_prompt(
+        db_session,
+        name="rank-title-hit",
+        display_name="Deploy Runbook",
+        description=None,
+        item_type=PromptItemType.PROMPT,
+        tags=[],
+        content="steps",
+        notes=None,
+    )
+    best.updated_at = now - timedelta(days=30)
+    for idx in range(4):
+        newer = await prompt_service.create_prompt(
+            db_session,
+            name=f"rank-body-hit-{idx}",
+            display_name=f"Release Note {idx}",
+            description=None,
+            item_type=PromptItemType.PROMPT,
+            tags=[],
+            content="mentions deploy runbook in passing",
+            notes=None,
+        )
+        newer.updated_at = now + timedelta(seconds=idx)
+    await db_session.commit()
+
+    hits = await prompt_service.search_library(db_session, query="deploy runbook", limit=1)
+    assert [p.name for p in hits] == ["rank-title-hit"]
+
+
+
+async def test_list_prompts_keyset_pages_cover_ties_exactly_once(db_session: AsyncSession) -> None:
+    # Every row shares one timestamp, far in the future so nothing else sorts ahead of it.
+    tied_at = datetime(2999, 1, 1, tzinfo=timezone.utc)
+    created = []
+    for idx in range(7):
+        prompt = await prompt_service.create_prompt(
+            db_session,
+            name=f"keyset-{idx}",
+            display_name=f"Keyset {idx}",
+            description=None,
+            content="body",
+            notes=None,
+        )
+        prompt.updated_at = tied_at
+        created.append(prompt.id)
+    await db_session.commit()
+
+    seen, after = [], None
+    for _ in range(4):
+        items, cursor = await prompt_service.list_prompts(db_session, limit=3, after=after)
+        seen.extend(p.id for p in items if p.id in created)
+        if cursor is None:
+            break
+        after = pagination.decode_cursor(cursor)
+        if len(seen) == len(created):
+            break
+
+    assert sorted(seen) == sorted(created)
+    assert seen == sorted(created, reverse=True)  # id breaks the tie, newest-first order
+
+
+async def test_list_prompts_pages_stay_stable_when_rows_are_written(db_session: AsyncSession) -> None:
+    # Later than the rows of the test above, so these sort first.
+    base = datetime(3000, 1, 1, tzinfo=timezone.utc)
+    for idx in range(4):
+        prompt = await prompt_service.create_prompt(
+            db_session,
+            name=f"stable-{idx}",
+            display_name=f"Stable {idx}",
+            description=None,
+            content="body",
+            notes=None,
+        )
+        prompt.updated_at = base + timedelta(seconds=idx)
+    await db_session.commit()
+
+    first, cursor = await prompt_service.list_prompts(db_session, limit=2)
+    assert [p.name for p in first] == ["stable-3", "stable-2"]
+
+    # A new write lands on "page 1"; it must not shift what page 2 returns.
+    newcomer = await prompt_service.create_prompt(
+        db_session,
+        name="stable-new",
+        display_name="Stable New",
+        description=None,
+        content="body",
+        notes=None,
+    )
+    newcomer.updated_at = base + timedelta(minutes=5)
+    await db_session.commit()
+
+    second, _ = await prompt_service.list_prompts(
+        db_session, limit=2, after=pagination.decode_cursor(cursor)
+    )
+    assert [p.name for p in second] == ["stable-1", "stable-0"]
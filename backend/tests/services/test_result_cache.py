@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+
+from app.services.result_cache import ResultCache
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def counting(value):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return value
+
+    return compute, calls
+
+
+async def test_hits_until_generation_bump() -> None:
+    cache = ResultCache()
+    compute, calls = counting(["a"])
+
+    assert await cache.get_or_compute("k", compute) == ["a"]
+    assert await cache.get_or_compute("k", compute) == ["a"]
+    assert len(calls) == 1
+
+    cache.bump()
+    await cache.get_or_compute("k", compute)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+async def test_entries_expire_after_ttl() -> None:
+    clock = FakeClock()
+    cache = ResultCache(ttl_seconds=5, clock=clock)
+    compute, calls = counting(1)
+
+    await cache.get_or_compute("k", compute)
+    clock.now = 4.9
+    await cache.get_or_compute("k", compute)
+    clock.now = 5.1
+    await cache.get_or_compute("k", compute)
+
+    assert len(calls) == 2
+
+
+async def test_replica_reads_are_not_stored_right_after_a_write() -> None:
+    clock = FakeClock()
+    cache = ResultCache(ttl_seconds=30, replica_lag_seconds=5, clock=clock)
+    compute, calls = counting("replica")
+    clock.now = 100.0
+    cache.bump()
+
+    await cache.get_or_compute("k", compute, replica=True)
+    await cache.get_or_compute("k", compute, replica=True)
+    assert len(calls) == 2
+    await cache.get_or_compute("primary", compute)
+    assert cache.stats()["entries"] == 1
+
+    clock.now = 105.1
+    await cache.get_or_compute("k", compute, replica=True)
+    await cache.get_or_compute("k", compute, replica=True)
+    assert len(calls) == 4
+
+
+async def test_evicts_least_recently_used() -> None:
+    cache = ResultCache(max_entries=2)
+    for key in ("a", "b"):
+        await cache.get_or_compute(key, counting(key)[0])
+    await cache.get_or_compute("a", counting("a")[0])  # refresh "a"
+    await cache.get_or_compute("c", counting("c")[0])
+
+    compute_b, calls_b = counting("b")
+    await cache.get_or_compute("b", compute_b)
+    assert calls_b == [1]
+    assert cache.stats()["evictions"] >= 1
+
+
+async def test_concurrent_misses_share_one_computation() -> None:
+    cache = ResultCache()
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(200)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 200
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 199
+
+
+async def test_failure_propagates_to_waiters_and_is_not_cached() -> None:
+    cache = ResultCache()
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    tasks = [asyncio.create_task(cache.get_or_compute("k", fail)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    compute, calls = counting("ok")
+    assert await cache.get_or_compute("k", compute) == "ok"
+    assert calls == [1]
+
+
+async def test_cancelled_leader_does_not_cancel_waiters() -> None:
+    cache = ResultCache()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+        return "never"
+
+    leader = asyncio.create_task(cache.get_or_compute("k", slow))
+    await started.wait()
+    compute, calls = counting("fresh")
+    follower = asyncio.create_task(cache.get_or_compute("k", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "fresh"
+    assert calls == [1]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_result_computed_across_a_write_is_not_stored() -> None:
+    cache = ResultCache()
+
+    async def racing():
+        cache.bump()  # a write commits while the query runs
+        return "stale"
+
+    assert await cache.get_or_compute("k", racing) == "stale"
+    assert cache.stats()["entries"] == 0
+
+
+async def test_disabled_cache_always_computes() -> None:
+    cache = ResultCache(max_entries=0)
+    compute, calls = counting(1)
+
+    await cache.get_or_compute("k", compute)
+    await cache.get_or_compute("k", compute)
+
+    assert len(calls) == 2
@@ -0,0 +1,152 @@
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.library import LibraryItem
+from app.models.prompt import PromptItemType
+from app.services import prompt_service, search_index as search_index_module
+from app.services.facets import LibraryFilters
+from app.services.library_events import LibraryDocument
+from app.services.search_index import SearchIndex, library_index
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def make_doc(title: str, *, tags=(), content: str = "", status: str = "active", age: int = 0):
+    return LibraryDocument(
+        id=uuid.uuid4(),
+        name=title.lower().replace(" ", "-"),
+        display_name=title,
+        description=None,
+        item_type="prompt",
+        status=status,
+        tags=tuple(tags),
+        version=1,
+        content=content,
+        created_at=NOW - timedelta(days=age),
+        updated_at=NOW - timedelta(days=age),
+    )
+
+
+def build(*docs: LibraryDocument) -> SearchIndex:
+    index = SearchIndex()
+    index.ready = True
+    index.apply(docs)
+    return index
+
+
+def test_title_hits_outrank_body_hits() -> None:
+    body = make_doc("Release Notes", content="deploy steps for the service", age=0)
+    title = make_doc("Deploy Runbook", content="steps", age=10)
+    index = build(body, title)
+
+    assert [doc.id for doc in index.search("deploy")] == [title.id, body.id]
+
+
+def test_trailing_token_matches_as_prefix() -> None:
+    doc = make_doc("Python Code Review", tags=["python"])
+    index = build(doc, make_doc("Incident Debug"))
+
+    assert [d.id for d in index.search("pyth")] == [doc.id]
+
+
+def test_upsert_and_archive_update_postings_incrementally() -> None:
+    doc = make_doc("QA Checklist", tags=["qa"])
+    index = build(doc)
+
+    renamed = replace(doc, name="release-gate", display_name="Release Gate", version=2)
+    index.apply([renamed])
+    assert index.search("checklist") == []
+    assert [d.version for d in index.search("gate")] == [2]
+
+    # Archived prompts stay searchable, as in SQL, unless a status filter excludes them.
+    index.apply([replace(renamed, status="archived")])
+    assert len(index) == 1
+    assert [d.status for d in index.search("gate")] == ["archived"]
+    assert index.search("gate", filters=LibraryFilters.build(statuses=["active"])) == []
+
+
+def test_compaction_keeps_the_vocabulary_sorted(monkeypatch) -> None:
+    monkeypatch.setattr(search_index_module, "_COMPACT_MIN_DEAD", 2)
+    docs = [make_doc(title) for title in ("Zebra Notes", "Alpha Draft", "Migration Plan", "Beta Review")]
+    index = build(*docs)
+
+    index.apply([replace(doc, version=2) for doc in docs[:2]])
+    assert index._dead == 0
+    assert index._vocabulary == sorted(index._vocabulary)
+    assert [d.version for d in index.search("zeb")] == [2]
+    assert [d.id for d in index.search("migr")] == [docs[2].id]
+
+
+@pytest.mark.asyncio
+async def test_loaded_index_matches_sql_for_archived_prompts(db_session: AsyncSession) -> None:
+    marker = f"archivedzz{uuid.uuid4().hex[:6]}"
+    prompt = await prompt_service.create_prompt(
+        db_session, name=marker, display_name=marker, description=None, content="x", notes=None
+    )
+    await db_session.execute(update(LibraryItem).where(LibraryItem.id == prompt.id).values(status="archived"))
+    await db_session.commit()
+
+    index = SearchIndex()
+    await index.load(db_session)
+    in_sql = await prompt_service.search_library(db_session, query=marker)
+
+    assert [doc.id for doc in index.search(marker)] == [doc.id for doc in in_sql] == [prompt.id]
+    assert index.search_with_facets(marker)[1]["status"] == [{"value": "archived", "count": 1}]
+
+
+def test_empty_query_returns_most_recent_first() -> None:
+    old, new = make_doc("Old", age=5), make_doc("New", age=1)
+    index = build(old, new)
+
+    assert [doc.id for doc in index.search("", limit=1)] == [new.id]
+
+
+@pytest.mark.asyncio
+async def test_search_items_served_from_index_after_commit(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_settings(), "search_index_enabled", True)
+    monkeypatch.setattr(library_index, "ready", False)
+    await library_index.load(db_session)
+
+    await prompt_service.create_prompt(
+        db_session,
+        name="index-incremental",
+        display_name="Quarterly Planning Zebra",
+        description=None,
+        item_type=PromptItemType.PROMPT,
+        tags=["planning"],
+        content="plan the quarter",
+        notes=None,
+    )
+    # Not visible until the transaction commits.
+    page = await prompt_service.search_library_page(db_session, query="zebra")
+    assert page["items"] == []
+    await db_session.commit()
+
+    page = await prompt_service.search_library_page(db_session, query="zebra")
+    assert [item["title"] for item in page["items"]] == ["Quarterly Planning Zebra"]
+
+
+def test_filters_and_facets_cover_every_match() -> None:
+    review = make_doc("Python Review", tags=["python", "review"])
+    lint = make_doc("Python Lint", tags=["python"])
+    snippet = replace(make_doc("Python Snippet", tags=["python"]), item_type="snippet")
+    index = build(review, lint, snippet, make_doc("Go Review", tags=["go"]))
+
+    docs, facets = index.search_with_facets("python", limit=1)
+    assert len(docs) == 1
+    assert facets["item_type"] == [
+        {"value": "prompt", "count": 2},
+        {"value": "snippet", "count": 1},
+    ]
+    assert facets["tag"][0] == {"value": "python", "count": 3}
+
+    filters = LibraryFilters.build(item_types=["prompt"], tags=["review"])
+    assert [doc.id for doc in index.search("python", filters=filters)] == [review.id]
@@ -0,0 +1,38 @@
+from app.services.snippets import ELLIPSIS, SNIPPET_WIDTH, extract
+
+FILLER = "unrelated filler sentence. " * 40
+
+
+def test_window_covers_the_densest_cluster_of_distinct_terms() -> None:
+    text = FILLER + "python appears alone. " + FILLER + "A python code review checklist. " + FILLER
+    snippet = extract(text, ("python", "review"))
+
+    assert snippet.text.startswith(ELLIPSIS) and snippet.text.endswith(ELLIPSIS)
+    assert len(snippet.text) <= SNIPPET_WIDTH + 2
+    assert "python code review checklist" in snippet.text
+    assert [snippet.text[s:e] for s, e in snippet.highlights] == ["python", "review"]
+
+
+def test_highlights_whole_words_for_prefix_tokens() -> None:
+    snippet = extract("Reviewing Pythonic code", ("pyth", "review"))
+
+    assert snippet.text == "Reviewing Pythonic code"
+    assert [snippet.text[s:e] for s, e in snippet.highlights] == ["Reviewing", "Pythonic"]
+
+
+def test_without_a_match_returns_the_leading_window() -> None:
+    snippet = extract(FILLER, ("absent",))
+
+    assert snippet.highlights == []
+    assert FILLER.startswith(snippet.text.removesuffix(ELLIPSIS))
+    assert len(snippet.text) <= SNIPPET_WIDTH + 1
+    assert extract("short body", ()).text == "short body"
+
+
+def test_a_match_wider_than_the_window_is_cut_to_it() -> None:
+    for text, token in (("x " + "a" * 200, "a"), ("see " + "b" * 170, "b"), ("b" * 170 + " see b", "b")):
+        snippet = extract(text, (token,))
+
+        assert len(snippet.text) <= SNIPPET_WIDTH + 2
+        start, end = snippet.highlights[0]
+        assert snippet.text[start:end] == token * (end - start) and end - start == SNIPPET_WIDTH
@@ -0,0 +1,91 @@
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.library_events import LibraryDocument
+from app.services.suggest_index import SuggestIndex
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def make_doc(title: str, *, tags=(), age: int = 0, status: str = "active") -> LibraryDocument:
+    return LibraryDocument(
+        id=uuid.uuid4(),
+        name=title.lower().replace(" ", "-"),
+        display_name=title,
+        description=None,
+        item_type="prompt",
+        status=status,
+        tags=tuple(tags),
+        version=1,
+        content="",
+        created_at=NOW,
+        updated_at=NOW - timedelta(days=age),
+    )
+
+
+def build(*docs: LibraryDocument) -> SuggestIndex:
+    index = SuggestIndex(lambda: None)
+    index.ready = True
+    index.apply(list(docs))
+    return index
+
+
+def test_matches_title_words_names_and_tags_by_prefix() -> None:
+    review = make_doc("Python Code Review", tags=["quality"])
+    debug = make_doc("Incident Debug", tags=["sre"])
+    index = build(review, debug)
+
+    assert [s.id for s in index.suggest("rev")] == [review.id]
+    assert [s.id for s in index.suggest("incident-d")] == [debug.id]
+    assert [s.id for s in index.suggest("SR")] == [debug.id]
+    assert index.suggest("zzz") == []
+
+
+def test_results_are_top_k_by_score_without_duplicates() -> None:
+    old = make_doc("Release Review", tags=["release"], age=3)
+    new = make_doc("Release Gate", tags=["release"], age=1)
+    index = build(old, new, make_doc("Other"))
+
+    assert [s.id for s in index.suggest("rel", limit=1)] == [new.id]
+    assert [s.id for s in index.suggest("rel")] == [new.id, old.id]
+
+
+def test_writes_invalidate_memoised_prefixes() -> None:
+    gate = make_doc("Release Gate", age=2)
+    index = build(gate)
+    assert [s.title for s in index.suggest("rel")] == ["Release Gate"]
+
+    index.apply([make_doc("Release Train", age=1)])
+    assert [s.title for s in index.suggest("rel")] == ["Release Train", "Release Gate"]
+
+    index.apply([replace(gate, name="gate-check", display_name="Gate Check")])
+    assert [s.title for s in index.suggest("rel")] == ["Release Train"]
+
+
+def test_archived_prompts_stay_suggestible_like_keyword_search() -> None:
+    gate = make_doc("Release Gate")
+    index = build(gate)
+
+    index.apply([replace(gate, status="archived")])
+    assert [s.id for s in index.suggest("rel")] == [gate.id]
+
+
+@pytest.mark.asyncio
+async def test_writes_committed_during_load_are_replayed(db_session: AsyncSession) -> None:
+    index = SuggestIndex(lambda: None)
+    train = make_doc(f"Replayed {uuid.uuid4().hex}")
+    execute = db_session.execute
+
+    async def execute_then_commit_elsewhere(*args, **kwargs):
+        result = await execute(*args, **kwargs)
+        index.apply([train])
+        return result
+
+    db_session.execute = execute_then_commit_elsewhere
+    await index.load(db_session)
+
+    assert [s.id for s in index.suggest(train.display_name)] == [train.id]
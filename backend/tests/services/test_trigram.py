@@ -0,0 +1,20 @@
+import pytest
+
+from app.services import trigram
+
+
+def test_trigrams_match_pg_trgm_padding() -> None:
+    assert trigram.trigrams("Cat") == {"  c", " ca", "cat", "at "}
+
+
+def test_similarity_is_symmetric_jaccard() -> None:
+    assert trigram.similarity("review", "review") == 1.0
+    assert trigram.similarity("revew", "review") == pytest.approx(trigram.similarity("review", "revew"))
+    assert trigram.similarity("", "review") == 0.0
+
+
+def test_word_similarity_tolerates_typos_across_words() -> None:
+    score = trigram.word_similarity("pyhton revew", "Python Code Review")
+
+    assert score >= trigram.DEFAULT_THRESHOLD
+    assert trigram.word_similarity("deploy", "Python Code Review") < trigram.DEFAULT_THRESHOLD
@@ -0,0 +1,109 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.usage import UsageClientType, UsageEvent
+from app.schemas.usage import UsageEventCreate
+from app.services import prompt_service, usage_ingest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _events(db: AsyncSession, count: int) -> tuple[str, list[dict]]:
+    marker = uuid.uuid4().hex[:8]
+    prompt = await prompt_service.create_prompt(
+        db, name=f"usage-{marker}", display_name="Usage", description=None, content="body", notes=None
+    )
+    await db.commit()
+    event = UsageEventCreate(
+        prompt_id=prompt.id, version_id=prompt.current_version_id, client_type=UsageClientType.CODEX, project_key=marker
+    )
+    return marker, usage_ingest.rows([event] * count)
+
+
+async def _stored(db: AsyncSession, marker: str) -> int:
+    return await db.scalar(select(func.count()).select_from(UsageEvent).where(UsageEvent.project_key == marker))
+
+
+def _buffer(test_engine, **options) -> usage_ingest.UsageBuffer:
+    sessions = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    return usage_ingest.UsageBuffer(lambda: sessions, **options)
+
+
+async def _until(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_a_full_batch_is_written_at_once(db_session: AsyncSession, test_engine) -> None:
+    marker, rows = await _events(db_session, 6)
+    buffer = _buffer(test_engine, batch_size=3, flush_interval_seconds=60)
+    try:
+        assert buffer.offer(rows)
+        await _until(lambda: buffer.written == 6)
+    finally:
+        await buffer.stop()
+
+    assert await _stored(db_session, marker) == 6
+    assert buffer.stats()["batches"] == 2
+
+
+async def test_batches_of_any_size_share_one_insert_statement(db_session: AsyncSession, test_engine) -> None:
+    marker, rows = await _events(db_session, 4)
+    buffer = _buffer(test_engine, batch_size=3, flush_interval_seconds=0.05)
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert buffer.offer(rows)
+        await _until(lambda: buffer.written == 4)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+        await buffer.stop()
+
+    inserts = {statement for statement in statements if statement.startswith("INSERT INTO usage_events")}
+    assert buffer.stats()["batches"] == 2 and len(inserts) == 1
+    assert await _stored(db_session, marker) == 4
+
+
+async def test_a_partial_batch_is_written_after_the_interval(db_session: AsyncSession, test_engine) -> None:
+    marker, rows = await _events(db_session, 2)
+    buffer = _buffer(test_engine, batch_size=100, flush_interval_seconds=0.05)
+    try:
+        assert buffer.offer(rows)
+        assert buffer.written == 0
+        await _until(lambda: buffer.written == 2)
+    finally:
+        await buffer.stop()
+
+    assert await _stored(db_session, marker) == 2
+
+
+async def test_a_request_that_does_not_fit_is_shed_whole(db_session: AsyncSession, test_engine) -> None:
+    marker, rows = await _events(db_session, 3)
+    buffer = _buffer(test_engine, max_events=2, batch_size=100, flush_interval_seconds=60)
+
+    assert buffer.offer(rows) is False
+    assert (buffer.pending, buffer.shed) == (0, 3)
+    assert buffer.offer(rows[:2]) is True
+    await buffer.stop()
+
+    assert await _stored(db_session, marker) == 2
+    assert buffer.stats()["accepted"] == 2
+
+
+async def test_stop_drains_everything_waiting(db_session: AsyncSession, test_engine) -> None:
+    marker, rows = await _events(db_session, 7)
+    buffer = _buffer(test_engine, batch_size=5, flush_interval_seconds=60)
+    buffer.offer(rows[:3])
+    buffer.offer(rows[3:])
+
+    await buffer.stop()
+
+    assert buffer.pending == 0
+    assert await _stored(db_session, marker) == 7
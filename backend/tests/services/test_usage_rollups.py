@@ -0,0 +1,123 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.usage import UsageClientType, UsageEvent, UsageRollupDaily, UsageRollupHourly
+from app.schemas.usage import UsageEventCreate, UsageGroupBy
+from app.services import prompt_service, usage_ingest, usage_rollups
+
+UTC = timezone.utc
+
+
+def test_segments_cover_the_range_once() -> None:
+    start = datetime(2024, 3, 1, 10, 30, tzinfo=UTC)
+    end = datetime(2024, 3, 5, 2, 15, tzinfo=UTC)
+    mark = datetime(2024, 3, 4, 20, tzinfo=UTC)
+
+    parts = usage_rollups.segments(start, end, mark)
+
+    assert [(source.__tablename__, lo, hi) for source, lo, hi in parts] == [
+        ("usage_events", start, datetime(2024, 3, 1, 11, tzinfo=UTC)),
+        ("usage_rollups_hourly", datetime(2024, 3, 1, 11, tzinfo=UTC), datetime(2024, 3, 2, tzinfo=UTC)),
+        ("usage_rollups_daily", datetime(2024, 3, 2, tzinfo=UTC), datetime(2024, 3, 4, tzinfo=UTC)),
+        ("usage_rollups_hourly", datetime(2024, 3, 4, tzinfo=UTC), mark),
+        ("usage_events", mark, end),
+    ]
+    assert [source.__tablename__ for source, _, _ in usage_rollups.segments(start, end, None)] == ["usage_events"] * 2
+    assert usage_rollups.segments(end, start, mark) == []
+
+
+def test_partition_months_reach_back_to_stray_default_rows() -> None:
+    now = datetime(2024, 11, 20, 8, tzinfo=UTC)
+
+    assert [lo.month for lo, _ in usage_rollups.partition_months(now, 2)] == [11, 12, 1]
+    months = usage_rollups.partition_months(now, 1, datetime(2024, 9, 30, 23, tzinfo=UTC))
+    assert [usage_rollups._partition_name(lo) for lo, _ in months] == [
+        "usage_events_p202409",
+        "usage_events_p202410",
+        "usage_events_p202411",
+        "usage_events_p202412",
+    ]
+    assert months[-1][1] == datetime(2025, 1, 1, tzinfo=UTC)
+    assert usage_rollups.partition_months(now, 0, datetime(2025, 3, 1, tzinfo=UTC)) == [
+        (datetime(2024, 11, 1, tzinfo=UTC), datetime(2024, 12, 1, tzinfo=UTC))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_summary_stitches_rollups_and_the_raw_tail(db_session: AsyncSession, test_engine) -> None:
+    marker = uuid.uuid4().hex[:8]
+    prompt = await prompt_service.create_prompt(
+        db_session, name=f"rollup-{marker}", display_name="Rollup", description=None, content="x", notes=None
+    )
+    await db_session.commit()
+    users = [uuid.uuid4(), None]
+    base = datetime(2021, 1, 1, tzinfo=UTC)
+    stamps = [base + timedelta(hours=7 * idx, minutes=idx) for idx in range(200)]  # ~58 days
+    for idx, stamp in enumerate(stamps):
+        user = users[idx % 2]
+        client = [UsageClientType.DESKTOP, UsageClientType.CODEX, UsageClientType.CLI][idx % 3]
+        created = UsageEventCreate(prompt_id=prompt.id, user_id=user, client_type=client)
+        await db_session.execute(insert(UsageEvent), usage_ingest.rows([created], stamp))
+    await db_session.commit()
+
+    now = base + timedelta(days=40, minutes=20)
+    mark = await usage_rollups.compact(db_session, now=now, lag_seconds=0)
+    assert mark == base + timedelta(days=40)
+    # A second run finds nothing new and must not count anything twice.
+    assert await usage_rollups.compact(db_session, now=now, lag_seconds=0) == mark
+
+    daily = await db_session.scalar(
+        select(func.sum(UsageRollupDaily.count)).where(UsageRollupDaily.prompt_id == prompt.id)
+    )
+    hourly = await db_session.scalar(
+        select(func.sum(UsageRollupHourly.count)).where(UsageRollupHourly.prompt_id == prompt.id)
+    )
+    assert daily == hourly == sum(stamp < mark for stamp in stamps)
+
+    start, end = base + timedelta(hours=5, minutes=30), base + timedelta(days=50, hours=3, minutes=10)
+    in_range = [idx for idx, stamp in enumerate(stamps) if start <= stamp < end]
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        by_client = await usage_rollups.summary(
+            db_session, start=start, end=end, group_by=UsageGroupBy.CLIENT_TYPE, prompt_id=prompt.id
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+    by_user = await usage_rollups.summary(db_session, start=start, end=end, group_by=UsageGroupBy.USER, prompt_id=prompt.id)
+
+    assert len(statements) == 2 and "usage_rollups_daily" in statements[1]
+    clients = Counter(["desktop", "codex", "cli"][idx % 3] for idx in in_range)
+    assert {item["key"]: item["count"] for item in by_client["items"]} == dict(clients)
+    assert by_client["total"] == len(in_range)
+    assert {item["key"]: item["count"] for item in by_user["items"]} == {
+        str(users[0]): sum(1 for idx in in_range if idx % 2 == 0),
+        None: sum(1 for idx in in_range if idx % 2 == 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_retention_only_removes_rolled_up_events(db_session: AsyncSession) -> None:
+    mark = await usage_rollups.watermark(db_session)
+    if mark is None:
+        pytest.skip("needs the rollup watermark from the stitching test")
+    marker = uuid.uuid4().hex[:8]
+    prompt = await prompt_service.create_prompt(
+        db_session, name=f"retention-{marker}", display_name="Retention", description=None, content="x", notes=None
+    )
+    old, fresh = mark - timedelta(days=2), mark + timedelta(hours=1)
+    event_in = UsageEventCreate(prompt_id=prompt.id, project_key=marker)
+    await db_session.execute(insert(UsageEvent), usage_ingest.rows([event_in], old) + usage_ingest.rows([event_in], fresh))
+    await db_session.commit()
+
+    await usage_rollups.apply_retention(db_session, now=mark + timedelta(days=365), retention_days=1)
+    await db_session.commit()
+
+    left = await db_session.scalars(select(UsageEvent.created_at).where(UsageEvent.project_key == marker))
+    assert [usage_rollups.floor_hour(value) for value in left] == [fresh]
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import uuid
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import embeddings, vector_index as vector_index_module
+from app.services.library_events import LibraryDocument
+from app.services.vector_index import VectorIndex
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def make_doc(title: str, content: str = "", *, status: str = "active") -> LibraryDocument:
+    return LibraryDocument(
+        id=uuid.uuid4(),
+        name=title.lower().replace(" ", "-"),
+        display_name=title,
+        description=None,
+        item_type="prompt",
+        status=status,
+        tags=(),
+        version=1,
+        content=content,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def build(*docs: LibraryDocument, path=None) -> VectorIndex:
+    index = VectorIndex(lambda: None, path)
+    index.build(list(docs))
+    return index
+
+
+CORPUS = [
+    make_doc("Python Code Review", "You are a senior Python reviewer. Review the code for bugs."),
+    make_doc("Incident Debug Template", "List likely failure domains and a minimal debug plan."),
+    make_doc("QA Checklist", "Generate a QA checklist covering functional and edge cases."),
+]
+
+
+def test_embeddings_are_deterministic_unit_vectors() -> None:
+    matrix = embeddings.embed(["review my PR", "review my PR"])
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (2, embeddings.DIMENSIONS)
+    assert np.allclose(matrix[0], matrix[1])
+    assert np.linalg.norm(matrix[0]) == pytest.approx(1.0, rel=1e-5)
+
+
+def test_semantic_search_matches_differently_worded_query() -> None:
+    index = build(*CORPUS)
+
+    hits = index.search("review my PR")
+    assert hits[0][0] == CORPUS[0].id
+
+
+def test_archived_documents_stay_searchable_like_keyword_search() -> None:
+    index = build(*CORPUS)
+    index.apply([replace(CORPUS[0], status="archived")])
+
+    assert len(index) == 3
+    assert index.search("review my PR")[0][0] == CORPUS[0].id
+
+
+@pytest.mark.asyncio
+async def test_load_embeds_off_the_event_loop_and_replays_writes(db_session: AsyncSession, monkeypatch) -> None:
+    index = VectorIndex(lambda: None)
+    late = make_doc(f"Late Arrival {uuid.uuid4().hex}", "Summarise the incident timeline.")
+    threads: list[int] = []
+    real_embed = embeddings.embed
+
+    def embed_and_record(texts):
+        threads.append(threading.get_ident())
+        return real_embed(texts)
+
+    execute = db_session.execute
+
+    async def execute_then_commit_elsewhere(*args, **kwargs):
+        result = await execute(*args, **kwargs)
+        index.apply([late])
+        return result
+
+    monkeypatch.setattr(embeddings, "embed", embed_and_record)
+    db_session.execute = execute_then_commit_elsewhere
+    await index.load(db_session)
+
+    assert threads[0] != threading.get_ident()
+    assert index.ready and late.id in index._row_by_id
+
+
+def test_persisted_vectors_are_reused_on_rebuild(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "vectors.npy"
+    build(*CORPUS, path=str(path))
+    assert path.exists()
+
+    embedded: list[str] = []
+    real_embed = embeddings.embed
+
+    def counting_embed(texts):
+        embedded.extend(texts)
+        return real_embed(texts)
+
+    monkeypatch.setattr(embeddings, "embed", counting_embed)
+    edited = replace(CORPUS[2], content="Checklist for release sign-off", updated_at=NOW.replace(day=2))
+    reloaded = build(CORPUS[0], CORPUS[1], edited, path=str(path))
+
+    assert embedded == [vector_index_module.document_text(edited)]
+    assert isinstance(reloaded._matrix, np.memmap)
+    assert reloaded.search("review my PR")[0][0] == CORPUS[0].id
+
+
+def test_ivf_partitions_still_find_nearest_rows(monkeypatch) -> None:
+    monkeypatch.setattr(vector_index_module, "IVF_MIN_ROWS", 50)
+    filler = [make_doc(f"Filler {i}", f"unrelated topic number {i}") for i in range(60)]
+    index = build(*CORPUS, *filler)
+
+    assert index._centroids is not None
+    assert index.search("python reviewer")[0][0] == CORPUS[0].id
+
+
+@pytest.mark.asyncio
+async def test_committed_writes_defer_metadata_saves_and_training(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(vector_index_module, "IVF_MIN_ROWS", 50)
+    index = build(*CORPUS, path=str(tmp_path / "vectors.npy"))
+    saved = (tmp_path / "vectors.meta.npz").stat().st_mtime_ns
+
+    filler = [make_doc(f"Filler {i}", f"unrelated topic number {i}") for i in range(60)]
+    index.apply(filler)
+    assert index._centroids is None and index._training is not None
+    assert (tmp_path / "vectors.meta.npz").stat().st_mtime_ns == saved
+
+    await index._training
+    await asyncio.sleep(0)
+    assert index._centroids is not None
+    assert index.search("python reviewer")[0][0] == CORPUS[0].id
+    index.flush()
+    assert len(VectorIndex(lambda: None, str(tmp_path / "vectors.npy"))._read_persisted()) == len(CORPUS) + len(filler)
+
+
+def test_only_one_process_maintains_a_shared_path(tmp_path) -> None:
+    path = str(tmp_path / "vectors.npy")
+    first = build(*CORPUS, path=path)
+    second = build(*CORPUS, path=path)
+
+    assert first._writable and not second._writable
+    assert isinstance(first._matrix, np.memmap) and not isinstance(second._matrix, np.memmap)
+    assert not list(tmp_path.glob("*.tmp.*"))
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_semantic_and_hybrid_modes(app_client: AsyncClient) -> None:
+    payload = {
+        "name": "semantic-code-review",
+        "display_name": "Semantic Code Review",
+        "description": "Review pull requests for correctness",
+        "item_type": "prompt",
+        "tags": [],
+        "content": "You are a senior reviewer of code changes.",
+        "notes": None,
+    }
+    assert (await app_client.post("/api/v1/prompts", json=payload)).status_code == 201
+
+    for mode in ("semantic", "hybrid"):
+        response = await app_client.get(
+            "/api/v1/prompts/search", params={"query": "reviewing my pull request", "mode": mode}
+        )
+        assert response.status_code == 200
+        assert "Semantic Code Review" in [item["title"] for item in response.json()["items"]]
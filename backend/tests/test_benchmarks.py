@@ -0,0 +1,75 @@
+import json
+
+from benchmarks import content, corpus, run, serializers, usage, workload
+
+
+def test_corpus_is_deterministic_and_varied() -> None:
+    first = list(corpus.generate(200, seed=3))
+    assert first == list(corpus.generate(200, seed=3))
+    assert first != list(corpus.generate(200, seed=4))
+
+    assert len({prompt.name for prompt in first}) == 200
+    assert any(len(prompt.versions) > 1 for prompt in first)
+    assert any(" · " in prompt.display_name for prompt in first)  # bilingual titles
+    assert {prompt.item_type for prompt in first} == {"prompt", "snippet", "faq"}
+
+
+def test_workload_mixes_prefix_bursts_misses_and_empty_queries() -> None:
+    queries = workload.generate(500)
+
+    assert queries == workload.generate(500)
+    kinds = {query.kind for query in queries}
+    assert {"prefix", "popular", "miss", "empty"} <= kinds
+    prefixes = [query.text for query in queries if query.kind == "prefix"]
+    assert any(len(text) == 1 for text in prefixes)
+
+
+def test_compare_flags_only_meaningful_p95_regressions() -> None:
+    baseline = {"modes": {"keyword": {"p95_ms": 10.0}, "fuzzy": {"p95_ms": 1.0}}}
+    report = {"modes": {"keyword": {"p95_ms": 14.0}, "fuzzy": {"p95_ms": 1.9}}}
+
+    assert run.compare(report, baseline, tolerance=0.25) == ["keyword: p95 10.0 ms -> 14.0 ms"]
+    assert run.percentile([5.0], 95) == 5.0
+
+
+def test_serializers_produce_the_same_document() -> None:
+    import msgpack
+
+    data = serializers.payload(30)
+    encoded = {name: serialize(data) for name, serialize in serializers.serializers().items()}
+
+    documents = [json.loads(body) for name, body in encoded.items() if not name.startswith("msgpack")]
+    documents.append(msgpack.unpackb(encoded["msgpack (trusted)"]))
+    assert all(document == documents[0] for document in documents)
+    assert documents[0]["items"][0]["created_at"].endswith("Z")
+
+
+def test_content_storage_counts_each_distinct_body_once() -> None:
+    long_body = "Review this pull request carefully. " * 40
+    report = content.storage([long_body, long_body, "short"])
+
+    assert (report["versions"], report["distinct_bodies"], report["compressed_bodies"]) == (3, 2, 1)
+    assert report["stored_ratio"] < 0.1
+
+
+def test_usage_events_are_deterministic_and_reference_the_targets() -> None:
+    import uuid
+
+    targets = [(uuid.uuid4(), uuid.uuid4()) for _ in range(3)]
+    events = usage.make_events(targets, 200, seed=1)
+
+    assert [event["prompt_id"] for event in events] == [event["prompt_id"] for event in usage.make_events(targets, 200, 1)]
+    assert {(event["prompt_id"], event["version_id"]) for event in events} <= set(targets)
+    assert len({event["client_type"] for event in events}) > 1
+
+
+def test_usage_history_spreads_events_over_the_range() -> None:
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    end = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    events = usage.make_history([(uuid.uuid4(), None)], 500, days=30, seed=1, end=end)
+
+    stamps = [event["created_at"] for event in events]
+    assert all(end - timedelta(days=30) <= stamp <= end for stamp in stamps)
+    assert len({stamp.date() for stamp in stamps}) > 20
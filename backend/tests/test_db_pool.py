@@ -0,0 +1,105 @@
+import logging
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import Settings
+from app.db import pool
+from app.db.pool import InstrumentedPool, PoolMetrics
+
+
+def test_engine_options_map_settings_onto_pool_and_asyncpg() -> None:
+    settings = Settings(
+        database_url="postgresql+asyncpg://u:p@db/prompts",
+        app_env="prod",
+        db_pool_size=4,
+        db_max_overflow=2,
+        db_statement_timeout_ms=5000,
+        db_statement_cache_size=0,
+    )
+
+    options = pool.engine_options(settings)
+
+    assert options["poolclass"] is InstrumentedPool
+    assert (options["pool_size"], options["max_overflow"], options["pool_pre_ping"]) == (4, 2, True)
+    connect_args = options["connect_args"]
+    assert connect_args["server_settings"]["statement_timeout"] == "5000"
+    assert connect_args["statement_cache_size"] == connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["command_timeout"] == 60.0
+
+    engine = create_async_engine(settings.database_url, **options)
+    assert isinstance(engine.pool, InstrumentedPool)
+    assert engine.pool.size() == 4
+
+
+def test_engine_options_leave_sqlite_on_its_default_pool() -> None:
+    options = pool.engine_options(Settings(database_url="sqlite+aiosqlite:///:memory:", app_env="test"))
+    assert options == {"echo": False, "future": True}
+
+
+def test_wait_histogram_buckets_and_slow_checkout_log(caplog: pytest.LogCaptureFixture) -> None:
+    metrics = PoolMetrics(slow_checkout_ms=50)
+    engine = create_async_engine("postgresql+asyncpg://u:p@db/prompts", poolclass=InstrumentedPool)
+    with caplog.at_level(logging.WARNING, logger="app.db.pool"):
+        for waited in (0.2, 3, 3, 80, 9000):
+            metrics.observe_wait(engine.pool, waited)
+
+    stats = metrics.stats(engine.pool)
+    buckets = stats["wait_ms"]["buckets"]
+    assert (buckets["le_1"], buckets["le_5"], buckets["le_100"], buckets["inf"]) == (1, 2, 1, 1)
+    assert stats["wait_ms"]["count"] == 5
+    assert stats["wait_ms"]["max"] == 9000
+    assert stats["slow_checkouts"] == 2
+    assert len(caplog.records) == 2
+    assert "Pool size: 5" in caplog.records[0].getMessage()
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_records_waits_timeouts_and_events(tmp_path) -> None:
+    metrics = PoolMetrics()
+    pool_class = type("TestPool", (InstrumentedPool,), {"metrics": metrics})
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=pool_class,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    pool.instrument(engine, metrics)
+
+    async with engine.connect() as held:
+        await held.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect() as blocked:
+                await blocked.execute(text("select 1"))
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+
+    stats = metrics.stats(engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms"]["count"] == 3
+    assert stats["wait_ms"]["max"] >= 50
+    assert (stats["connects"], stats["checkouts"], stats["checkins"]) == (1, 2, 2)
+    assert (stats["size"], stats["checkedout"]) == (1, 0)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_each_instrumented_engine_reports_to_its_own_metrics(tmp_path) -> None:
+    engines, metrics = [], [PoolMetrics(), PoolMetrics()]
+    for name, own in zip(("primary", "replica"), metrics):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db", poolclass=InstrumentedPool)
+        pool.instrument(engine, own)
+        engines.append(engine)
+
+    async with engines[1].connect() as conn:
+        await conn.execute(text("select 1"))
+    await engines[1].dispose()  # recreates the pool
+    async with engines[1].connect() as conn:
+        await conn.execute(text("select 1"))
+
+    assert (metrics[0].checkouts, metrics[0].wait_count) == (0, 0)
+    assert (metrics[1].checkouts, metrics[1].wait_count) == (2, 2)
+    for engine in engines:
+        await engine.dispose()
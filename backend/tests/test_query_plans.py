@@ -0,0 +1,69 @@
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks import plans
+
+pytestmark = pytest.mark.asyncio
+
+# A scratch Postgres database for the plan check; its tables are dropped and reseeded.
+POSTGRES_URL = os.environ.get("PLANS_DATABASE_URL")
+
+
+async def test_sqlite_problems_flag_scans_and_sorts_but_not_ordered_index_walks() -> None:
+    strict = plans.Scenario("strict", run=None)
+    lines = [
+        "SCAN prompts USING INDEX idx_prompts_updated_at_id",
+        "SEARCH prompt_versions_1 USING COVERING INDEX sqlite_autoindex_prompt_versions_1 (id=?)",
+        "SCAN prompt_tags_2",
+        "SCAN library_changes USING COVERING INDEX idx_library_changes_prompt_id",
+        "SCAN matched_ids",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ]
+
+    assert plans._sqlite_problems(lines, strict) == [
+        "full scan: SCAN prompt_tags_2",
+        "full scan: SCAN library_changes USING COVERING INDEX idx_library_changes_prompt_id",
+        "sort: USE TEMP B-TREE FOR ORDER BY",
+    ]
+    lenient = plans.Scenario("lenient", run=None, allow_sort=True, sqlite_scans=frozenset({"prompt_tags"}))
+    assert len(plans._sqlite_problems(lines, lenient)) == 1
+
+
+async def test_postgres_problems_walk_the_plan_tree() -> None:
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [
+            {
+                "Node Type": "Sort",
+                "Sort Key": ["prompts.updated_at DESC"],
+                "Plans": [{"Node Type": "Seq Scan", "Relation Name": "prompts"}],
+            },
+            {"Node Type": "Seq Scan", "Relation Name": "tiny_lookup"},
+        ],
+    }
+
+    assert plans._postgres_problems(plan, plans.Scenario("strict", run=None)) == [
+        "sort on prompts.updated_at DESC",
+        "sequential scan on prompts",
+    ]
+
+
+async def _check(database_url: str, size: int) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        await plans.seed(engine, size)
+        findings = await plans.check(engine)
+    finally:
+        await engine.dispose()
+    assert not findings, plans.format_findings(findings)
+
+
+async def test_service_queries_use_indexes_on_sqlite(tmp_path) -> None:
+    await _check(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}", 1500)
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="set PLANS_DATABASE_URL to a scratch Postgres database")
+async def test_service_queries_use_indexes_on_postgres() -> None:
+    await _check(POSTGRES_URL, 20_000)
@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import main
+from app.db import routing, session as app_session
+from app.db.base import Base
+from app.db.routing import ReadRouter, Replica
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _database(path) -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("CREATE TABLE whoami (name TEXT)"))
+        await conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": path.stem})
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    factories = {name: await _database(tmp_path / f"{name}.db") for name in ("primary", "replica1", "replica2")}
+    yield factories
+    for factory in factories.values():
+        await factory.kw["bind"].dispose()
+
+
+async def _whoami(router: ReadRouter, **kwargs) -> str:
+    async with router.session(**kwargs) as session:
+        return (await session.execute(text("SELECT name FROM whoami"))).scalar_one()
+
+
+async def test_reads_rotate_over_replicas_unless_pinned(databases) -> None:
+    router = ReadRouter(
+        lambda: databases["primary"],
+        [Replica("replica1", databases["replica1"]), Replica("replica2", databases["replica2"])],
+    )
+
+    assert [await _whoami(router) for _ in range(4)] == ["replica1", "replica2", "replica1", "replica2"]
+    assert await _whoami(router, pinned=True) == "primary"
+    assert await _whoami(ReadRouter(lambda: databases["primary"])) == "primary"
+
+
+async def test_unreachable_replica_fails_over_and_is_retried_later(databases, tmp_path) -> None:
+    clock = FakeClock()
+    broken = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    down = Replica("down", broken)
+    router = ReadRouter(lambda: databases["primary"], [down], retry_seconds=30, clock=clock)
+
+    assert await _whoami(router) == "primary"
+    assert down.down_until == 30
+    assert router.candidates() == []
+
+    clock.now = 31
+    assert router.candidates() == [down]
+
+
+@pytest_asyncio.fixture
+async def routed_client(databases, monkeypatch):
+    monkeypatch.setattr(app_session, "AsyncSessionLocal", databases["primary"])
+    router = ReadRouter(lambda: app_session.AsyncSessionLocal, [Replica("replica1", databases["replica1"])])
+    monkeypatch.setattr(app_session, "read_router", router)
+    async with AsyncClient(transport=ASGITransport(app=main.app), base_url="http://testserver") as client:
+        yield client
+
+
+async def test_writers_read_their_writes_from_the_primary(routed_client: AsyncClient) -> None:
+    name = f"routed-{uuid.uuid4().hex[:8]}"
+    created = await routed_client.post(
+        "/api/v1/prompts", json={"name": name, "display_name": "Routed", "content": "written to the primary"}
+    )
+    assert created.status_code == 201
+    assert routing.PIN_COOKIE in created.cookies
+
+    pinned = await routed_client.get(f"/api/v1/prompts/{created.json()['id']}")
+    assert pinned.status_code == 200
+    assert [item["name"] for item in (await routed_client.get("/api/v1/prompts")).json()["items"]] == [name]
+
+    routed_client.cookies.clear()
+    # The stand-in replica never receives the write, like one lagging behind.
+    assert (await routed_client.get(f"/api/v1/prompts/{created.json()['id']}")).status_code == 404
+    assert (await routed_client.get("/api/v1/prompts")).json()["items"] == []